@@ -0,0 +1,281 @@
+"""Benchmarks of the simulation throughput and of the gradient cost.
+
+Each case runs in a fresh process, so that the peak memory (maximum resident
+set size) of a case is not hidden by the previous ones. The reported metrics
+are the best wall time over the repeats, the throughput in object-steps per
+second (number of objects x number of time steps / time) and the additional
+peak memory of the timed runs: on Linux, the peak resident set size
+(`VmHWM`) is reset right before the timed runs by writing 5 to
+`/proc/self/clear_refs`, and the peak memory is its increase over the
+resident set size at that point. Elsewhere the peak cannot be reset, and the
+increase of `ru_maxrss` over the setup and the warm-up run is reported, which
+is a lower bound. tracemalloc is not used as it does not see the memory of
+the tensors, which is allocated by torch. The precision cases also report
+the maximum error of the final positions against a float64 simulation on
+the same time grid.
+
+Usage::
+
+    python benchmarks/run.py                       # run and print
+    python benchmarks/run.py --quick               # smaller sizes
+    python benchmarks/run.py --save benchmarks/baselines.json
+    python benchmarks/run.py --compare benchmarks/baselines.json
+
+With `--compare`, the cases slower than the baseline by more than the
+tolerance (20% by default) are reported as regressions and the exit code is
+1.
+"""
+import argparse
+import json
+import multiprocessing
+import platform
+import resource
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import torch
+
+from mlballistics.forces import Drag, Gravity
+from mlballistics.objects import Sphere, SphereBatch
+from mlballistics.scene import Scene, SimulationCache
+
+
+def _force(depth: int):
+    """Force tree with `depth` leaves: gravity and drags."""
+    force = Gravity()
+    for _ in range(depth - 1):
+        force = force + Drag(density=1.0 / depth)
+    return force
+
+
+def _scene(n_objects: int, depth: int = 2, requires_grad: bool = False,
+           dtype=None):
+    generator = torch.Generator().manual_seed(0)
+    velocity = 10 * torch.rand(n_objects, 3, generator=generator)
+    velocity.requires_grad_(requires_grad)
+    batch = SphereBatch(
+        radius=0.1,
+        initial_position=torch.rand(n_objects, 3, generator=generator),
+        initial_velocity=velocity,
+        force=_force(depth),
+    )
+    return Scene([batch], dtype=dtype), velocity
+
+
+def simulation(n_objects: int, n_steps: int = 100, depth: int = 2,
+               backward: bool = False, method: str = "rk4"):
+    """Simulation of a scene, optionally with a backward pass."""
+    scene, velocity = _scene(n_objects, depth, requires_grad=backward)
+
+    def run():
+        scene.simulate(stop_time=1.0, n_steps=n_steps, method=method)
+        if backward:
+            scene.objects[0].trajectory[-1].sum().backward()
+
+    return run, n_objects * n_steps
+
+
+def precision(dtype: str, n_objects: int = 1000, n_steps: int = 1000):
+    """Simulation of a scene with a dtype policy, and its accuracy."""
+    scene, _ = _scene(n_objects, dtype=getattr(torch, dtype))
+    reference, _ = _scene(n_objects, dtype=torch.float64)
+    reference.simulate(stop_time=10.0, n_steps=n_steps)
+    expected = reference.objects[0].trajectory[-1]
+
+    def run():
+        scene.simulate(stop_time=10.0, n_steps=n_steps)
+        error = scene.objects[0].trajectory[-1].double() - expected
+        return dict(max_error=error.abs().max().item())
+
+    return run, n_objects * n_steps
+
+
+def fixed_target(cache: bool = False):
+    """One closure call of the optimization loop of the fixed-target example.
+
+    The missile is simulated and backpropagated, the target is static.
+    """
+    target = Sphere(
+        radius=0.1, initial_position=torch.tensor([13.0, 0.0, 10.0])
+    )
+    speed = torch.tensor(20.0, requires_grad=True)
+    angle = torch.tensor(0.8, requires_grad=True)
+    simulation_cache = SimulationCache() if cache else None
+
+    def run():
+        missile = Sphere(
+            radius=0.1,
+            initial_velocity=speed * torch.stack([
+                torch.cos(angle), torch.zeros(()), torch.sin(angle)
+            ]),
+            force=Gravity() + Drag(),
+        )
+        scene = Scene([missile, target])
+        scene.simulate(stop_time=1, n_steps=100, cache=simulation_cache)
+        loss = torch.norm(missile.trajectory - target.trajectory, dim=1).min()
+        loss.backward()
+
+    return run, 2 * 100
+
+
+def cases(quick: bool = False) -> dict:
+    """Benchmark cases, as `name: (function, kwargs)`."""
+    sizes = [1, 100, 10000] if quick else [1, 10, 100, 1000, 10000, 100000]
+    steps = [10, 100] if quick else [10, 100, 1000]
+    depths = [1, 2, 4] if quick else [1, 2, 4, 8]
+    backward = [1, 100] if quick else [1, 100, 10000]
+
+    result = {}
+    for n in sizes:
+        result[f"objects[{n}]"] = (simulation, dict(n_objects=n))
+    for n_steps in steps:
+        result[f"steps[{n_steps}]"] = (
+            simulation, dict(n_objects=1000, n_steps=n_steps)
+        )
+    for depth in depths:
+        result[f"depth[{depth}]"] = (
+            simulation, dict(n_objects=1000, depth=depth)
+        )
+    for n in backward:
+        result[f"backward[{n}]"] = (
+            simulation, dict(n_objects=n, backward=True)
+        )
+    for method in ["rk4", "verlet", "symplectic_euler"]:
+        result[f"method[{method}]"] = (
+            simulation, dict(n_objects=1000, n_steps=1000, method=method)
+        )
+    for dtype in ["float64", "float32", "bfloat16"]:
+        result[f"precision[{dtype}]"] = (precision, dict(dtype=dtype))
+    result["fixed_target"] = (fixed_target, {})
+    result["fixed_target[cache]"] = (fixed_target, dict(cache=True))
+    return result
+
+
+def _memory_status(name: str) -> int:
+    """Field of /proc/self/status, in kB."""
+    with open("/proc/self/status") as file:
+        for line in file:
+            if line.startswith(name + ":"):
+                return int(line.split()[1])
+    raise KeyError(name)
+
+
+def _reset_peak_memory() -> int:
+    """Reset the peak resident set size of the process if possible.
+
+    Returns
+    -------
+    int
+        The memory the peak is compared with, in kB: the current resident
+        set size if the peak was reset, the current peak otherwise.
+    """
+    try:
+        with open("/proc/self/clear_refs", "w") as file:
+            file.write("5")
+        return _memory_status("VmRSS")
+    except (OSError, KeyError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def _peak_memory() -> int:
+    """Peak resident set size of the process, in kB."""
+    try:
+        return _memory_status("VmHWM")
+    except (OSError, KeyError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def _measure(function, kwargs: dict, repeat: int) -> dict:
+    """Run a case in the current process."""
+    torch.manual_seed(0)
+    run, object_steps = function(**kwargs)
+    run()  # warm-up
+    rss = _reset_peak_memory()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        metrics = run()
+        times.append(time.perf_counter() - start)
+    peak = _peak_memory()
+    best = min(times)
+    return dict(
+        time=best,
+        steps_per_second=object_steps / best,
+        peak_memory_mb=max(peak - rss, 0) / 1024,
+        **(metrics or {}),
+    )
+
+
+def run_cases(quick: bool = False, repeat: int = 3) -> dict:
+    """Run all the cases, each in a fresh process."""
+    context = multiprocessing.get_context("spawn")
+    results = {}
+    for name, (function, kwargs) in cases(quick).items():
+        with ProcessPoolExecutor(1, mp_context=context) as executor:
+            results[name] = executor.submit(
+                _measure, function, kwargs, repeat
+            ).result()
+        line = (
+            f"{name:24s} {results[name]['time'] * 1e3:10.2f} ms"
+            f" {results[name]['steps_per_second']:14.3e} steps/s"
+            f" {results[name]['peak_memory_mb']:10.1f} MB"
+        )
+        if "max_error" in results[name]:
+            line += f" {results[name]['max_error']:10.2e} error"
+        print(line, flush=True)
+    return results
+
+
+def compare(results: dict, baselines: dict, tolerance: float) -> list[str]:
+    """Names of the cases slower than their baseline."""
+    regressions = []
+    for name, result in results.items():
+        if name not in baselines["results"]:
+            continue
+        ratio = result["time"] / baselines["results"][name]["time"]
+        status = "REGRESSION" if ratio > 1 + tolerance else "ok"
+        print(f"{name:24s} {ratio:6.2f}x baseline  {status}")
+        if ratio > 1 + tolerance:
+            regressions.append(name)
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--quick", action="store_true")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--save", help="Save the results as baselines.")
+    parser.add_argument("--compare", help="Compare with stored baselines.")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    results = run_cases(quick=args.quick, repeat=args.repeat)
+
+    if args.save:
+        with open(args.save, "w") as file:
+            json.dump(
+                dict(
+                    machine=dict(
+                        platform=platform.platform(),
+                        processor=platform.processor(),
+                        python=platform.python_version(),
+                        torch=torch.__version__,
+                        threads=torch.get_num_threads(),
+                    ),
+                    results=results,
+                ),
+                file,
+                indent=2,
+            )
+
+    if args.compare:
+        with open(args.compare) as file:
+            baselines = json.load(file)
+        if compare(results, baselines, args.tolerance):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -9,7 +9,7 @@ import torch
 torch.manual_seed(0)
 from mlballistics.objects import Sphere
 from mlballistics.forces import Gravity, Drag
-from mlballistics.scene import Scene
+from mlballistics.scene import Scene, SimulationCache
 
 cpos = [(6.500000085681677, -22.012470029172995, 5.000000189989805),
  (6.500000085681677, 0.0, 5.000000189989805),
@@ -126,7 +126,10 @@ for time in range(100):
 plotter_gif.show()
 
 # %%
-# Define the forward pass.
+# Define the forward pass. The target does not change between the calls, its
+# trajectory is restored from a cache instead of being simulated again.
+
+cache = SimulationCache()
 
 
 def forward(initial_angle, initial_speed):
@@ -138,7 +141,7 @@ def forward(initial_angle, initial_speed):
     missile.initial_velocity = initial_velocity
 
     scene = Scene(objects=[missile, target])
-    scene.simulate(stop_time=1, n_steps=100)
+    scene.simulate(stop_time=1, n_steps=100, cache=cache)
 
     loss = torch.norm(missile.trajectory - target.trajectory, dim=1).min()
 
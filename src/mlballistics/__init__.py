@@ -1 +1,3 @@
-all = ['forces', 'objects', 'scene']
\ No newline at end of file
+all = ['forces', 'objects', 'scene', 'fire_control', 'dataset', 'store',
+       'firing_table', 'learning', 'profiling', 'rendering',
+       'integrators']
\ No newline at end of file
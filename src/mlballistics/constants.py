@@ -3,3 +3,9 @@ SPHERE_DRAG_COEFFICIENT = 0.47
 
 # Fluid density
 AIR_DENSITY = 1.168
+
+# Scale height of the isothermal atmosphere (m)
+ATMOSPHERE_SCALE_HEIGHT = 8500.0
+
+# Speed of sound in the air at 20 degrees Celsius (m/s)
+SPEED_OF_SOUND = 343.0
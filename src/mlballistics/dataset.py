@@ -0,0 +1,335 @@
+"""Generation of training datasets for the fire-control problem.
+
+A dataset maps the initial state of a target to the launch velocity of a
+missile that hits it. Targets are sampled following a scenario, and the
+launch velocities are solved in large batches with
+`fire_control.solve_launch_velocities`.
+
+The dataset is written as shards (`shard_00000.npz`, ...) in a directory,
+together with a `metadata.json` file describing the generation. Shards are
+written atomically and the generation skips the shards that already exist,
+so an interrupted generation can be resumed by running it again. Shards are
+generated in parallel by a pool of processes.
+"""
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Literal, Optional
+
+import numpy as np
+import torch
+
+from .fire_control import solve_launch_velocities
+from .forces import Gravity, Drag, Oscillation, Thrust
+from .forces.base_force import _force_config
+from .objects import Sphere, SphereBatch
+from .scene.parallel import _init_worker
+from .utils import _serializable
+
+
+Scenario = Literal["constant_speed", "acceleration", "oscillation"]
+
+# Fields stored in each shard
+FIELDS = ("target_state", "velocity", "time", "miss_distance")
+
+# Per-sample parameters of the force of the targets, for each scenario
+SCENARIO_FIELDS = {
+    "constant_speed": (),
+    "acceleration": ("acceleration",),
+    "oscillation": ("altitude", "frequency"),
+}
+
+
+def sample_targets(
+        n: int,
+        scenario: Scenario = "constant_speed",
+        position_range: tuple = ((10.0, 0.0, 5.0), (20.0, 0.0, 15.0)),
+        velocity_range: tuple = ((-2.0, 0.0, -2.0), (2.0, 0.0, 2.0)),
+        acceleration_range: tuple = ((-2.0, 0.0, -2.0), (2.0, 0.0, 2.0)),
+        frequency_range: tuple = (0.5, 3.0),
+        radius: float = 0.1,
+        generator: Optional[torch.Generator] = None,
+        ) -> SphereBatch:
+    """Sample a batch of targets following a scenario.
+
+    Parameters
+    ----------
+    n
+        Number of targets.
+    scenario
+        "constant_speed" (no force), "acceleration" (constant thrust) or
+        "oscillation" (oscillation around the initial altitude).
+    position_range
+        Lower and upper bounds of the initial positions.
+    velocity_range
+        Lower and upper bounds of the initial velocities.
+    acceleration_range
+        Lower and upper bounds of the accelerations, for the "acceleration"
+        scenario.
+    frequency_range
+        Lower and upper bounds of the angular frequencies, for the
+        "oscillation" scenario.
+    radius
+        Radius of the targets.
+    generator
+        Random number generator.
+
+    Returns
+    -------
+    SphereBatch
+        The targets.
+    """
+    def uniform(bounds, shape):
+        low, high = torch.tensor(bounds[0]), torch.tensor(bounds[1])
+        return low + (high - low) * torch.rand(shape, generator=generator)
+
+    position = uniform(position_range, (n, 3))
+    velocity = uniform(velocity_range, (n, 3))
+
+    if scenario == "constant_speed":
+        force = None
+    elif scenario == "acceleration":
+        force = Thrust(acceleration=uniform(acceleration_range, (n, 3)))
+    elif scenario == "oscillation":
+        frequency = uniform(
+            ((frequency_range[0],), (frequency_range[1],)), (n, 1)
+        )[:, 0]
+        force = Oscillation(altitude=position[:, 2], frequency=frequency)
+    else:
+        raise ValueError(
+            f"Unknown scenario {scenario}, expected 'constant_speed',"
+            " 'acceleration' or 'oscillation'."
+        )
+
+    return SphereBatch(
+        radius=radius,
+        initial_position=position,
+        initial_velocity=velocity,
+        force=force,
+    )
+
+
+def generate_shard(
+        index: int,
+        shard_size: int,
+        seed: int = 0,
+        missile: Optional[Sphere] = None,
+        max_speed: Optional[float] = 30.0,
+        scenario: Scenario = "constant_speed",
+        **kwargs,
+        ) -> dict[str, np.ndarray]:
+    """Generate a shard of the dataset.
+
+    Parameters
+    ----------
+    index
+        Index of the shard, the random seed of the shard is `seed + index`.
+    shard_size
+        Number of samples of the shard.
+    seed
+        Random seed of the dataset.
+    missile
+        The missile. Default to a sphere of radius 0.1 and mass 1 subject to
+        gravity and drag.
+    max_speed
+        Maximum speed of the missile.
+    scenario
+        Scenario of the targets, see `sample_targets`.
+    **kwargs
+        Other arguments of `sample_targets`.
+
+    Returns
+    -------
+    dict[str, np.ndarray]
+        The fields of the shard: initial states of the targets `(n, 6)`,
+        launch velocities `(n, 3)`, intercept times `(n,)` and miss
+        distances `(n,)`, the name of the scenario (a 0-d array) and the
+        parameters of the force of the targets: accelerations `(n, 3)` for
+        the "acceleration" scenario, altitudes and angular frequencies
+        `(n,)` for the "oscillation" scenario.
+    """
+    if missile is None:
+        missile = Sphere(radius=0.1, mass=1.0, force=Gravity() + Drag())
+
+    generator = torch.Generator().manual_seed(seed + index)
+    targets = sample_targets(
+        shard_size, scenario=scenario, generator=generator, **kwargs
+    )
+    solution = solve_launch_velocities(missile, targets, max_speed=max_speed)
+
+    shard = dict(
+        target_state=targets.initial_state.numpy(),
+        velocity=solution.velocity.numpy(),
+        time=solution.time.numpy(),
+        miss_distance=solution.miss_distance.numpy(),
+        scenario=np.array(scenario),
+    )
+    for field in SCENARIO_FIELDS[scenario]:
+        shard[field] = getattr(targets.force, field).numpy()
+    return shard
+
+
+def _shard_path(directory: str, index: int) -> str:
+    return os.path.join(directory, f"shard_{index:05d}.npz")
+
+
+def _write_shard(directory: str, index: int, **kwargs) -> str:
+    """Generate a shard and write it atomically."""
+    shard = generate_shard(index, **kwargs)
+    path = _shard_path(directory, index)
+    temporary = path + ".tmp.npz"
+    np.savez(temporary, **shard)
+    os.replace(temporary, path)
+    return path
+
+
+def generate_dataset(
+        directory: str,
+        n_samples: int,
+        shard_size: int = 10000,
+        seed: int = 0,
+        missile: Optional[Sphere] = None,
+        max_speed: Optional[float] = 30.0,
+        scenario: Scenario = "constant_speed",
+        n_workers: Optional[int] = None,
+        **kwargs,
+        ) -> list[str]:
+    """Generate a dataset as shards on disk.
+
+    Shards that already exist are not generated again, so that an
+    interrupted generation can be resumed. The parameters of the generation
+    are stored in `metadata.json` and must match when resuming.
+
+    Parameters
+    ----------
+    directory
+        Output directory.
+    n_samples
+        Total number of samples.
+    shard_size
+        Number of samples per shard.
+    seed
+        Random seed, each shard is generated with the seed `seed + index`.
+    missile
+        The missile, see `generate_shard`.
+    max_speed
+        Maximum speed of the missile.
+    scenario
+        Scenario of the targets, see `sample_targets`.
+    n_workers
+        Number of processes, each using a single torch thread. Default to
+        the number of CPUs. If 0, the shards are generated in the current
+        process, with its torch threads.
+    **kwargs
+        Other arguments of `sample_targets`.
+
+    Returns
+    -------
+    list[str]
+        Paths of the shards.
+
+    Raises
+    ------
+    ValueError
+        If the directory contains a dataset generated with other parameters.
+    """
+    os.makedirs(directory, exist_ok=True)
+    metadata = dict(
+        n_samples=n_samples,
+        shard_size=shard_size,
+        seed=seed,
+        max_speed=max_speed,
+        scenario=scenario,
+        missile=None if missile is None else dict(
+            mass=_serializable(missile.mass),
+            drag_coefficient=_serializable(missile.drag_coefficient),
+            sectional_area=_serializable(missile.sectional_area),
+            force=_force_config(missile.force),
+        ),
+        **kwargs,
+    )
+    metadata = json.loads(json.dumps(metadata, default=str))
+
+    metadata_path = os.path.join(directory, "metadata.json")
+    if os.path.exists(metadata_path):
+        with open(metadata_path) as file:
+            if json.load(file) != metadata:
+                raise ValueError(
+                    f"{directory} contains a dataset generated with other"
+                    " parameters."
+                )
+    else:
+        with open(metadata_path, "w") as file:
+            json.dump(metadata, file, indent=2)
+
+    sizes = [
+        min(shard_size, n_samples - start)
+        for start in range(0, n_samples, shard_size)
+    ]
+    todo = [
+        index for index in range(len(sizes))
+        if not os.path.exists(_shard_path(directory, index))
+    ]
+    shard_kwargs = dict(
+        seed=seed,
+        missile=missile,
+        max_speed=max_speed,
+        scenario=scenario,
+        **kwargs,
+    )
+
+    if n_workers == 0:
+        for index in todo:
+            _write_shard(
+                directory, index, shard_size=sizes[index], **shard_kwargs
+            )
+    else:
+        with ProcessPoolExecutor(
+            max_workers=n_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(1,),
+        ) as executor:
+            futures = [
+                executor.submit(
+                    _write_shard,
+                    directory,
+                    index,
+                    shard_size=sizes[index],
+                    **shard_kwargs,
+                )
+                for index in todo
+            ]
+            for future in futures:
+                future.result()
+
+    return [_shard_path(directory, index) for index in range(len(sizes))]
+
+
+def load_dataset(directory: str) -> dict:
+    """Load all the shards of a dataset.
+
+    Parameters
+    ----------
+    directory
+        Directory of the dataset.
+
+    Returns
+    -------
+    dict
+        The fields of the dataset, concatenated over the shards (see
+        `generate_shard`), and the name of the scenario as a string.
+    """
+    paths = sorted(
+        os.path.join(directory, name) for name in os.listdir(directory)
+        if name.startswith("shard_") and not name.endswith(".tmp.npz")
+    )
+    shards = [np.load(path) for path in paths]
+    scenario = str(shards[0]["scenario"])
+    dataset = {
+        field: np.concatenate([shard[field] for shard in shards])
+        for field in FIELDS + SCENARIO_FIELDS[scenario]
+    }
+    dataset["scenario"] = scenario
+    return dataset
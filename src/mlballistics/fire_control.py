@@ -0,0 +1,224 @@
+"""Batched fire-control solver.
+
+Given a missile and a batch of targets, find for each target a launch velocity
+of the missile and an intercept time such that the missile and the target are
+at the same position at the intercept time.
+
+The unknowns of each shot are the launch velocity and the intercept time (4
+unknowns for 3 equations). They are solved with Gauss-Newton shooting: the
+missiles and the targets are integrated together in a single batched system,
+in a time rescaled by the intercept time, so that the miss vector is
+differentiable with respect to all the unknowns. Each iteration takes the
+minimum-norm step of the linearized problem, for all the shots at once.
+"""
+from typing import NamedTuple, Optional, Union
+
+import torch
+
+from .objects import Object, ObjectBatch
+from .scene.batched import BatchedSystem
+
+
+class FiringSolution(NamedTuple):
+    """Solution of the fire-control problem for a batch of targets.
+
+    Attributes
+    ----------
+    velocity
+        Launch velocities of the missile, of shape `(B, 3)`.
+    time
+        Intercept times, of shape `(B,)`.
+    miss_distance
+        Distance between the missile and the target at the intercept time, of
+        shape `(B,)`.
+    """
+    velocity: torch.Tensor
+    time: torch.Tensor
+    miss_distance: torch.Tensor
+
+
+def _initial_guess(
+        system: BatchedSystem,
+        missile: Object,
+        target_states: torch.Tensor,
+        time: torch.Tensor,
+        ) -> torch.Tensor:
+    """Launch velocities aiming at the targets, with a constant acceleration.
+
+    The acceleration of the missile at rest (gravity, but no drag) is
+    compensated, and the targets are assumed to move in straight lines.
+    """
+    n = target_states.shape[0]
+    at_rest = torch.cat([
+        missile.initial_position.to(target_states), target_states.new_zeros(3)
+    ])
+    acceleration = (system.forces_vector(
+        torch.cat([at_rest.expand(n, 6), target_states])
+    ) / system.mass[:, None])[:n]
+
+    t = time[:, None]
+    aim = target_states[:, :3] + target_states[:, 3:6] * t
+    return (aim - at_rest[:3]) / t - 0.5 * acceleration * t
+
+
+def _miss(
+        system: BatchedSystem,
+        missile_position: torch.Tensor,
+        target_states: torch.Tensor,
+        velocity: torch.Tensor,
+        time: torch.Tensor,
+        n_steps: int,
+        ) -> torch.Tensor:
+    """Miss vectors (missile position - target position) at the given times.
+
+    The system is integrated on the rescaled time tau = t / time, in [0, 1].
+    """
+    n = velocity.shape[0]
+    missile_states = torch.cat(
+        [missile_position.expand(n, 3), velocity], dim=1
+    )
+    initial_state = torch.cat([missile_states, target_states])
+    scale = torch.cat([time, time])[:, None]
+
+    from torchdiffeq import odeint
+
+    def rescaled_ode_func(tau, y):
+        return scale * system.ode_func(tau * scale, y)
+
+    final_state = odeint(
+        rescaled_ode_func,
+        initial_state,
+        t=torch.tensor(
+            [0.0, 1.0], dtype=initial_state.dtype, device=initial_state.device
+        ),
+        method="rk4",
+        options=dict(step_size=1 / n_steps),
+    )[-1]
+    return final_state[:n, :3] - final_state[n:, :3]
+
+
+def solve_launch_velocities(
+        missile: Object,
+        targets: Union[list[Object], ObjectBatch],
+        initial_velocity: Optional[torch.Tensor] = None,
+        initial_time: Optional[torch.Tensor] = None,
+        max_speed: Optional[float] = None,
+        n_steps: int = 100,
+        n_iterations: int = 20,
+        tolerance: float = 1e-4,
+        damping: float = 1e-6,
+        ) -> FiringSolution:
+    """Solve the launch velocities of a missile for a batch of targets.
+
+    Parameters
+    ----------
+    missile
+        The missile. Its initial position, parameters and force are shared
+        by all the shots, its initial velocity is ignored.
+    targets
+        The targets, with their initial states and forces, as a list of
+        objects or as a batch of objects.
+    initial_velocity
+        Warm start for the launch velocities, of shape `(B, 3)`. Default to
+        a velocity aiming at the target, that compensates the acceleration
+        of the missile at rest.
+    initial_time
+        Warm start for the intercept times, of shape `(B,)`. Default to 1.
+    max_speed
+        Maximum speed of the missile. The velocities are projected on the
+        ball of radius `max_speed` after each iteration.
+    n_steps
+        Number of RK4 steps between the launch and the intercept time.
+    n_iterations
+        Maximum number of Gauss-Newton iterations.
+    tolerance
+        The iterations stop when all the miss distances are smaller.
+    damping
+        Levenberg-Marquardt damping of the Gauss-Newton steps.
+
+    Returns
+    -------
+    FiringSolution
+        The launch velocities, the intercept times and the miss distances.
+        They are detached from the autograd graph.
+    """
+    n = len(targets)
+    missiles = ObjectBatch(
+        mass=missile.mass,
+        drag_coefficient=missile.drag_coefficient,
+        sectional_area=missile.sectional_area,
+        initial_position=missile.initial_position.expand(n, 3),
+        force=missile.force,
+    )
+    if isinstance(targets, ObjectBatch):
+        targets = [targets]
+    system = BatchedSystem([missiles] + list(targets))
+    dtype = system.initial_state.dtype
+    device = system.initial_state.device
+    target_states = system.initial_state[n:].detach()
+    missile_position = missile.initial_position.to(
+        dtype=dtype, device=device
+    ).detach()
+
+    if initial_time is None:
+        time = torch.ones(n, dtype=dtype, device=device)
+    else:
+        time = torch.as_tensor(
+            initial_time, dtype=dtype, device=device
+        ).clone()
+    if initial_velocity is None:
+        with torch.no_grad():
+            velocity = _initial_guess(system, missile, target_states, time)
+    else:
+        velocity = torch.as_tensor(
+            initial_velocity, dtype=dtype, device=device
+        ).clone()
+
+    identity = torch.eye(3, dtype=dtype, device=device)
+    for _ in range(n_iterations):
+        unknowns = torch.cat([velocity, time[:, None]], dim=1)
+        unknowns.requires_grad_(True)
+        miss = _miss(
+            system,
+            missile_position,
+            target_states,
+            unknowns[:, :3],
+            unknowns[:, 3],
+            n_steps,
+        )
+
+        if torch.linalg.vector_norm(miss, dim=1).max() < tolerance:
+            break
+
+        # Shots are independent: the gradient of the sum of the k-th
+        # component of the miss vectors gives the k-th row of each Jacobian
+        jacobian = torch.stack([
+            torch.autograd.grad(
+                miss[:, k].sum(), unknowns, retain_graph=k < 2
+            )[0]
+            for k in range(3)
+        ], dim=1)
+
+        with torch.no_grad():
+            normal = jacobian @ jacobian.transpose(1, 2) + damping * identity
+            step = jacobian.transpose(1, 2) @ torch.linalg.solve(
+                normal, miss.detach()[:, :, None]
+            )
+            unknowns = unknowns - step[:, :, 0]
+
+            velocity = unknowns[:, :3]
+            time = unknowns[:, 3].clamp(min=1e-3)
+            if max_speed is not None:
+                speed = torch.linalg.vector_norm(velocity, dim=1, keepdim=True)
+                velocity = velocity * (max_speed / speed).clamp(max=1.0)
+
+    with torch.no_grad():
+        miss = _miss(
+            system, missile_position, target_states, velocity, time, n_steps
+        )
+
+    return FiringSolution(
+        velocity=velocity.detach(),
+        time=time.detach(),
+        miss_distance=torch.linalg.vector_norm(miss, dim=1),
+    )
@@ -0,0 +1,330 @@
+"""Precomputed firing tables.
+
+A firing table gives the launch velocity of a missile that reaches a point,
+without simulating at query time. Gravity is vertical and drag only depends
+on the speed, so the problem is symmetric around the vertical axis of the
+launch position: the table is computed in the plane (horizontal range,
+altitude) and the azimuth of the query gives the direction of the horizontal
+velocity.
+
+The table is built in three steps:
+
+- sweep: a batch of missiles launched with all the combinations of speeds
+  (up to `max_speed`) and elevation angles is simulated;
+- indexing: the simulated points are binned on a regular grid of the plane,
+  and each node keeps the sample that reaches it first (direct fire);
+- refinement: the launch velocities of the nodes are refined with the
+  fire-control solver, so that the missile reaches the node exactly.
+
+Queries are answered by bilinear interpolation between the nodes.
+"""
+from typing import NamedTuple
+
+import numpy as np
+import torch
+
+from .fire_control import solve_launch_velocities
+from .objects import Object, ObjectBatch
+from .scene.batched import BatchedSystem
+
+
+class FiringTableQuery(NamedTuple):
+    """Launch velocities given by a firing table.
+
+    Attributes
+    ----------
+    velocity
+        Launch velocities, of shape `(..., 3)`. NaN for unreachable points.
+    time
+        Times of flight, of shape `(...,)`. NaN for unreachable points.
+    """
+    velocity: torch.Tensor
+    time: torch.Tensor
+
+
+class FiringTable:
+    """Table of launch velocities on a grid of (range, altitude).
+
+    Use `FiringTable.build` to compute a table and `FiringTable.load` to read
+    a table saved with `save`.
+
+    Parameters
+    ----------
+    origin
+        Launch position, of shape `(3,)`.
+    range_bounds
+        Minimum and maximum horizontal distances of the grid.
+    altitude_bounds
+        Minimum and maximum altitudes of the grid, relative to the launch
+        position.
+    velocity
+        Horizontal and vertical launch velocities of the nodes, of shape
+        `(n_range, n_altitude, 2)`.
+    time
+        Times of flight of the nodes, of shape `(n_range, n_altitude)`.
+
+    """
+    def __init__(
+            self,
+            origin: torch.Tensor,
+            range_bounds: tuple[float, float],
+            altitude_bounds: tuple[float, float],
+            velocity: torch.Tensor,
+            time: torch.Tensor,
+            ) -> None:
+        self.origin = torch.as_tensor(origin)
+        self.range_bounds = tuple(float(b) for b in range_bounds)
+        self.altitude_bounds = tuple(float(b) for b in altitude_bounds)
+        # Values of the nodes: horizontal velocity, vertical velocity, time
+        self._values = torch.cat([velocity, time[..., None]], dim=-1)
+
+    @classmethod
+    def build(
+            cls,
+            missile: Object,
+            max_speed: float = 30.0,
+            range_bounds: tuple[float, float] = (0.0, 30.0),
+            altitude_bounds: tuple[float, float] = (-5.0, 20.0),
+            shape: tuple[int, int] = (61, 51),
+            n_speeds: int = 64,
+            n_angles: int = 128,
+            stop_time: float = 3.0,
+            n_steps: int = 300,
+            refine: bool = True,
+            max_miss: float = 1e-3,
+            ) -> "FiringTable":
+        """Compute a firing table for a missile.
+
+        Parameters
+        ----------
+        missile
+            The missile. Its initial position, parameters and force are used,
+            its initial velocity is ignored.
+        max_speed
+            Maximum launch speed.
+        range_bounds
+            Minimum and maximum horizontal distances of the grid.
+        altitude_bounds
+            Minimum and maximum altitudes of the grid, relative to the launch
+            position.
+        shape
+            Number of nodes along the range and the altitude.
+        n_speeds
+            Number of launch speeds of the sweep.
+        n_angles
+            Number of elevation angles of the sweep, between -pi/2 and pi/2.
+        stop_time
+            Maximum time of flight.
+        n_steps
+            Number of time steps of the simulations of the sweep.
+        refine
+            If True, the nodes are refined with the fire-control solver.
+        max_miss
+            Nodes whose refined miss distance is larger are unreachable.
+
+        Returns
+        -------
+        FiringTable
+            The table. Unreachable nodes have NaN values.
+        """
+        origin = missile.initial_position.detach()
+        dtype = origin.dtype
+
+        # Sweep of launch speeds and elevation angles, in the (x, z) plane
+        speed = torch.linspace(0, max_speed, n_speeds + 1, dtype=dtype)[1:]
+        angle = torch.linspace(-torch.pi / 2, torch.pi / 2, n_angles)
+        speed, angle = torch.meshgrid(speed, angle.to(dtype), indexing="ij")
+        launch = torch.stack([
+            speed * torch.cos(angle),
+            torch.zeros_like(speed),
+            speed * torch.sin(angle),
+        ], dim=-1).reshape(-1, 3)
+        sweep = ObjectBatch(
+            mass=missile.mass,
+            drag_coefficient=missile.drag_coefficient,
+            sectional_area=missile.sectional_area,
+            initial_position=origin.expand(len(launch), 3),
+            initial_velocity=launch,
+            force=missile.force,
+        )
+        time = torch.linspace(0, stop_time, n_steps, dtype=dtype)
+        with torch.no_grad():
+            states = BatchedSystem([sweep]).simulate(time)
+
+        # Binning of the samples (time step, shot) on the nodes of the grid
+        low = torch.tensor([range_bounds[0], altitude_bounds[0]], dtype=dtype)
+        high = torch.tensor([range_bounds[1], altitude_bounds[1]], dtype=dtype)
+        size = torch.tensor(shape)
+        step = (high - low) / (size - 1)
+        points = (states[1:, :, [0, 2]] - origin[[0, 2]] - low) / step
+        cells = points.round().long()
+        inside = ((cells >= 0) & (cells < size)).all(dim=-1)
+        samples = torch.nonzero(inside)
+        node = cells[inside][:, 0] * shape[1] + cells[inside][:, 1]
+
+        # Keep the first sample reaching each node (samples are sorted by
+        # time step)
+        n_nodes = shape[0] * shape[1]
+        first = torch.full((n_nodes,), len(node), dtype=torch.long)
+        first = first.scatter_reduce(
+            0, node, torch.arange(len(node)), reduce="amin"
+        )
+        reached = first < len(node)
+        step_index, shot = samples[first[reached]].unbind(dim=1)
+
+        velocity = torch.full((n_nodes, 2), torch.nan, dtype=dtype)
+        flight_time = torch.full((n_nodes,), torch.nan, dtype=dtype)
+        velocity[reached] = launch[shot][:, [0, 2]]
+        flight_time[reached] = time[step_index + 1]
+
+        if refine and reached.any():
+            nodes = torch.nonzero(reached)[:, 0]
+            targets = torch.stack([
+                low[0] + step[0] * (nodes // shape[1]),
+                torch.zeros(len(nodes), dtype=dtype),
+                low[1] + step[1] * (nodes % shape[1]),
+            ], dim=1) + origin
+            solution = solve_launch_velocities(
+                missile,
+                ObjectBatch(initial_position=targets),
+                initial_velocity=launch[shot],
+                initial_time=flight_time[reached],
+                max_speed=max_speed,
+            )
+            hit = solution.miss_distance <= max_miss
+            velocity[nodes] = torch.where(
+                hit[:, None], solution.velocity[:, [0, 2]], torch.nan
+            )
+            flight_time[nodes] = torch.where(hit, solution.time, torch.nan)
+
+        return cls(
+            origin=origin,
+            range_bounds=range_bounds,
+            altitude_bounds=altitude_bounds,
+            velocity=velocity.reshape(shape + (2,)),
+            time=flight_time.reshape(shape),
+        )
+
+    def __call__(self, points: torch.Tensor) -> FiringTableQuery:
+        """Launch velocities to reach points.
+
+        Parameters
+        ----------
+        points
+            Positions to reach, of shape `(..., 3)`.
+
+        Returns
+        -------
+        FiringTableQuery
+            The launch velocities and the times of flight, interpolated
+            between the nodes of the table. NaN for the points outside the
+            table or next to an unreachable node.
+        """
+        points = torch.as_tensor(points, dtype=self._values.dtype)
+        relative = points - self.origin
+        horizontal = relative[..., :2]
+        distance = torch.linalg.vector_norm(horizontal, dim=-1)
+
+        shape = self._values.shape[:2]
+        coordinates = []
+        for x, (low, high), n in zip(
+            (distance, relative[..., 2]),
+            (self.range_bounds, self.altitude_bounds),
+            shape,
+        ):
+            x = (x - low) / (high - low) * (n - 1)
+            x = torch.where((x >= 0) & (x <= n - 1), x, torch.nan)
+            coordinates.append(x)
+
+        values = _bilinear(self._values, *coordinates)
+        direction = horizontal / distance[..., None].clamp(min=1e-12)
+        velocity = torch.cat([
+            direction * values[..., :1], values[..., 1:2]
+        ], dim=-1)
+        return FiringTableQuery(velocity=velocity, time=values[..., 2])
+
+    def save(self, path: str) -> None:
+        """Save the table to a `.npz` file.
+
+        Parameters
+        ----------
+        path
+            Path of the file.
+        """
+        np.savez(
+            path,
+            origin=self.origin.numpy(),
+            range_bounds=np.array(self.range_bounds),
+            altitude_bounds=np.array(self.altitude_bounds),
+            values=self._values.numpy(),
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "FiringTable":
+        """Load a table saved with `save`.
+
+        Parameters
+        ----------
+        path
+            Path of the file.
+
+        Returns
+        -------
+        FiringTable
+            The table.
+        """
+        with np.load(path) as data:
+            values = torch.from_numpy(data["values"])
+            return cls(
+                origin=torch.from_numpy(data["origin"]),
+                range_bounds=data["range_bounds"],
+                altitude_bounds=data["altitude_bounds"],
+                velocity=values[..., :2],
+                time=values[..., 2],
+            )
+
+    @property
+    def velocity(self) -> torch.Tensor:
+        """Horizontal and vertical launch velocities of the nodes."""
+        return self._values[..., :2]
+
+    @property
+    def time(self) -> torch.Tensor:
+        """Times of flight of the nodes."""
+        return self._values[..., 2]
+
+
+def _bilinear(
+        values: torch.Tensor,
+        x: torch.Tensor,
+        y: torch.Tensor,
+        ) -> torch.Tensor:
+    """Bilinear interpolation of a grid of values.
+
+    Parameters
+    ----------
+    values
+        Values of the nodes, of shape `(n_x, n_y, C)`.
+    x
+        Fractional indices along the first axis, in `[0, n_x - 1]` or NaN.
+    y
+        Fractional indices along the second axis, in `[0, n_y - 1]` or NaN.
+
+    Returns
+    -------
+    torch.Tensor
+        Interpolated values, of shape `x.shape + (C,)`, NaN where an index is
+        NaN.
+    """
+    invalid = (x.isnan() | y.isnan())[..., None]
+    x, y = x.nan_to_num(0.0), y.nan_to_num(0.0)
+    i = x.floor().long().clamp(max=values.shape[0] - 2)
+    j = y.floor().long().clamp(max=values.shape[1] - 2)
+    u, v = (x - i)[..., None], (y - j)[..., None]
+    result = (
+        (1 - u) * (1 - v) * values[i, j]
+        + u * (1 - v) * values[i + 1, j]
+        + (1 - u) * v * values[i, j + 1]
+        + u * v * values[i + 1, j + 1]
+    )
+    return torch.where(invalid, torch.nan, result)
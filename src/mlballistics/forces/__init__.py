@@ -4,4 +4,9 @@
 from .base_force import Force
 from .null_force import NullForce
 from .gravity import Gravity
-from .drag import Drag
\ No newline at end of file
+from .drag import Drag
+from .thrust import Thrust
+from .oscillation import Oscillation
+from .field import GridField, exponential_atmosphere
+from .wind import Wind
+from .drag_tables import DragTable, G1, G7
@@ -1,14 +1,27 @@
 """Parent class for all forces."""
 import torch
 
+from ..profiling import _call_force
+
 
 class Force:
     """Abstract class for forces.
 
     A force is represented by a function that takes a state and an object as
     input and returns a force vector.
+
+    Forces are vectorized: the state can be a single state of shape `(6,)` or
+    a batch of states of shape `(..., 6)`. The parameters of the object (mass,
+    drag coefficient, sectional area) can be scalars or tensors of shape
+    `(...,)`, one value per state. The output has shape `(..., 3)`.
+
+    Forces that do not depend on the state of the object (only on its
+    parameters) set `is_constant` to True, which allows the simulators to
+    compute them once and reuse them for all evaluations of the ODE.
     """
 
+    is_constant = False
+
     def __init__(self) -> None:
         pass
 
@@ -26,15 +39,172 @@ class Force:
         """
         return SumForce(f1=self, f2=other)
 
+    def parameters(self) -> list[torch.Tensor]:
+        """Parameters of the force that are tensors.
+
+        They are registered as parameters of the ODE when simulating with the
+        adjoint method, so that they receive gradients.
+
+        Returns
+        -------
+        list[torch.Tensor]
+            The tensor parameters of the force.
+        """
+        return []
+
+    def _lower(self, state: torch.Tensor, obj) -> tuple:
+        """Lower the force to the ballistic form.
+
+        Forces that support fused evaluation are written as
+        $F = f - k ||v|| v$ where $f$ and $k$ only depend on the parameters of
+        the object.
+
+        Parameters
+        ----------
+        state
+            State of shape `(..., 6)`, used for its shape, dtype and device.
+        obj
+            The object (or the parameters of a batch of objects).
+
+        Returns
+        -------
+        tuple[torch.Tensor, torch.Tensor]
+            The constant part $f$ of shape `(..., 3)` and the quadratic drag
+            factor $k$ of shape `(...,)`.
+
+        Raises
+        ------
+        NotImplementedError
+            If the force cannot be written in the ballistic form.
+        """
+        raise NotImplementedError(
+            f"{type(self).__name__} cannot be lowered to a fused kernel."
+        )
+
+    def _rows(self, index) -> "Force":
+        """Force acting on a subset of the objects of a batch.
+
+        Forces with per-object parameters (one row per object of a batch)
+        return a copy with the rows of `index`, so that slicing a batch
+        slices its force as well. Other forces are shared by all the rows.
+
+        Parameters
+        ----------
+        index
+            An integer, or a tensor of indices of the rows.
+
+        Returns
+        -------
+        Force
+            The force of the rows.
+        """
+        return self
+
+    @property
+    def _per_object(self) -> bool:
+        """Whether the force has per-object parameters (see `_rows`).
+
+        Such a force only applies to the rows of the batch it was built for,
+        so it is not shared with other objects.
+        """
+        return False
+
+    def _leaves(self) -> list["Force"]:
+        """Leaf forces of the force tree, in order."""
+        return [self]
+
+    @property
+    def _config(self) -> dict:
+        """Parameters of the force, serializable to JSON."""
+        return {}
+
+    @property
+    def _structure(self) -> tuple:
+        """Structure of the force tree, independently of its parameters."""
+        return (type(self),)
+
+    @property
+    def _key(self) -> tuple:
+        """Key identifying the force.
+
+        Two forces with the same key compute the same force vectors, so
+        objects sharing a key can be evaluated in a single call. By default,
+        a force is only equal to itself.
+        """
+        return (type(self), id(self))
+
 
 class SumForce(Force):
+    """Sum of two forces.
+
+    Parameters
+    ----------
+    f1
+        First force.
+    f2
+        Second force.
+
+    """
     def __init__(self, f1: Force, f2: Force) -> None:
         super().__init__()
         self._f1 = f1
         self._f2 = f2
 
     def __call__(self, state=None, obj=None) -> torch.Tensor:
-        return self._f1(
-            state=state,
-            obj=obj
-        ) + self._f2(state=state, obj=obj)
+        return _call_force(self._f1, state, obj) + _call_force(
+            self._f2, state, obj
+        )
+
+    def parameters(self) -> list[torch.Tensor]:
+        return self._f1.parameters() + self._f2.parameters()
+
+    def _lower(self, state: torch.Tensor, obj) -> tuple:
+        f1, k1 = self._f1._lower(state, obj)
+        f2, k2 = self._f2._lower(state, obj)
+        return f1 + f2, k1 + k2
+
+    def _rows(self, index) -> Force:
+        f1, f2 = self._f1._rows(index), self._f2._rows(index)
+        if f1 is self._f1 and f2 is self._f2:
+            return self
+        return SumForce(f1=f1, f2=f2)
+
+    @property
+    def _per_object(self) -> bool:
+        return self._f1._per_object or self._f2._per_object
+
+    def _leaves(self) -> list[Force]:
+        return self._f1._leaves() + self._f2._leaves()
+
+    @property
+    def _structure(self) -> tuple:
+        return (SumForce, self._f1._structure, self._f2._structure)
+
+    @property
+    def is_constant(self) -> bool:
+        """Whether both forces are constant."""
+        return self._f1.is_constant and self._f2.is_constant
+
+    @property
+    def _key(self) -> tuple:
+        return (SumForce, self._f1._key, self._f2._key)
+
+
+def _force_config(force: Force) -> list[dict]:
+    """Configuration of a force tree, serializable to JSON.
+
+    Parameters
+    ----------
+    force
+        The force tree.
+
+    Returns
+    -------
+    list[dict]
+        For each leaf force, its type and its parameters (tensors are
+        converted to lists, see `_config`).
+    """
+    return [
+        dict(type=type(leaf).__name__, **leaf._config)
+        for leaf in force._leaves()
+    ]
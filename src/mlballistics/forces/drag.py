@@ -1,6 +1,13 @@
+from typing import Optional
+
 import torch
 
 from .base_force import Force
+from .drag_tables import DragTable
+from ..constants import SPEED_OF_SOUND
+from ..utils import (
+    _column, _has_rows, _hashable, _select_rows, _serializable,
+)
 
 
 class Drag(Force):
@@ -28,28 +35,111 @@ class Drag(Force):
     https://en.wikipedia.org/wiki/Drag_(physics)
     https://en.wikipedia.org/wiki/Drag_coefficient
 
-
+    With a drag table (for example `G1` or `G7`), the drag coefficient
+    depends on the Mach number $M = ||v|| / c$, where $c$ is the speed of
+    sound: $c_d = i \, c_{ref}(M)$, where $c_{ref}$ is the tabulated
+    reference drag coefficient and $i$ the form factor of the projectiles
+    (1 for the reference projectile). The drag coefficient of the objects
+    is then not used.
 
     Parameters
     ----------
     density
         Fluid density.
+    drag_table
+        Reference drag coefficient as a function of the Mach number. If None,
+        the drag coefficient of the objects is constant.
+    speed_of_sound
+        Speed of sound in the fluid, used to compute the Mach number.
+    form_factor
+        Form factor $i$ of the projectiles, a float or a tensor of shape
+        `(N,)` for a batch of N objects. Only used with a drag table.
 
     """
 
     def __init__(
             self,
             density: float = 1.0,
+            drag_table: Optional[DragTable] = None,
+            speed_of_sound: float = SPEED_OF_SOUND,
+            form_factor: float = 1.0,
             ) -> None:
         super().__init__()
         self._density = density
+        self._drag_table = drag_table
+        self._speed_of_sound = speed_of_sound
+        self._form_factor = form_factor
 
     def __call__(self, state=None, obj=None) -> torch.Tensor:
-        v = state[3:6]
-        v_norm = torch.norm(v)
-        C = self._density * obj.drag_coefficient * obj.sectional_area / 2
+        v = state[..., 3:6]
+        v_norm = torch.norm(v, dim=-1, keepdim=True)
+        if self._drag_table is None:
+            drag_coefficient = _column(obj.drag_coefficient, state)
+        else:
+            mach = v_norm / _column(self._speed_of_sound, state)
+            drag_coefficient = _column(
+                self._form_factor, state
+            ) * self._drag_table(mach)
+        C = self._density * drag_coefficient * _column(
+            obj.sectional_area, state
+        ) / 2
         return - C * v_norm * v
 
+    def parameters(self) -> list[torch.Tensor]:
+        values = [self._density]
+        if self._drag_table is not None:
+            values += [self._speed_of_sound, self._form_factor]
+        return [value for value in values if isinstance(value, torch.Tensor)]
+
+    def _rows(self, index) -> "Drag":
+        form_factor = _select_rows(self._form_factor, index)
+        if form_factor is self._form_factor:
+            return self
+        return Drag(
+            density=self._density,
+            drag_table=self._drag_table,
+            speed_of_sound=self._speed_of_sound,
+            form_factor=form_factor,
+        )
+
+    @property
+    def _per_object(self) -> bool:
+        return _has_rows(self._form_factor)
+
+    def _lower(self, state: torch.Tensor, obj) -> tuple:
+        if self._drag_table is not None:
+            # The drag coefficient depends on the velocity
+            return super()._lower(state, obj)
+        C = self._density * _column(
+            obj.drag_coefficient, state
+        ) * _column(obj.sectional_area, state) / 2
+        return (
+            state.new_zeros(state.shape[:-1] + (3,)),
+            C.squeeze(-1).expand(state.shape[:-1]),
+        )
+
+    @property
+    def _key(self) -> tuple:
+        table = self._drag_table
+        if table is None:
+            return (Drag, _hashable(self._density))
+        return (
+            Drag,
+            _hashable(self._density),
+            ("table", table._digest),
+            _hashable(self._speed_of_sound),
+            _hashable(self._form_factor),
+        )
+
+    @property
+    def _config(self) -> dict:
+        return dict(
+            density=_serializable(self._density),
+            drag_table=_serializable(self._drag_table),
+            speed_of_sound=_serializable(self._speed_of_sound),
+            form_factor=_serializable(self._form_factor),
+        )
+
     @property
     def density(self) -> float:
         return self._density
@@ -57,3 +147,19 @@ class Drag(Force):
     @density.setter
     def density(self, value: float) -> None:
         self._density = value
+
+    @property
+    def form_factor(self) -> float:
+        return self._form_factor
+
+    @form_factor.setter
+    def form_factor(self, value: float) -> None:
+        self._form_factor = value
+
+    @property
+    def drag_table(self) -> Optional[DragTable]:
+        return self._drag_table
+
+    @drag_table.setter
+    def drag_table(self, value: Optional[DragTable]) -> None:
+        self._drag_table = value
@@ -0,0 +1,254 @@
+"""Fields sampled on regular 3D grids.
+
+A field is precomputed once on a regular grid and evaluated at the positions
+of the objects by trilinear interpolation. The lookup is vectorized: the 8
+corners of the cell of every position are gathered with a single indexing
+operation, so that evaluating a field for 100k objects in the right-hand
+side of the ODE costs a handful of tensor operations, without Python loops.
+"""
+import hashlib
+import math
+from typing import Callable, Optional, Sequence
+
+import torch
+
+from ..constants import AIR_DENSITY, ATMOSPHERE_SCALE_HEIGHT
+from ..utils import _hashable
+
+
+class GridField:
+    """Scalar or vector field sampled on a regular 3D grid.
+
+    The field is interpolated trilinearly between the nodes of the grid and
+    is constant outside the grid (the positions are clamped to the bounds).
+    The interpolation is differentiable with respect to the positions and to
+    the values of the grid.
+
+    Parameters
+    ----------
+    values
+        Values of the field at the nodes of the grid, of shape
+        `(nx, ny, nz)` for a scalar field or `(nx, ny, nz, C)` for a field
+        with `C` components. An axis with a single node makes the field
+        constant along this axis.
+    bounds
+        Coordinates of the first and the last nodes along each axis, as
+        `((x0, x1), (y0, y1), (z0, z1))`.
+
+    Raises
+    ------
+    ValueError
+        If the values do not have 3 spatial dimensions, or if the first and
+        the last nodes are equal along an axis with several nodes.
+
+    """
+    def __init__(
+            self,
+            values: torch.Tensor,
+            bounds: Sequence[tuple[float, float]],
+            ) -> None:
+        if values.dim() not in (3, 4):
+            raise ValueError(
+                "The values of a grid field must have shape (nx, ny, nz) or"
+                f" (nx, ny, nz, C), got {tuple(values.shape)}."
+            )
+        self._values = values
+        self._bounds = tuple((float(a), float(b)) for a, b in bounds)
+        for axis, ((low, high), n) in enumerate(
+                zip(self._bounds, values.shape[:3])):
+            if n > 1 and low == high:
+                raise ValueError(
+                    f"The bounds of the axis {axis} are equal ({low}), but"
+                    f" the grid has {n} nodes along this axis."
+                )
+        # Flattened values and grid constants, cached per dtype and device
+        # (unless the values require gradients)
+        self._tables = {}
+
+    @classmethod
+    def from_function(
+            cls,
+            function: Callable[[torch.Tensor], torch.Tensor],
+            bounds: Sequence[tuple[float, float]],
+            shape: Sequence[int],
+            ) -> "GridField":
+        """Sample a function on a regular grid.
+
+        Parameters
+        ----------
+        function
+            Function of the positions `(..., 3)` returning the values of the
+            field, of shape `(...,)` or `(..., C)`.
+        bounds
+            Bounds of the grid along each axis.
+        shape
+            Number of nodes along each axis.
+
+        Returns
+        -------
+        GridField
+            The sampled field.
+        """
+        axes = [
+            torch.linspace(low, high, n)
+            for (low, high), n in zip(bounds, shape)
+        ]
+        nodes = torch.stack(torch.meshgrid(*axes, indexing="ij"), dim=-1)
+        return cls(function(nodes), bounds)
+
+    def _table(self, dtype, device) -> tuple:
+        """Flattened values, origin, inverse spacing, last nodes, strides and
+        offsets of the corners of a cell."""
+        key = (dtype, device)
+        if key in self._tables:
+            return self._tables[key]
+        shape = self._values.shape[:3]
+        values = self._values.to(dtype=dtype, device=device)
+        values = values.reshape(math.prod(shape), -1)
+        origin = torch.tensor(
+            [low for low, _ in self._bounds], dtype=dtype, device=device
+        )
+        scale = torch.tensor(
+            [
+                (n - 1) / (high - low) if n > 1 else 0.0
+                for (low, high), n in zip(self._bounds, shape)
+            ],
+            dtype=dtype,
+            device=device,
+        )
+        last = torch.tensor([n - 1 for n in shape], dtype=dtype, device=device)
+        strides = torch.tensor(
+            [shape[1] * shape[2], shape[2], 1], device=device
+        )
+        # Offsets of the 8 corners of a cell in the flattened values,
+        # zero along the axes with a single node
+        steps = torch.tensor([int(n > 1) for n in shape], device=device)
+        corners = torch.tensor(
+            [[i, j, k] for i in (0, 1) for j in (0, 1) for k in (0, 1)],
+            device=device,
+        )
+        offsets = (corners * steps * strides).sum(dim=-1)
+        table = (values, origin, scale, last, strides, offsets)
+        if not self._values.requires_grad:
+            self._tables[key] = table
+        return table
+
+    def __call__(self, positions: torch.Tensor) -> torch.Tensor:
+        """Values of the field at positions.
+
+        Parameters
+        ----------
+        positions
+            Positions, of shape `(..., 3)`.
+
+        Returns
+        -------
+        torch.Tensor
+            Values of the field, of shape `(...,)` for a scalar field or
+            `(..., C)`.
+        """
+        values, origin, scale, last, strides, offsets = self._table(
+            positions.dtype, positions.device
+        )
+        # Continuous index of the positions in the grid, and index of their
+        # cells (the last cell along each axis contains the last node). The
+        # cells of NaN positions are replaced by the first one, so that the
+        # lookup does not fail and the values are NaN.
+        index = ((positions - origin) * scale).clamp(min=0)
+        index = torch.minimum(index, last)
+        cell = torch.minimum(index.detach().floor(), (last - 1).clamp(min=0))
+        cell = torch.nan_to_num(cell, nan=0.0)
+        fraction = (index - cell).unsqueeze(-1)
+
+        # Values at the 8 corners of the cells, gathered with a single lookup
+        flat = (cell.long() * strides).sum(dim=-1, keepdim=True) + offsets
+        result = values.index_select(0, flat.reshape(-1)).reshape(
+            flat.shape[:-1] + (2, 2, 2, values.shape[-1])
+        )
+        # Linear interpolations along x, y and z
+        result = torch.lerp(
+            result[..., 0, :, :, :],
+            result[..., 1, :, :, :],
+            fraction[..., 0, None, None, :],
+        )
+        result = torch.lerp(
+            result[..., 0, :, :],
+            result[..., 1, :, :],
+            fraction[..., 1, None, :],
+        )
+        result = torch.lerp(
+            result[..., 0, :], result[..., 1, :], fraction[..., 2, :]
+        )
+        if self._values.dim() == 3:
+            return result.squeeze(-1)
+        return result
+
+    def parameters(self) -> list[torch.Tensor]:
+        """Values of the grid, as a list of tensors."""
+        return [self._values]
+
+    @property
+    def _key(self) -> tuple:
+        return (GridField, _hashable(self._values), self._bounds)
+
+    @property
+    def _config(self) -> dict:
+        """Shape, bounds and hash of the values of the grid, serializable to
+        JSON (the values themselves can be too large)."""
+        values = self._values.detach().cpu().contiguous()
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(repr(values.dtype).encode())
+        digest.update(values.reshape(-1).view(torch.uint8).numpy().tobytes())
+        return dict(
+            shape=list(values.shape),
+            bounds=[list(bound) for bound in self._bounds],
+            values=digest.hexdigest(),
+        )
+
+    @property
+    def values(self) -> torch.Tensor:
+        return self._values
+
+    @property
+    def bounds(self) -> tuple[tuple[float, float], ...]:
+        return self._bounds
+
+
+def exponential_atmosphere(
+        altitude_bounds: tuple[float, float] = (0.0, 10000.0),
+        n_points: int = 1001,
+        density: float = AIR_DENSITY,
+        scale_height: float = ATMOSPHERE_SCALE_HEIGHT,
+        dtype: Optional[torch.dtype] = None,
+        ) -> GridField:
+    r"""Air density of an isothermal atmosphere, tabulated in altitude.
+
+    The density decreases exponentially with the altitude $z$:
+    $$ \rho(z) = \rho_0 e^{-z / H} $$
+    where $\rho_0$ is the density at $z = 0$ and $H$ the scale height. The
+    field only varies along the z axis.
+
+    Parameters
+    ----------
+    altitude_bounds
+        Altitudes of the first and the last nodes.
+    n_points
+        Number of nodes along the z axis.
+    density
+        Density $\rho_0$ at altitude 0.
+    scale_height
+        Scale height $H$.
+    dtype
+        Data type of the values.
+
+    Returns
+    -------
+    GridField
+        The scalar density field.
+    """
+    z = torch.linspace(*altitude_bounds, n_points, dtype=dtype)
+    values = density * torch.exp(-z / scale_height)
+    return GridField(
+        values.reshape(1, 1, n_points),
+        bounds=((0.0, 0.0), (0.0, 0.0), altitude_bounds),
+    )
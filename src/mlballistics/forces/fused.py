@@ -0,0 +1,146 @@
+"""Fused right-hand side of the ballistic ODE.
+
+Force trees made of forces that can be written in the ballistic form
+$F = f - k ||v|| v$ (see `Force._lower`) are lowered once into the tensors $f$
+and $k$. The right-hand side of the ODE is then evaluated by a single kernel,
+compiled with TorchScript or `torch.compile`, without any Python dispatch
+through the force tree.
+"""
+from typing import Literal
+
+import torch
+
+from .base_force import SumForce
+from ..utils import _column
+
+
+Backend = Literal["script", "compile"]
+
+# Compiled kernels, cached per (structure of the force tree, backend)
+_KERNELS = {}
+
+
+def _ballistic_rhs(
+        y: torch.Tensor,
+        acceleration: torch.Tensor,
+        drag: torch.Tensor,
+        ) -> torch.Tensor:
+    """Derivative of the state under the ballistic form of the forces."""
+    v = y[..., 3:6]
+    v_norm = torch.linalg.vector_norm(v, dim=-1, keepdim=True)
+    return torch.cat([
+        v,
+        acceleration - drag.unsqueeze(-1) * v_norm * v,
+        ],
+        dim=-1,
+    )
+
+
+def _constant_rhs(
+        y: torch.Tensor,
+        acceleration: torch.Tensor,
+        drag: torch.Tensor,
+        ) -> torch.Tensor:
+    """Derivative of the state under constant forces only."""
+    v = y[..., 3:6]
+    return torch.cat([v, acceleration.expand_as(v)], dim=-1)
+
+
+def _has_drag(structure: tuple) -> bool:
+    """Whether a force tree structure contains a velocity dependent term."""
+    if structure[0] is SumForce:
+        return _has_drag(structure[1]) or _has_drag(structure[2])
+    return not structure[0].is_constant
+
+
+def _kernel(structures: tuple, backend: Backend):
+    """Compiled kernel for a tuple of force tree structures."""
+    key = (structures, backend)
+    if key not in _KERNELS:
+        if any(_has_drag(structure) for structure in structures):
+            function = _ballistic_rhs
+        else:
+            function = _constant_rhs
+
+        if backend == "script":
+            _KERNELS[key] = torch.jit.script(function)
+        elif backend == "compile":
+            _KERNELS[key] = torch.compile(function, dynamic=False)
+        else:
+            raise ValueError(
+                f"Unknown backend {backend}, expected 'script' or 'compile'."
+            )
+    return _KERNELS[key]
+
+
+class FusedODE:
+    """Fused ODE function for a force tree and the parameters of objects.
+
+    Parameters
+    ----------
+    forces
+        List of pairs `(force, obj)`, where `obj` is an object or the
+        parameters of a batch of objects sharing the same force.
+    states
+        Initial states matching each pair, used for the shapes, dtype and
+        device of the lowered tensors.
+    backend
+        "script" for TorchScript or "compile" for `torch.compile`.
+    order
+        Optional permutation applied to the concatenated lowered tensors to
+        restore the order of the objects.
+
+    Raises
+    ------
+    ValueError
+        If one of the forces cannot be lowered to the ballistic form.
+
+    """
+    def __init__(
+            self,
+            forces: list,
+            states: list[torch.Tensor],
+            backend: Backend = "script",
+            order: torch.Tensor = None,
+            ) -> None:
+        accelerations, drags = [], []
+        for (force, obj), state in zip(forces, states):
+            try:
+                f, k = force._lower(state, obj)
+            except NotImplementedError as error:
+                raise ValueError(
+                    f"Cannot use a fused kernel: {error}"
+                ) from error
+            mass = _column(obj.mass, state)
+            accelerations.append(f / mass)
+            drags.append(k / mass.squeeze(-1))
+
+        if len(forces) == 1:
+            self._acceleration, self._drag = accelerations[0], drags[0]
+        else:
+            self._acceleration = torch.cat(accelerations, dim=0)
+            self._drag = torch.cat(drags, dim=0)
+        if order is not None:
+            self._acceleration = self._acceleration[order]
+            self._drag = self._drag[order]
+
+        self._kernel = _kernel(
+            tuple(force._structure for force, _ in forces), backend
+        )
+
+    def __call__(self, t, y):
+        """Derivative of the state.
+
+        Parameters
+        ----------
+        t
+            Time.
+        y
+            State tensor.
+
+        Returns
+        -------
+        torch.Tensor
+            Derivative of the state tensor.
+        """
+        return self._kernel(y, self._acceleration, self._drag)
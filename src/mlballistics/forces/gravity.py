@@ -1,18 +1,43 @@
 from .base_force import Force
-from ..utils import _ei
+from ..utils import _ei, _column, _hashable, _serializable
 
 import torch
 
 
 class Gravity(Force):
+
+    is_constant = True
+
     def __init__(self, g: float = 9.81) -> None:
         super().__init__()
         self._g = g
         return
 
     def __call__(self, state=None, obj=None) -> torch.Tensor:
-        m = obj.mass
-        return - m * self._g * _ei(3, 2)
+        m = _column(obj.mass, state)
+        force = - m * self._g * _ei(3, 2, dtype=m.dtype, device=m.device)
+        if state is None:
+            return force
+        return force.expand(state.shape[:-1] + (3,))
+
+    def parameters(self) -> list[torch.Tensor]:
+        if isinstance(self._g, torch.Tensor):
+            return [self._g]
+        return []
+
+    def _lower(self, state: torch.Tensor, obj) -> tuple:
+        return (
+            self(state, obj),
+            state.new_zeros(state.shape[:-1]),
+        )
+
+    @property
+    def _key(self) -> tuple:
+        return (Gravity, _hashable(self._g))
+
+    @property
+    def _config(self) -> dict:
+        return dict(g=_serializable(self._g))
 
     @property
     def g(self) -> float:
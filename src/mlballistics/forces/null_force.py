@@ -4,9 +4,26 @@ from .base_force import Force
 
 
 class NullForce(Force):
+
+    is_constant = True
+
     def __init__(self) -> None:
         super().__init__()
         return
 
     def __call__(self, state=None, obj=None) -> torch.Tensor:
-        return torch.zeros(3, dtype=torch.float)
+        if state is None:
+            return torch.zeros(3)
+        return torch.zeros(
+            state.shape[:-1] + (3,), dtype=state.dtype, device=state.device
+        )
+
+    def _lower(self, state: torch.Tensor, obj) -> tuple:
+        return (
+            self(state, obj),
+            state.new_zeros(state.shape[:-1]),
+        )
+
+    @property
+    def _key(self) -> tuple:
+        return (NullForce,)
@@ -0,0 +1,91 @@
+import torch
+
+from .base_force import Force
+from ..utils import (
+    _column, _has_rows, _hashable, _select_rows, _serializable,
+)
+
+
+class Oscillation(Force):
+    r"""Harmonic oscillation around an altitude.
+
+    The force pulls the object back to a given altitude $z_0$, so that the
+    altitude oscillates with the angular frequency $\omega$, whatever the mass
+    of the object:
+    $$ F = - m \omega^2 (z - z_0) \hat{z} $$
+
+    Parameters
+    ----------
+    altitude
+        Altitude $z_0$ of the equilibrium, a float or a tensor of shape `(N,)`
+        for a batch of N objects.
+    frequency
+        Angular frequency $\omega$, a float or a tensor of shape `(N,)`.
+
+    """
+
+    def __init__(
+            self,
+            altitude: float = 0.0,
+            frequency: float = 1.0,
+            ) -> None:
+        super().__init__()
+        self._altitude = altitude
+        self._frequency = frequency
+
+    def __call__(self, state=None, obj=None) -> torch.Tensor:
+        m = _column(obj.mass, state)
+        z = state[..., 2:3]
+        altitude = _column(self._altitude, state)
+        frequency = _column(self._frequency, state)
+        fz = - m * frequency ** 2 * (z - altitude)
+        zeros = torch.zeros_like(fz)
+        return torch.cat([zeros, zeros, fz], dim=-1)
+
+    def parameters(self) -> list[torch.Tensor]:
+        return [
+            value for value in (self._altitude, self._frequency)
+            if isinstance(value, torch.Tensor)
+        ]
+
+    def _rows(self, index) -> "Oscillation":
+        altitude = _select_rows(self._altitude, index)
+        frequency = _select_rows(self._frequency, index)
+        if altitude is self._altitude and frequency is self._frequency:
+            return self
+        return Oscillation(altitude=altitude, frequency=frequency)
+
+    @property
+    def _per_object(self) -> bool:
+        return _has_rows(self._altitude) or _has_rows(self._frequency)
+
+    @property
+    def _key(self) -> tuple:
+        return (
+            Oscillation,
+            _hashable(self._altitude),
+            _hashable(self._frequency),
+        )
+
+    @property
+    def _config(self) -> dict:
+        return dict(
+            altitude=_serializable(self._altitude),
+            frequency=_serializable(self._frequency),
+        )
+
+    @property
+    def altitude(self) -> float:
+        return self._altitude
+
+    @altitude.setter
+    def altitude(self, value: float) -> None:
+        self._altitude = value
+
+    @property
+    def frequency(self) -> float:
+        return self._frequency
+
+    @frequency.setter
+    def frequency(self, value: float) -> None:
+        self._frequency = value
@@ -0,0 +1,73 @@
+import torch
+
+from .base_force import Force
+from ..utils import (
+    _column, _has_rows, _hashable, _select_rows, _serializable,
+)
+
+
+class Thrust(Force):
+    r"""Constant thrust.
+
+    The thrust gives a constant acceleration $a$ to the object, whatever its
+    mass:
+    $$ F = m a $$
+
+    Parameters
+    ----------
+    acceleration
+        Acceleration, of shape `(3,)`, or `(N, 3)` to give a different
+        acceleration to each object of a batch of N objects.
+
+    """
+
+    is_constant = True
+
+    def __init__(self, acceleration: torch.Tensor) -> None:
+        super().__init__()
+        self._acceleration = acceleration
+
+    def __call__(self, state=None, obj=None) -> torch.Tensor:
+        m = _column(obj.mass, state)
+        acceleration = torch.as_tensor(self._acceleration).to(m)
+        force = m * acceleration
+        if state is None:
+            return force
+        return force.expand(state.shape[:-1] + (3,))
+
+    def parameters(self) -> list[torch.Tensor]:
+        if isinstance(self._acceleration, torch.Tensor):
+            return [self._acceleration]
+        return []
+
+    def _lower(self, state: torch.Tensor, obj) -> tuple:
+        return (
+            self(state, obj),
+            state.new_zeros(state.shape[:-1]),
+        )
+
+    def _rows(self, index) -> "Thrust":
+        acceleration = _select_rows(self._acceleration, index, dim=2)
+        if acceleration is self._acceleration:
+            return self
+        return Thrust(acceleration=acceleration)
+
+    @property
+    def _per_object(self) -> bool:
+        return _has_rows(self._acceleration, dim=2)
+
+    @property
+    def _key(self) -> tuple:
+        return (Thrust, _hashable(self._acceleration))
+
+    @property
+    def _config(self) -> dict:
+        return dict(acceleration=_serializable(self._acceleration))
+
+    @property
+    def acceleration(self) -> torch.Tensor:
+        return self._acceleration
+
+    @acceleration.setter
+    def acceleration(self, value: torch.Tensor) -> None:
+        self._acceleration = value
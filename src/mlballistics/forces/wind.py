@@ -0,0 +1,107 @@
+import torch
+
+from .base_force import Force
+from .field import GridField
+from ..utils import _column, _hashable, _serializable
+
+
+def _field_or_tensor(value):
+    """Field, number, or other value converted to a tensor.
+
+    Sequences are converted so that the force can be hashed (see `_key`).
+    """
+    if isinstance(value, (GridField, float, int, torch.Tensor)):
+        return value
+    return torch.as_tensor(value)
+
+
+class Wind(Force):
+    r"""Drag force in moving air.
+
+    The drag opposes the velocity of the object relative to the air:
+    $$ F = - C ||v - w|| (v - w) $$
+    where $w$ is the wind velocity at the position of the object and
+    $$ C = \frac{\rho A c_d}{2} $$
+    with $\rho$ the air density at the position of the object (see `Drag`).
+
+    The wind and the density can be constant or given by fields sampled on
+    grids (`GridField`), that are interpolated at the positions of all the
+    objects with a single lookup. With a zero wind and a constant density,
+    the force is the same as `Drag`.
+
+    Parameters
+    ----------
+    wind
+        Wind velocity, a vector of shape `(3,)` (converted to a tensor) or a
+        vector field with 3 components.
+    density
+        Air density, a float, a tensor or a scalar field, for example
+        `exponential_atmosphere()`.
+
+    """
+
+    def __init__(
+            self,
+            wind,
+            density=1.0,
+            ) -> None:
+        super().__init__()
+        self.wind = wind
+        self.density = density
+
+    def __call__(self, state=None, obj=None) -> torch.Tensor:
+        x = state[..., :3]
+        if isinstance(self._wind, GridField):
+            wind = self._wind(x)
+        else:
+            wind = torch.as_tensor(self._wind).to(state)
+        if isinstance(self._density, GridField):
+            density = self._density(x).unsqueeze(-1)
+        else:
+            density = _column(self._density, state)
+
+        v = state[..., 3:6] - wind
+        v_norm = torch.norm(v, dim=-1, keepdim=True)
+        C = density * _column(
+            obj.drag_coefficient, state
+        ) * _column(obj.sectional_area, state) / 2
+        return - C * v_norm * v
+
+    def parameters(self) -> list[torch.Tensor]:
+        parameters = []
+        for value in (self._wind, self._density):
+            if isinstance(value, GridField):
+                parameters += value.parameters()
+            elif isinstance(value, torch.Tensor):
+                parameters.append(value)
+        return parameters
+
+    @property
+    def _key(self) -> tuple:
+        return (Wind,) + tuple(
+            value._key if isinstance(value, GridField) else _hashable(value)
+            for value in (self._wind, self._density)
+        )
+
+    @property
+    def _config(self) -> dict:
+        return dict(
+            wind=_serializable(self._wind),
+            density=_serializable(self._density),
+        )
+
+    @property
+    def wind(self):
+        return self._wind
+
+    @wind.setter
+    def wind(self, value) -> None:
+        self._wind = _field_or_tensor(value)
+
+    @property
+    def density(self):
+        return self._density
+
+    @density.setter
+    def density(self, value) -> None:
+        self._density = _field_or_tensor(value)
@@ -0,0 +1,5 @@
+# flake8: noqa
+"""Learning module: neural surrogates of the fire-control solver."""
+
+from .model import LaunchVelocityMLP
+from .trainer import SurrogateTrainer
@@ -0,0 +1,108 @@
+"""Neural network mapping a target to a launch velocity."""
+from typing import Optional
+
+import torch
+from torch import nn
+
+
+class LaunchVelocityMLP(nn.Module):
+    """Multilayer perceptron predicting the launch velocity of a missile.
+
+    The input is the initial state of the target (position and velocity),
+    normalized with statistics of the training data, and the output is the
+    launch velocity of the missile. If a maximum speed is given, the output
+    is projected on the ball of radius `max_speed`.
+
+    Parameters
+    ----------
+    hidden_sizes
+        Sizes of the hidden layers.
+    max_speed
+        Maximum speed of the missile.
+
+    """
+    def __init__(
+            self,
+            hidden_sizes: tuple[int, ...] = (64, 64),
+            max_speed: Optional[float] = None,
+            ) -> None:
+        super().__init__()
+        self.max_speed = max_speed
+        sizes = (6,) + tuple(hidden_sizes)
+        layers = []
+        for n_in, n_out in zip(sizes[:-1], sizes[1:]):
+            layers += [nn.Linear(n_in, n_out), nn.SiLU()]
+        layers.append(nn.Linear(sizes[-1], 3))
+        self.layers = nn.Sequential(*layers)
+
+        self.register_buffer("mean", torch.zeros(6))
+        self.register_buffer("std", torch.ones(6))
+        self.register_buffer("scale", torch.ones(()))
+
+    def fit_normalization(self, target_states: torch.Tensor) -> None:
+        """Set the normalization of the inputs and the scale of the outputs.
+
+        Parameters
+        ----------
+        target_states
+            Initial states of training targets, of shape `(N, 6)`.
+        """
+        target_states = target_states.detach().to(self.mean)
+        self.mean.copy_(target_states.mean(dim=0))
+        self.std.copy_(target_states.std(dim=0).clamp(min=1e-6))
+        if self.max_speed is not None:
+            self.scale.fill_(self.max_speed)
+        else:
+            distance = torch.linalg.vector_norm(target_states[:, :3], dim=1)
+            self.scale.copy_(distance.mean())
+
+    def forward(self, target_states: torch.Tensor) -> torch.Tensor:
+        """Launch velocities for targets.
+
+        Parameters
+        ----------
+        target_states
+            Initial states of the targets, of shape `(..., 6)`.
+
+        Returns
+        -------
+        torch.Tensor
+            Launch velocities, of shape `(..., 3)`.
+        """
+        x = (target_states - self.mean) / self.std
+        velocity = self.scale * self.layers(x)
+        if self.max_speed is not None:
+            speed = torch.linalg.vector_norm(velocity, dim=-1, keepdim=True)
+            velocity = velocity * (
+                self.max_speed / speed.clamp(min=1e-12)
+            ).clamp(max=1.0)
+        return velocity
+
+    @torch.inference_mode()
+    def predict(
+            self,
+            target_states: torch.Tensor,
+            batch_size: int = 65536,
+            ) -> torch.Tensor:
+        """Batched inference, without autograd.
+
+        Parameters
+        ----------
+        target_states
+            Initial states of the targets, of shape `(N, 6)`.
+        batch_size
+            Number of targets evaluated at once.
+
+        Returns
+        -------
+        torch.Tensor
+            Launch velocities, of shape `(N, 3)`.
+        """
+        training = self.training
+        self.eval()
+        target_states = torch.as_tensor(target_states).to(self.mean)
+        velocity = torch.cat([
+            self(chunk) for chunk in target_states.split(batch_size)
+        ])
+        self.train(training)
+        return velocity
@@ -0,0 +1,196 @@
+"""Training of launch-velocity surrogates through the simulator.
+
+No labels are needed: for a mini-batch of targets, the missiles launched with
+the predicted velocities and the targets are simulated together in a single
+batched system, and the loss is the distance between each missile and its
+target at their closest approach. The simulation and the closest approach are
+differentiable, so the gradient of the miss distance flows back to the
+weights of the model.
+"""
+import os
+from typing import Optional
+
+import torch
+
+from ..forces import Force
+from ..objects import Object, ObjectBatch
+from ..scene.batched import BatchedSystem
+from ..scene.collision import closest_approach
+from .model import LaunchVelocityMLP
+
+
+class SurrogateTrainer:
+    """Train a launch-velocity model on the miss distance.
+
+    Parameters
+    ----------
+    model
+        The model.
+    missile
+        The missile. Its initial position, parameters and force are shared
+        by all the shots, its initial velocity is ignored.
+    target_force
+        Force acting on the targets.
+    stop_time
+        Duration of the simulated engagements.
+    n_steps
+        Number of time steps of the simulations. The closest approach is
+        interpolated between the time steps, so few steps are needed.
+    batch_size
+        Number of targets per mini-batch.
+    lr
+        Learning rate of the Adam optimizer.
+    checkpoint
+        Path of the checkpoint file. If given, the model, the optimizer and
+        the history are saved after each epoch, and training resumes from the
+        checkpoint if it exists.
+
+    """
+    def __init__(
+            self,
+            model: LaunchVelocityMLP,
+            missile: Object,
+            target_force: Optional[Force] = None,
+            stop_time: float = 2.0,
+            n_steps: int = 20,
+            batch_size: int = 256,
+            lr: float = 1e-3,
+            checkpoint: Optional[str] = None,
+            ) -> None:
+        self.model = model
+        self.missile = missile
+        self.target_force = target_force
+        self.time = torch.linspace(0, stop_time, n_steps)
+        self.batch_size = batch_size
+        self.optimizer = torch.optim.Adam(model.parameters(), lr=lr)
+        self.checkpoint = checkpoint
+        self.epoch = 0
+        self.history = []
+
+        if checkpoint is not None and os.path.exists(checkpoint):
+            self.load_checkpoint(checkpoint)
+
+    def miss_distance(self, target_states: torch.Tensor) -> torch.Tensor:
+        """Miss distances of the model on targets.
+
+        Parameters
+        ----------
+        target_states
+            Initial states of the targets, of shape `(B, 6)`.
+
+        Returns
+        -------
+        torch.Tensor
+            Distances between the missiles and the targets at their closest
+            approach, of shape `(B,)`. Differentiable with respect to the
+            parameters of the model.
+        """
+        n = len(target_states)
+        missiles = ObjectBatch(
+            mass=self.missile.mass,
+            drag_coefficient=self.missile.drag_coefficient,
+            sectional_area=self.missile.sectional_area,
+            initial_position=self.missile.initial_position.expand(n, 3),
+            initial_velocity=self.model(target_states),
+            force=self.missile.force,
+        )
+        targets = ObjectBatch(
+            initial_position=target_states[:, :3],
+            initial_velocity=target_states[:, 3:6],
+            force=self.target_force,
+        )
+        states = BatchedSystem([missiles, targets]).simulate(self.time)
+        pairs = torch.stack([torch.arange(n), torch.arange(n, 2 * n)], dim=1)
+        return closest_approach(states, self.time, pairs=pairs).distance
+
+    def fit(
+            self,
+            target_states: torch.Tensor,
+            n_epochs: int = 10,
+            seed: int = 0,
+            ) -> list[float]:
+        """Train the model.
+
+        The normalization of the model is fitted on the targets if training
+        starts from scratch.
+
+        Parameters
+        ----------
+        target_states
+            Initial states of the training targets, of shape `(N, 6)`, for
+            example the `target_state` field of a generated dataset.
+        n_epochs
+            Total number of epochs (including the epochs of a resumed
+            checkpoint).
+        seed
+            Random seed of the shuffling of the mini-batches.
+
+        Returns
+        -------
+        list[float]
+            The mean miss distance of each epoch.
+        """
+        target_states = torch.as_tensor(target_states).to(self.model.mean)
+        if self.epoch == 0:
+            self.model.fit_normalization(target_states)
+
+        generator = torch.Generator().manual_seed(seed)
+        for _ in range(self.epoch):
+            torch.randperm(len(target_states), generator=generator)
+
+        self.model.train()
+        while self.epoch < n_epochs:
+            permutation = torch.randperm(
+                len(target_states), generator=generator
+            )
+            total = 0.0
+            for batch in permutation.split(self.batch_size):
+                loss = self.miss_distance(target_states[batch]).mean()
+                self.optimizer.zero_grad()
+                loss.backward()
+                self.optimizer.step()
+                total += loss.item() * len(batch)
+
+            self.history.append(total / len(target_states))
+            self.epoch += 1
+            if self.checkpoint is not None:
+                self.save_checkpoint(self.checkpoint)
+
+        return self.history
+
+    def save_checkpoint(self, path: str) -> None:
+        """Save the state of the training.
+
+        The file is written atomically, so that an interrupted training can
+        always be resumed.
+
+        Parameters
+        ----------
+        path
+            Path of the checkpoint.
+        """
+        temporary = path + ".tmp"
+        torch.save(
+            dict(
+                model=self.model.state_dict(),
+                optimizer=self.optimizer.state_dict(),
+                epoch=self.epoch,
+                history=self.history,
+            ),
+            temporary,
+        )
+        os.replace(temporary, path)
+
+    def load_checkpoint(self, path: str) -> None:
+        """Restore the state of the training.
+
+        Parameters
+        ----------
+        path
+            Path of the checkpoint.
+        """
+        checkpoint = torch.load(path)
+        self.model.load_state_dict(checkpoint["model"])
+        self.optimizer.load_state_dict(checkpoint["optimizer"])
+        self.epoch = checkpoint["epoch"]
+        self.history = checkpoint["history"]
@@ -2,3 +2,4 @@
 
 from .base_object import Object
 from .sphere import Sphere
+from .batch import ObjectBatch, SphereBatch
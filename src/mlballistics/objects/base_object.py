@@ -1,10 +1,15 @@
 import torch
-from torchdiffeq import odeint
-import pyvista as pv
-from typing import Optional
+from typing import TYPE_CHECKING, Optional
 
 
 from ..forces import NullForce, Force
+from ..forces.fused import Backend, FusedODE
+from ..integrators import solve
+from ..profiling import Profiler, SimulationReport, _call_force, _rhs
+from ..utils import _constant_acceleration_states
+
+if TYPE_CHECKING:
+    import pyvista as pv
 
 
 class Object:
@@ -34,16 +39,18 @@ class Object:
             self._force = force
 
         if initial_position is None:
-            self._initial_position = torch.zeros(3, dtype=torch.float)
+            self._initial_position = torch.zeros(3)
         else:
             self._initial_position = initial_position
 
         if initial_velocity is None:
-            self._initial_velocity = torch.zeros(3, dtype=torch.float)
+            self._initial_velocity = torch.zeros(3)
         else:
             self._initial_velocity = initial_velocity
 
+        self._states = None
         self._trajectory = None
+        self._constant_forces = {}
 
     def ode_func(self, t, y):
         """ODE function for the object.
@@ -66,22 +73,104 @@ class Object:
             ]
         )
 
-    def simulate(self, time: torch.Tensor):
+    def simulate(
+            self,
+            time: torch.Tensor,
+            compiled: Optional[Backend] = None,
+            adjoint: bool = False,
+            profile: bool = False,
+            method: str = "rk4",
+            ) -> Optional[SimulationReport]:
         """Simulate the object.
 
+        If the force acting on the object is constant, the trajectory is
+        computed in closed form instead of being integrated.
+
         Parameters
         ----------
         time
             Time of the simulation.
+        compiled
+            If "script" or "compile", the force tree and the parameters of the
+            object are lowered into a fused right-hand side compiled with
+            TorchScript or `torch.compile`. If None, the forces are evaluated
+            in Python.
+        adjoint
+            If True, gradients are computed with the adjoint method: the
+            memory used for backpropagation does not grow with the number of
+            steps. The parameters of the object and the tensor parameters of
+            the force receive gradients.
+        profile
+            If True, the simulation is instrumented, see `profiling`.
+        method
+            Integrator, see `integrators`: "verlet", "symplectic_euler" or a
+            fixed step solver of torchdiffeq such as "rk4".
+
+        Returns
+        -------
+        SimulationReport
+            The report of the instrumentation, if `profile` is True.
         """
-        self._states = odeint(
-            self.ode_func,
-            self.initial_state,
-            t=time,
-            method="rk4",
+        if profile:
+            with Profiler() as profiler:
+                self.simulate(
+                    time, compiled=compiled, adjoint=adjoint, method=method
+                )
+            return profiler.report()
+
+        if self._force.is_constant:
+            initial_state = self.initial_state
+            acceleration = self.forces_vector(initial_state) / self.mass
+            self._set_states(_constant_acceleration_states(
+                time, initial_state, acceleration
+            ))
+            return
+
+        initial_state = self.initial_state
+        if compiled is None:
+            ode_func = self.ode_func
+        else:
+            ode_func = FusedODE(
+                [(self._force, self)], [initial_state], backend=compiled
+            )
+
+        states = solve(
+            _rhs(ode_func),
+            initial_state,
+            time,
+            method=method,
+            adjoint=adjoint,
+            adjoint_params=self.parameters() if adjoint else None,
         )
+        self._set_states(states)
+
+    def _set_states(self, states: torch.Tensor) -> None:
+        """Store the simulated states of the object.
+
+        Parameters
+        ----------
+        states
+            States of the object, of shape `(n_steps, 6)`.
+        """
+        self._states = states
+        self._trajectory = states[:, :3]
+
+    def parameters(self) -> tuple[torch.Tensor, ...]:
+        """Parameters of the object and of its force that are tensors.
 
-        self._trajectory = self._states[:, :3]
+        They are registered as parameters of the ODE when simulating with the
+        adjoint method, so that they receive gradients.
+
+        Returns
+        -------
+        tuple[torch.Tensor, ...]
+            The tensor parameters.
+        """
+        values = (self.mass, self.drag_coefficient, self.sectional_area)
+        parameters = [
+            value for value in values if isinstance(value, torch.Tensor)
+        ]
+        return tuple(parameters + self._force.parameters())
 
     def forces_vector(self, state=None) -> torch.Tensor:
         """Vector of forces for the object.
@@ -97,13 +186,44 @@ class Object:
             Force acting on the object.
         """
         state = self.initial_state if state is None else state
-        return self._force(state, self)
+        if self._force.is_constant:
+            return self._constant_force(state)
+        return _call_force(self._force, state, self)
+
+    def _constant_force(self, state: torch.Tensor) -> torch.Tensor:
+        """Force vector of a constant force, cached per dtype and device.
+
+        The cache entry is reused as long as the force tree has the same key
+        and is cleared when the force or a parameter of the object changes.
+        Forces that require gradients are not cached, so that each
+        simulation builds its own autograd graph.
+
+        Parameters
+        ----------
+        state
+            State vector of the object.
+
+        Returns
+        -------
+        torch.Tensor
+            Force acting on the object.
+        """
+        cache_key = (state.dtype, state.device, state.shape[:-1])
+        force_key = self._force._key
+        cached = self._constant_forces.get(cache_key)
+        if cached is not None and cached[0] == force_key:
+            return cached[1]
+
+        force = _call_force(self._force, state, self)
+        if not force.requires_grad:
+            self._constant_forces[cache_key] = (force_key, force)
+        return force
 
     def _actor_from_mesh(
             self,
-            mesh: pv.PolyData,
-            prop: pv.Property = None,
-            ) -> pv.Actor:
+            mesh: "pv.PolyData",
+            prop: "pv.Property" = None,
+            ) -> "pv.Actor":
         """Actor of the object.
 
         Parameters
@@ -116,10 +236,9 @@ class Object:
         pv.PolyData
             Actor of the object.
         """
-        mapper = pv.DataSetMapper(dataset=mesh)
-        actor = pv.Actor(mapper=mapper)
-        actor.prop = prop
-        return actor
+        from ..rendering import _actor_from_mesh
+
+        return _actor_from_mesh(mesh, prop)
 
     @property
     def initial_state(self) -> torch.Tensor:
@@ -163,6 +282,7 @@ class Object:
             Mass of the object.
         """
         self._mass = value
+        self._constant_forces.clear()
 
     @property
     def drag_coefficient(self) -> float:
@@ -185,6 +305,7 @@ class Object:
             Drag coefficient of the object.
         """
         self._drag_coefficient = value
+        self._constant_forces.clear()
 
     @property
     def sectional_area(self) -> float:
@@ -207,6 +328,7 @@ class Object:
             Sectional area of the object.
         """
         self._sectional_area = value
+        self._constant_forces.clear()
 
     @property
     def force(self) -> Force:
@@ -232,6 +354,7 @@ class Object:
             self._force = NullForce()
         else:
             self._force = value
+        self._constant_forces.clear()
 
     @property
     def initial_position(self) -> torch.Tensor:
@@ -277,6 +400,17 @@ class Object:
         """
         self._initial_velocity = value
 
+    @property
+    def states(self) -> Optional[torch.Tensor]:
+        """Get the simulated states (positions and velocities) of the object.
+
+        Returns
+        -------
+        torch.Tensor
+            States of the object, of shape `(n_steps, 6)`.
+        """
+        return self._states
+
     @property
     def trajectory(self) -> Optional[torch.Tensor]:
         """Get the trajectory of the object.
@@ -0,0 +1,359 @@
+"""Batches of objects stored as column tensors."""
+from typing import Optional, Union
+
+import torch
+
+from .base_object import Object
+from .sphere import Sphere
+from ..constants import SPHERE_DRAG_COEFFICIENT
+from ..forces import Force, NullForce
+
+
+class ObjectBatch:
+    """Batch of objects sharing the same force.
+
+    Instead of one Python object per simulated object, the parameters and the
+    initial states of the N objects are stored as contiguous tensors: `(N,)`
+    for the scalar parameters and `(N, 3)` for the initial positions and
+    velocities. Scalar parameters are broadcast to all the objects.
+
+    A batch can be added to a `Scene` like an object. After the simulation,
+    its states and trajectories have shapes `(n_steps, N, 6)` and
+    `(n_steps, N, 3)`.
+
+    Parameters
+    ----------
+    mass
+        Masses of the objects.
+    drag_coefficient
+        Drag coefficients of the objects.
+    sectional_area
+        Sectional areas of the objects.
+    initial_position
+        Initial positions of the objects, of shape `(N, 3)`.
+    initial_velocity
+        Initial velocities of the objects, of shape `(N, 3)`.
+    force
+        Force acting on all the objects.
+
+    Raises
+    ------
+    ValueError
+        If the number of objects cannot be inferred from the parameters.
+
+    """
+    # Attributes holding one row per object
+    _column_names = (
+        "_mass",
+        "_drag_coefficient",
+        "_sectional_area",
+        "_initial_position",
+        "_initial_velocity",
+    )
+
+    def __init__(
+            self,
+            mass: Union[float, torch.Tensor] = 1.0,
+            drag_coefficient: Union[float, torch.Tensor] = 0.0,
+            sectional_area: Union[float, torch.Tensor] = 1.0,
+            initial_position: Optional[torch.Tensor] = None,
+            initial_velocity: Optional[torch.Tensor] = None,
+            force: Optional[Force] = None,
+            ) -> None:
+        columns = [mass, drag_coefficient, sectional_area]
+        vectors = [initial_position, initial_velocity]
+        sizes = [
+            value.shape[0] for value in columns
+            if isinstance(value, torch.Tensor) and value.dim() > 0
+        ] + [value.shape[0] for value in vectors if value is not None]
+        if len(sizes) == 0:
+            raise ValueError(
+                "Cannot infer the number of objects of the batch, please"
+                " provide the initial positions or a tensor of parameters."
+            )
+        self._n = sizes[0]
+
+        reference = next(
+            (v for v in vectors if v is not None),
+            torch.zeros(self._n, 3),
+        )
+        self._initial_position = self._vector(initial_position, reference)
+        self._initial_velocity = self._vector(initial_velocity, reference)
+        self._mass = self._column(mass)
+        self._drag_coefficient = self._column(drag_coefficient)
+        self._sectional_area = self._column(sectional_area)
+        self._force = NullForce() if force is None else force
+
+        self._states = None
+        self._trajectory = None
+
+    def _vector(self, value, reference: torch.Tensor) -> torch.Tensor:
+        """Initial vectors as a `(N, 3)` tensor."""
+        if value is None:
+            return torch.zeros(
+                self._n, 3, dtype=reference.dtype, device=reference.device
+            )
+        return value.expand(self._n, 3)
+
+    def _column(self, value) -> torch.Tensor:
+        """Scalar parameter as a `(N,)` tensor."""
+        value = torch.as_tensor(
+            value,
+            dtype=self._initial_position.dtype,
+            device=self._initial_position.device,
+        )
+        return value.expand(self._n)
+
+    @classmethod
+    def from_objects(cls, objects: list[Object]) -> "ObjectBatch":
+        """Build a batch from objects sharing the same force tree.
+
+        Parameters
+        ----------
+        objects
+            The objects.
+
+        Returns
+        -------
+        ObjectBatch
+            The batch.
+
+        Raises
+        ------
+        ValueError
+            If the forces of the objects are not identical.
+        """
+        return cls(**cls._objects_columns(objects))
+
+    @classmethod
+    def _objects_columns(cls, objects: list[Object]) -> dict:
+        """Arguments of the constructor stacked from objects."""
+        force = objects[0].force
+        if any(obj.force._key != force._key for obj in objects):
+            raise ValueError(
+                "All the objects of a batch must have the same force."
+            )
+
+        initial_position = torch.stack(
+            [obj.initial_position for obj in objects]
+        )
+
+        def stack(name):
+            return torch.stack([
+                torch.as_tensor(
+                    getattr(obj, name), dtype=initial_position.dtype
+                )
+                for obj in objects
+            ])
+
+        return dict(
+            mass=stack("mass"),
+            drag_coefficient=stack("drag_coefficient"),
+            sectional_area=stack("sectional_area"),
+            initial_position=initial_position,
+            initial_velocity=torch.stack(
+                [obj.initial_velocity for obj in objects]
+            ),
+            force=force,
+        )
+
+    def _columns(self, index) -> dict:
+        """Parameters and initial states of a subset of the batch."""
+        return dict(
+            mass=self._mass[index],
+            drag_coefficient=self._drag_coefficient[index],
+            sectional_area=self._sectional_area[index],
+            initial_position=self._initial_position[index],
+            initial_velocity=self._initial_velocity[index],
+            force=self._force._rows(index),
+        )
+
+    def _object(self, i: int) -> Object:
+        """The i-th object of the batch, as an Object."""
+        return Object(**self._columns(i))
+
+    def __len__(self) -> int:
+        return self._n
+
+    def __getitem__(self, index) -> Union[Object, "ObjectBatch"]:
+        """Index or slice the batch.
+
+        Parameters
+        ----------
+        index
+            An integer, a slice, or a tensor of indices or a boolean mask.
+
+        Returns
+        -------
+        Object or ObjectBatch
+            An object if `index` is an integer, a batch otherwise. The
+            simulated states and the per-object parameters of the force (for
+            example the accelerations of a `Thrust`) are indexed as well.
+        """
+        if isinstance(index, int):
+            if not -self._n <= index < self._n:
+                raise IndexError(
+                    f"Index {index} out of range for a batch of {self._n}"
+                    " objects."
+                )
+            obj = self._object(index)
+            if self._states is not None:
+                obj._set_states(self._states[:, index])
+            return obj
+
+        if isinstance(index, slice):
+            index = torch.arange(self._n)[index]
+        else:
+            index = torch.as_tensor(index)
+            if index.dtype == torch.bool:
+                index = torch.nonzero(index)[:, 0]
+
+        batch = type(self).__new__(type(self))
+        batch.__dict__.update(self.__dict__)
+        batch._n = len(index)
+        for name in self._column_names:
+            setattr(batch, name, getattr(self, name)[index])
+        batch._force = self._force._rows(index)
+        if self._states is not None:
+            batch._set_states(self._states[:, index])
+        return batch
+
+    def _set_states(self, states: torch.Tensor) -> None:
+        """Store the simulated states of the batch.
+
+        Parameters
+        ----------
+        states
+            States of the objects, of shape `(n_steps, N, 6)`.
+        """
+        self._states = states
+        self._trajectory = states[..., :3]
+
+    @property
+    def initial_state(self) -> torch.Tensor:
+        """Initial states of the objects, of shape `(N, 6)`."""
+        return torch.cat([self._initial_position, self._initial_velocity], 1)
+
+    @property
+    def mass(self) -> torch.Tensor:
+        """Masses of the objects, of shape `(N,)`."""
+        return self._mass
+
+    @mass.setter
+    def mass(self, value) -> None:
+        self._mass = self._column(value)
+
+    @property
+    def drag_coefficient(self) -> torch.Tensor:
+        """Drag coefficients of the objects, of shape `(N,)`."""
+        return self._drag_coefficient
+
+    @drag_coefficient.setter
+    def drag_coefficient(self, value) -> None:
+        self._drag_coefficient = self._column(value)
+
+    @property
+    def sectional_area(self) -> torch.Tensor:
+        """Sectional areas of the objects, of shape `(N,)`."""
+        return self._sectional_area
+
+    @sectional_area.setter
+    def sectional_area(self, value) -> None:
+        self._sectional_area = self._column(value)
+
+    @property
+    def force(self) -> Force:
+        """Force acting on all the objects."""
+        return self._force
+
+    @force.setter
+    def force(self, value: Optional[Force]) -> None:
+        self._force = NullForce() if value is None else value
+
+    @property
+    def initial_position(self) -> torch.Tensor:
+        """Initial positions of the objects, of shape `(N, 3)`."""
+        return self._initial_position
+
+    @initial_position.setter
+    def initial_position(self, value: torch.Tensor) -> None:
+        self._initial_position = value.expand(self._n, 3)
+
+    @property
+    def initial_velocity(self) -> torch.Tensor:
+        """Initial velocities of the objects, of shape `(N, 3)`."""
+        return self._initial_velocity
+
+    @initial_velocity.setter
+    def initial_velocity(self, value: torch.Tensor) -> None:
+        self._initial_velocity = value.expand(self._n, 3)
+
+    @property
+    def states(self) -> Optional[torch.Tensor]:
+        """Simulated states of the objects, of shape `(n_steps, N, 6)`."""
+        return self._states
+
+    @property
+    def trajectory(self) -> Optional[torch.Tensor]:
+        """Trajectories of the objects, of shape `(n_steps, N, 3)`."""
+        return self._trajectory
+
+
+class SphereBatch(ObjectBatch):
+    """Batch of spheres sharing the same force.
+
+    Parameters
+    ----------
+    radius
+        Radii of the spheres.
+    mass
+        Masses of the spheres.
+    **kwargs
+        Other arguments of `ObjectBatch` (initial positions and velocities,
+        force).
+
+    """
+    _column_names = ObjectBatch._column_names + ("_radius",)
+
+    def __init__(
+            self,
+            radius: Union[float, torch.Tensor] = 1.0,
+            mass: Union[float, torch.Tensor] = 1.0,
+            **kwargs,
+            ) -> None:
+        super().__init__(
+            mass=mass,
+            drag_coefficient=SPHERE_DRAG_COEFFICIENT,
+            sectional_area=4 * torch.pi * torch.as_tensor(radius) ** 2,
+            **kwargs,
+        )
+        self._radius = self._column(radius)
+
+    @classmethod
+    def _objects_columns(cls, objects: list[Sphere]) -> dict:
+        columns = super()._objects_columns(objects)
+        del columns["drag_coefficient"], columns["sectional_area"]
+        columns["radius"] = torch.stack([
+            torch.as_tensor(obj.radius, dtype=columns["mass"].dtype)
+            for obj in objects
+        ])
+        return columns
+
+    def _columns(self, index) -> dict:
+        columns = super()._columns(index)
+        del columns["drag_coefficient"], columns["sectional_area"]
+        columns["radius"] = self._radius[index]
+        return columns
+
+    def _object(self, i: int) -> Sphere:
+        return Sphere(**self._columns(i))
+
+    @property
+    def radius(self) -> torch.Tensor:
+        """Radii of the spheres, of shape `(N,)`."""
+        return self._radius
+
+    @radius.setter
+    def radius(self, value) -> None:
+        self._radius = self._column(value)
+        self.sectional_area = 4 * torch.pi * self._radius ** 2
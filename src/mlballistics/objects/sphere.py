@@ -1,5 +1,4 @@
 import torch
-import pyvista as pv
 
 from .base_object import Object
 from ..constants import SPHERE_DRAG_COEFFICIENT
@@ -24,6 +23,7 @@ class Sphere(Object):
         self._radius = radius
 
     def actor(self, time: int, **kwargs):
+        import pyvista as pv
 
         if time == 0:
             position_np = self.initial_position.detach().cpu().numpy()
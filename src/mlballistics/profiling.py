@@ -0,0 +1,223 @@
+"""Opt-in instrumentation of the simulations.
+
+When a simulation runs with `profile=True` (`Scene.simulate`,
+`Object.simulate`), a `Profiler` is active: the evaluations of the right-hand
+side of the ODE and of the forces are counted and timed, the sizes of the
+tensors they return are recorded, and they are wrapped in
+`torch.profiler.record_function` ranges (`mlballistics::simulate`,
+`mlballistics::rhs`, `mlballistics::force::<name>`), so that they show up in
+the traces of `torch.profiler`, including the backward pass.
+
+The leaf forces are named by their position in their force tree: the path of
+`SumForce` operands (`f1` or `f2`) from the root, followed by the type of the
+force, for example `SumForce.f2.Drag` for the drag of `Gravity() + Drag()`,
+or `Drag` for a force that is not a sum.
+
+When no profiler is active, the hooks only cost a global lookup.
+"""
+import time
+from typing import Callable, NamedTuple, Optional
+
+import torch
+from torch.profiler import record_function
+
+
+# Profiler of the running simulation, if any
+_ACTIVE: Optional["Profiler"] = None
+
+
+class ForceStats(NamedTuple):
+    """Statistics of the evaluations of a leaf force.
+
+    Attributes
+    ----------
+    calls
+        Number of evaluations.
+    time
+        Total time of the evaluations, in seconds.
+    bytes
+        Total size of the returned tensors, in bytes.
+    shapes
+        Shapes of the returned tensors.
+    """
+    calls: int
+    time: float
+    bytes: int
+    shapes: frozenset
+
+
+class SimulationReport(NamedTuple):
+    """Report of a profiled simulation.
+
+    Attributes
+    ----------
+    total_time
+        Wall time of the simulation, in seconds.
+    rhs_evaluations
+        Number of evaluations of the right-hand side of the ODE.
+    rhs_time
+        Time spent in the right-hand side (forces included), in seconds.
+    forces
+        Statistics of the leaf forces, by position in their force tree (for
+        example `SumForce.f2.Drag`), so that the forces of a tree are listed
+        separately. The forces at the same position in the trees of
+        different groups of objects (objects with different forces) are
+        merged. Forces evaluated in a fused kernel (`compiled`) are not
+        listed.
+    output_bytes
+        Total size of the tensors returned by the right-hand side and the
+        forces, in bytes. This is the size of their outputs, not the memory
+        allocated by the simulation (intermediate tensors and the states
+        of the solver are not counted).
+    state_shapes
+        Shapes of the states given to the right-hand side.
+    """
+    total_time: float
+    rhs_evaluations: int
+    rhs_time: float
+    forces: dict[str, ForceStats]
+    output_bytes: int
+    state_shapes: frozenset
+
+    @property
+    def force_time(self) -> float:
+        """Time spent in the forces, in seconds."""
+        return sum(stats.time for stats in self.forces.values())
+
+    @property
+    def overhead_time(self) -> float:
+        """Time of the right-hand side outside the forces (concatenations,
+        divisions by the masses), in seconds."""
+        return self.rhs_time - self.force_time
+
+    @property
+    def solver_time(self) -> float:
+        """Time outside the right-hand side (solver, closed forms), in
+        seconds."""
+        return self.total_time - self.rhs_time
+
+    def __str__(self) -> str:
+        lines = [
+            f"total      {self.total_time * 1e3:10.3f} ms",
+            f"solver     {self.solver_time * 1e3:10.3f} ms",
+            f"rhs        {self.rhs_time * 1e3:10.3f} ms"
+            f" ({self.rhs_evaluations} evaluations)",
+            f"  overhead {self.overhead_time * 1e3:10.3f} ms",
+        ]
+        for name, stats in self.forces.items():
+            lines.append(
+                f"  {name:8s} {stats.time * 1e3:10.3f} ms"
+                f" ({stats.calls} calls, {stats.bytes / 2 ** 20:.2f} MB)"
+            )
+        return "\n".join(lines)
+
+
+def _nbytes(tensor: torch.Tensor) -> int:
+    return tensor.element_size() * tensor.nelement()
+
+
+class Profiler:
+    """Instrumentation of a simulation, used as a context manager.
+
+    Examples
+    --------
+    >>> with Profiler() as profiler:
+    ...     scene.simulate()
+    >>> print(profiler.report())
+    """
+    def __init__(self) -> None:
+        self._rhs_evaluations = 0
+        self._rhs_time = 0.0
+        self._forces = {}
+        self._output_bytes = 0
+        self._state_shapes = set()
+        # Position of the force being evaluated in its force tree
+        self._path = []
+        self._total_time = 0.0
+        self._previous = None
+        self._range = None
+
+    def __enter__(self) -> "Profiler":
+        global _ACTIVE
+        self._previous, _ACTIVE = _ACTIVE, self
+        self._range = record_function("mlballistics::simulate")
+        self._range.__enter__()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        global _ACTIVE
+        self._total_time += time.perf_counter() - self._start
+        self._range.__exit__(*exc)
+        _ACTIVE = self._previous
+
+    def rhs(self, func: Callable) -> Callable:
+        """Instrumented version of a right-hand side `func(t, y)`."""
+        def instrumented(t, y):
+            start = time.perf_counter()
+            with record_function("mlballistics::rhs"):
+                dy = func(t, y)
+            self._rhs_time += time.perf_counter() - start
+            self._rhs_evaluations += 1
+            self._output_bytes += _nbytes(dy)
+            self._state_shapes.add(tuple(y.shape))
+            return dy
+        return instrumented
+
+    def call_force(self, force, state, obj) -> torch.Tensor:
+        """Evaluate a force and record its statistics."""
+        from .forces.base_force import SumForce
+
+        if isinstance(force, SumForce):
+            # The operands are evaluated here to record their position
+            self._path.append("SumForce")
+            try:
+                self._path.append("f1")
+                value = self.call_force(force._f1, state, obj)
+                self._path[-1] = "f2"
+                return value + self.call_force(force._f2, state, obj)
+            finally:
+                del self._path[-2:]
+
+        name = ".".join(self._path + [type(force).__name__])
+        start = time.perf_counter()
+        with record_function(f"mlballistics::force::{name}"):
+            value = force(state, obj)
+        elapsed = time.perf_counter() - start
+
+        calls, total, nbytes, shapes = self._forces.get(
+            name, (0, 0.0, 0, frozenset())
+        )
+        self._forces[name] = ForceStats(
+            calls=calls + 1,
+            time=total + elapsed,
+            bytes=nbytes + _nbytes(value),
+            shapes=shapes | {tuple(value.shape)},
+        )
+        self._output_bytes += _nbytes(value)
+        return value
+
+    def report(self) -> SimulationReport:
+        """Report of the instrumented simulation."""
+        return SimulationReport(
+            total_time=self._total_time,
+            rhs_evaluations=self._rhs_evaluations,
+            rhs_time=self._rhs_time,
+            forces=dict(self._forces),
+            output_bytes=self._output_bytes,
+            state_shapes=frozenset(self._state_shapes),
+        )
+
+
+def _rhs(func: Callable) -> Callable:
+    """Right-hand side given to the solvers, instrumented if profiling."""
+    if _ACTIVE is None:
+        return func
+    return _ACTIVE.rhs(func)
+
+
+def _call_force(force, state, obj) -> torch.Tensor:
+    """Evaluate a force, instrumented if profiling."""
+    if _ACTIVE is None:
+        return force(state, obj)
+    return _ACTIVE.call_force(force, state, obj)
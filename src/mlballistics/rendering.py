@@ -0,0 +1,313 @@
+"""Off-screen rendering of simulated scenes to GIF or MP4.
+
+The meshes of the objects are built once: the spheres of the objects that
+share a color are merged into a single mesh, drawn by a single actor. For each
+frame, the vertices of each sphere are translated to the position of its
+object with one vectorized update, instead of rebuilding a mesh and an actor
+per object (`Sphere.actor`). With one actor per color instead of one per
+object, the cost of a frame stays low for thousands of objects.
+
+Frames can be rendered in parallel: the frames are split into chunks, each
+chunk is rendered by a worker process with its own off-screen plotter, and
+the chunks are then stitched into the output file. The positions are shared
+with the workers through a memory-mapped file, and the workers write their
+frames to memory-mapped files, so that no large array is pickled.
+
+Writing files requires `imageio` (and `imageio-ffmpeg` for MP4).
+"""
+import multiprocessing
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Sequence, Union
+
+import numpy as np
+import pyvista as pv
+import torch
+
+from .objects import Object, ObjectBatch
+
+
+# Default colors of the objects
+COLORS = ("red", "blue", "green", "orange", "purple", "brown", "pink", "gray")
+
+
+def _scene_arrays(
+        objects: list[Union[Object, ObjectBatch]],
+        ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Positions, radii and item of each row of the objects.
+
+    Returns
+    -------
+    tuple
+        The positions of the objects, of shape `(n_steps, N, 3)`, their radii
+        `(N,)` (1 for objects without radius) and the index in `objects` of
+        each row `(N,)`.
+    """
+    positions, radii, items = [], [], []
+    for i, obj in enumerate(objects):
+        if obj.trajectory is None:
+            raise ValueError(
+                "No trajectory found. Please simulate a scene with the"
+                " objects before rendering them."
+            )
+        trajectory = obj.trajectory.detach().cpu()
+        trajectory = trajectory.reshape(trajectory.shape[0], -1, 3)
+        n = trajectory.shape[1]
+        positions.append(trajectory.numpy().astype(np.float32))
+        radius = torch.as_tensor(getattr(obj, "radius", 1.0)).detach()
+        radii.append(radius.cpu().reshape(-1).expand(n).numpy())
+        items.append(np.full(n, i))
+    return (
+        np.concatenate(positions, axis=1),
+        np.concatenate(radii).astype(np.float32),
+        np.concatenate(items),
+    )
+
+
+def _merged_spheres(
+        unit: pv.PolyData,
+        radii: np.ndarray,
+        ) -> pv.PolyData:
+    """Single mesh made of copies of a unit sphere scaled by radii.
+
+    The copies are centered at the origin: translating the vertices of the
+    i-th copy moves the i-th sphere.
+    """
+    n, k = len(radii), unit.n_points
+    triangles = unit.faces.reshape(-1, 4)[:, 1:]
+    ids = triangles[None] + (k * np.arange(n))[:, None, None]
+    faces = np.concatenate(
+        [np.full(ids.shape[:2] + (1,), 3), ids], axis=2
+    )
+    points = unit.points[None] * radii[:, None, None]
+    return pv.PolyData(
+        points.reshape(-1, 3).astype(np.float32), faces.ravel()
+    )
+
+
+def _actor_from_mesh(
+        mesh: pv.PolyData,
+        prop: Optional[pv.Property] = None,
+        ) -> pv.Actor:
+    """Actor of a mesh, with its own mapper."""
+    mapper = pv.DataSetMapper(dataset=mesh)
+    actor = pv.Actor(mapper=mapper)
+    actor.prop = prop
+    return actor
+
+
+class _FrameRenderer:
+    """Off-screen plotter with persistent meshes.
+
+    The spheres of the objects sharing a color are merged into one mesh, so
+    that a frame only translates vertices and draws one actor per color.
+    """
+
+    def __init__(
+            self,
+            radii: np.ndarray,
+            colors: list,
+            opacity: float,
+            bounds: Sequence[float],
+            camera_position,
+            window_size: Sequence[int],
+            show_axes: bool,
+            resolution: int,
+            ) -> None:
+        self.plotter = pv.Plotter(off_screen=True, window_size=window_size)
+        unit = pv.Sphere(
+            radius=1.0,
+            theta_resolution=resolution,
+            phi_resolution=resolution,
+        )
+        self._n_points = unit.n_points
+
+        rows = {}
+        for i, color in enumerate(colors):
+            rows.setdefault(str(color), (color, []))[1].append(i)
+        self._groups = []
+        for color, indices in rows.values():
+            mesh = _merged_spheres(unit, radii[indices])
+            self.plotter.add_mesh(
+                mesh, color=color, opacity=opacity, reset_camera=False
+            )
+            self._groups.append((np.array(indices), mesh, mesh.points.copy()))
+
+        # The camera is fixed, so that all the frames (and the chunks of
+        # frames rendered by different processes) share the same view
+        self.plotter.view_isometric()
+        self.plotter.reset_camera(bounds=bounds)
+        if camera_position is not None:
+            self.plotter.camera_position = camera_position
+        self.plotter.camera_set = True
+        if show_axes:
+            self.plotter.show_axes()
+
+    def render(self, positions: np.ndarray) -> np.ndarray:
+        """Image of a frame, from the positions `(N, 3)` of the objects."""
+        for indices, mesh, points in self._groups:
+            mesh.points[:] = points + np.repeat(
+                positions[indices], self._n_points, axis=0
+            )
+            mesh.Modified()
+        self.plotter.render()
+        return self.plotter.screenshot(return_img=True)
+
+    def close(self) -> None:
+        self.plotter.close()
+
+
+def _render_chunk(
+        positions_path: str,
+        frames_path: str,
+        start: int,
+        stop: int,
+        options: dict,
+        ) -> None:
+    """Render frames `start:stop` to a memory-mapped file."""
+    positions = np.load(positions_path, mmap_mode="r")
+    renderer = _FrameRenderer(**options)
+    frames = None
+    for i in range(start, stop):
+        image = renderer.render(positions[i])
+        if frames is None:
+            frames = np.lib.format.open_memmap(
+                frames_path,
+                mode="w+",
+                dtype=image.dtype,
+                shape=(stop - start,) + image.shape,
+            )
+        frames[i - start] = image
+    frames.flush()
+    renderer.close()
+
+
+def render(
+        objects: list[Union[Object, ObjectBatch]],
+        path: str,
+        fps: int = 30,
+        frames: Optional[Sequence[int]] = None,
+        colors: Optional[list] = None,
+        opacity: float = 1.0,
+        camera_position=None,
+        window_size: Sequence[int] = (1024, 768),
+        show_axes: bool = True,
+        resolution: int = 12,
+        n_workers: Optional[int] = None,
+        chunk_size: Optional[int] = None,
+        ) -> str:
+    """Render the trajectories of simulated objects to a GIF or MP4 file.
+
+    Parameters
+    ----------
+    objects
+        Simulated objects or batches of objects, for example `scene.objects`.
+    path
+        Output file, the format is given by the extension (".gif" or ".mp4").
+    fps
+        Frames per second.
+    frames
+        Time steps to render. Default to all the time steps.
+    colors
+        Color of each object (shared by the objects of a batch). Default to
+        `COLORS`.
+    opacity
+        Opacity of the objects.
+    camera_position
+        Camera position of pyvista. Default to a view of the bounding box of
+        all the trajectories.
+    window_size
+        Size of the frames, in pixels.
+    show_axes
+        Whether to show the axes widget.
+    resolution
+        Number of subdivisions of the spheres, in both directions.
+    n_workers
+        Number of processes. Default to the number of CPUs. If 0 or 1, the
+        frames are rendered in the current process.
+    chunk_size
+        Number of frames per chunk. Default to splitting the frames evenly
+        among the workers.
+
+    Returns
+    -------
+    str
+        The path of the output file.
+    """
+    import imageio
+
+    positions, radii, items = _scene_arrays(objects)
+    if frames is None:
+        frames = range(positions.shape[0])
+    positions = positions[list(frames)]
+    if colors is None:
+        colors = [COLORS[i % len(COLORS)] for i in range(len(objects))]
+
+    margin = radii.max()
+    low = positions.min(axis=(0, 1)) - margin
+    high = positions.max(axis=(0, 1)) + margin
+    options = dict(
+        radii=radii,
+        colors=[colors[i] for i in items],
+        opacity=opacity,
+        bounds=[float(v) for pair in zip(low, high) for v in pair],
+        camera_position=camera_position,
+        window_size=tuple(window_size),
+        show_axes=show_axes,
+        resolution=resolution,
+    )
+
+    if n_workers is None:
+        n_workers = os.cpu_count()
+    n_frames = len(positions)
+
+    if path.lower().endswith(".gif"):
+        writer_kwargs = dict(duration=1000 / fps, loop=0)
+    else:
+        writer_kwargs = dict(fps=fps)
+
+    with imageio.get_writer(path, **writer_kwargs) as writer:
+        if n_workers <= 1:
+            renderer = _FrameRenderer(**options)
+            for position in positions:
+                writer.append_data(renderer.render(position))
+            renderer.close()
+            return path
+
+        if chunk_size is None:
+            chunk_size = -(-n_frames // n_workers)
+        chunks = [
+            (start, min(start + chunk_size, n_frames))
+            for start in range(0, n_frames, chunk_size)
+        ]
+        with tempfile.TemporaryDirectory() as directory:
+            positions_path = os.path.join(directory, "positions.npy")
+            np.save(positions_path, positions)
+            frames_paths = [
+                os.path.join(directory, f"frames_{i}.npy")
+                for i in range(len(chunks))
+            ]
+            with ProcessPoolExecutor(
+                    n_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+            ) as executor:
+                futures = [
+                    executor.submit(
+                        _render_chunk,
+                        positions_path,
+                        frames_path,
+                        start,
+                        stop,
+                        options,
+                    )
+                    for frames_path, (start, stop) in zip(frames_paths, chunks)
+                ]
+                # Stitch the chunks in order, as soon as they are rendered
+                for future, frames_path in zip(futures, frames_paths):
+                    future.result()
+                    for image in np.load(frames_path, mmap_mode="r"):
+                        writer.append_data(np.asarray(image))
+                    os.remove(frames_path)
+
+    return path
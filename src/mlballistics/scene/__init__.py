@@ -1 +1,4 @@
-from .scene import Scene
\ No newline at end of file
+from .scene import Scene
+from .events import Event, GroundHit, Collision
+from .parallel import simulate_parallel
+from .cache import SimulationCache
@@ -0,0 +1,473 @@
+"""Batched representation of the objects of a scene."""
+from typing import NamedTuple, Optional, Union
+
+import torch
+
+from ..forces import Force
+from ..forces.fused import Backend, FusedODE
+from ..integrators import INTEGRATORS, solve
+from ..objects import Object, ObjectBatch
+from ..profiling import _call_force, _rhs
+from ..utils import _constant_acceleration_states
+
+
+# Solvers of torchdiffeq that integrate on a fixed grid of time steps
+FIXED_GRID_METHODS = (
+    "euler",
+    "midpoint",
+    "heun2",
+    "heun3",
+    "rk4",
+    "explicit_adams",
+    "implicit_adams",
+)
+
+
+def _n_rows(obj: Union[Object, ObjectBatch]) -> int:
+    """Number of rows of an object in stacked states."""
+    return len(obj) if isinstance(obj, ObjectBatch) else 1
+
+
+def _scatter(
+        objects: list[Union[Object, ObjectBatch]],
+        states: torch.Tensor,
+        ) -> None:
+    """Store stacked states `(n_steps, N, 6)` back into the objects."""
+    start = 0
+    for obj in objects:
+        stop = start + _n_rows(obj)
+        if isinstance(obj, ObjectBatch):
+            obj._set_states(states[:, start:stop])
+        else:
+            obj._set_states(states[:, start])
+        start = stop
+
+
+class _Parameters(NamedTuple):
+    """Physical parameters of a group of objects, as `(n,)` tensors."""
+    mass: torch.Tensor
+    drag_coefficient: torch.Tensor
+    sectional_area: torch.Tensor
+
+
+class _ForceGroup(NamedTuple):
+    """Objects sharing the same force tree.
+
+    If the force is constant, its value is computed once when the group is
+    built and stored in `constant`.
+    """
+    force: Force
+    indices: torch.Tensor
+    parameters: _Parameters
+    constant: Optional[torch.Tensor] = None
+
+    def __call__(self, state: torch.Tensor) -> torch.Tensor:
+        """Forces acting on the objects of the group."""
+        if self.constant is not None:
+            return self.constant
+        return _call_force(self.force, state, self.parameters)
+
+
+class BatchedSystem:
+    """Objects of a scene stacked into tensors.
+
+    The states of the N objects are stacked into a single `(N, 6)` tensor and
+    their physical parameters into `(N,)` tensors, so that the whole scene can
+    be integrated with a single call to the ODE solver. Batches of objects
+    (`ObjectBatch`) contribute all their rows at once, without any per-object
+    Python work.
+
+    Objects whose forces have the same key are grouped together, and each
+    group is evaluated with a single vectorized call to its force tree.
+
+    Parameters
+    ----------
+    objects
+        The list of objects (or batches of objects) to stack.
+    compiled
+        If "script" or "compile", the forces of all groups are lowered into a
+        single fused right-hand side compiled with TorchScript or
+        `torch.compile`. If None, the forces are evaluated in Python.
+    dtype
+        Data type of the system. The initial states and the parameters of
+        the objects are converted once, so that the forces (and the cached
+        constant forces) are evaluated in this dtype. Default to the dtype of
+        the initial states of the objects.
+    device
+        Device of the system. Default to the device of the initial states of
+        the objects.
+
+    """
+    def __init__(
+            self,
+            objects: list[Union[Object, ObjectBatch]],
+            compiled: Optional[Backend] = None,
+            dtype: Optional[torch.dtype] = None,
+            device: Optional[torch.device] = None,
+            ) -> None:
+        if len(objects) == 0:
+            raise ValueError("Cannot build a batched system without objects.")
+
+        self._objects = list(objects)
+        self._compiled = compiled
+
+        # Rows of the system occupied by each object or batch
+        self._rows = []
+        start = 0
+        for obj in self._objects:
+            stop = start + _n_rows(obj)
+            self._rows.append((start, stop))
+            start = stop
+
+        self._initial_state = torch.cat([
+            obj.initial_state.reshape(-1, 6).to(dtype=dtype, device=device)
+            for obj in self._objects
+        ])
+
+        dtype = self._initial_state.dtype
+        device = self._initial_state.device
+        self._mass = self._stack("mass", dtype=dtype, device=device)
+        self._drag_coefficient = self._stack(
+            "drag_coefficient", dtype=dtype, device=device
+        )
+        self._sectional_area = self._stack(
+            "sectional_area", dtype=dtype, device=device
+        )
+        self._build_groups()
+
+    def _stack(self, name: str, dtype, device) -> torch.Tensor:
+        """Stack a scalar parameter of all objects into a `(N,)` tensor."""
+        return torch.cat([
+            torch.as_tensor(
+                getattr(obj, name), dtype=dtype, device=device
+            ).reshape(-1)
+            for obj in self._objects
+        ])
+
+    def _build_groups(self) -> None:
+        """Group the objects by force key.
+
+        Forces with per-object parameters only apply to the rows of their
+        object, so their objects are never merged with other objects.
+        """
+        groups = {}
+        for obj, rows in zip(self._objects, self._rows):
+            key = obj.force._key
+            if obj.force._per_object:
+                key = (key, id(obj))
+            groups.setdefault(key, (obj.force, []))[1].append(rows)
+
+        device = self._initial_state.device
+        self._groups = []
+        for force, rows in groups.values():
+            indices = torch.cat([
+                torch.arange(start, stop, device=device)
+                for start, stop in rows
+            ])
+            parameters = _Parameters(
+                mass=self._mass[indices],
+                drag_coefficient=self._drag_coefficient[indices],
+                sectional_area=self._sectional_area[indices],
+            )
+            constant = None
+            if force.is_constant:
+                constant = force(self._initial_state[indices], parameters)
+            self._groups.append(_ForceGroup(
+                force=force,
+                indices=indices,
+                parameters=parameters,
+                constant=constant,
+            ))
+
+        # Permutation that restores the order of the objects after the
+        # results of the groups have been concatenated
+        order = torch.cat([group.indices for group in self._groups])
+        self._inverse_order = torch.argsort(order)
+
+    def ode_func(self, t, y):
+        """ODE function for the whole system.
+
+        Parameters
+        ----------
+        t
+            Time.
+        y
+            State tensor of the system, of shape `(N, 6)`.
+
+        Returns
+        -------
+        torch.Tensor
+            Derivative of the state tensor, of shape `(N, 6)`.
+        """
+        return torch.cat([
+            y[:, 3:6],
+            self.forces_vector(y) / self._mass[:, None],
+            ],
+            dim=1,
+        )
+
+    def forces_vector(self, state=None) -> torch.Tensor:
+        """Forces acting on all objects.
+
+        Parameters
+        ----------
+        state
+            State tensor of the system, of shape `(N, 6)`.
+
+        Returns
+        -------
+        torch.Tensor
+            Forces acting on the objects, of shape `(N, 3)`.
+        """
+        state = self._initial_state if state is None else state
+        if len(self._groups) == 1:
+            return self._groups[0](state)
+
+        forces = torch.cat([
+            group(state[group.indices]) for group in self._groups
+        ])
+        return forces[self._inverse_order]
+
+    def _ode_func(self, groups: Optional[list[_ForceGroup]] = None):
+        """ODE function used by the solvers, fused if compilation is on.
+
+        If `groups` is None, the function acts on the states of all objects,
+        in their order. Otherwise, it acts on the states of the objects of
+        the groups, concatenated in the order of the groups, which avoids
+        gathering the states of each group at every evaluation.
+        """
+        if groups is None:
+            if self._compiled is None:
+                return self.ode_func
+            groups, order = self._groups, self._inverse_order
+        else:
+            order = None
+
+        if self._compiled is not None:
+            return FusedODE(
+                [(g.force, g.parameters) for g in groups],
+                [self._initial_state[g.indices] for g in groups],
+                backend=self._compiled,
+                order=order,
+            )
+
+        sizes = [len(g.indices) for g in groups]
+        mass = torch.cat([g.parameters.mass for g in groups])[:, None]
+
+        def ode_func(t, y):
+            forces = torch.cat([
+                group(state) for group, state in zip(groups, y.split(sizes))
+            ])
+            return torch.cat([y[:, 3:6], forces / mass], dim=1)
+
+        return ode_func
+
+    def parameters(self) -> tuple[torch.Tensor, ...]:
+        """Tensors the ODE function depends on.
+
+        These are the parameters of the objects and the tensor parameters of
+        the forces, registered when simulating with the adjoint method.
+
+        Returns
+        -------
+        tuple[torch.Tensor, ...]
+            The parameters of the system.
+        """
+        parameters = {}
+        for tensor in [
+                self._mass, self._drag_coefficient, self._sectional_area
+        ]:
+            parameters[id(tensor)] = tensor
+        for group in self._groups:
+            for tensor in group.force.parameters():
+                parameters[id(tensor)] = tensor
+        return tuple(parameters.values())
+
+    def _odeint_kwargs(self, adjoint: bool) -> dict:
+        """Solver function and extra arguments, for the adjoint method."""
+        from torchdiffeq import odeint, odeint_adjoint
+
+        if adjoint:
+            return dict(
+                odeint_interface=odeint_adjoint,
+                adjoint_params=self.parameters(),
+            )
+        return dict(odeint_interface=odeint)
+
+    def simulate(
+            self,
+            time: torch.Tensor,
+            method: str = "rk4",
+            rtol: float = 1e-7,
+            atol: float = 1e-9,
+            adjoint: bool = False,
+            initial_state: Optional[torch.Tensor] = None,
+            ) -> torch.Tensor:
+        """Simulate the system.
+
+        Groups of objects subject to a constant force are computed in closed
+        form, the other objects are integrated together with a single call to
+        the ODE solver.
+
+        Parameters
+        ----------
+        time
+            Time of the simulation, of shape `(n_steps,)`.
+        method
+            Integrator, see `integrators`: "verlet" or "symplectic_euler"
+            (one evaluation of the forces per step), or a solver of
+            torchdiffeq, for example "rk4" (fixed step on the time grid) or
+            "dopri5" (adaptive step).
+        rtol
+            Relative tolerance of the adaptive solvers.
+        atol
+            Absolute tolerance of the adaptive solvers.
+        adjoint
+            If True, gradients are computed with the adjoint method, that
+            integrates the ODE backward in time instead of storing the
+            intermediate steps: the memory does not grow with the horizon.
+        initial_state
+            State of the system at `time[0]`, of shape `(N, 6)`. Default to
+            the initial state of the objects.
+
+        Returns
+        -------
+        torch.Tensor
+            States of the system, of shape `(n_steps, N, 6)`.
+        """
+        if initial_state is None:
+            initial_state = self._initial_state
+
+        indices, parts = [], []
+        dynamic_groups = []
+        for group in self._groups:
+            if group.constant is None:
+                dynamic_groups.append(group)
+                continue
+            indices.append(group.indices)
+            parts.append(_constant_acceleration_states(
+                time,
+                initial_state[group.indices],
+                group.constant / group.parameters.mass[:, None],
+            ))
+
+        if dynamic_groups:
+            dynamic = torch.cat([group.indices for group in dynamic_groups])
+            indices.append(dynamic)
+            parts.append(solve(
+                _rhs(self._ode_func(dynamic_groups)),
+                initial_state[dynamic],
+                time,
+                method=method,
+                rtol=rtol,
+                atol=atol,
+                adjoint=adjoint,
+                adjoint_params=self.parameters() if adjoint else None,
+            ))
+
+        if len(self._groups) == 1:
+            return parts[0]
+        states = torch.cat(parts, dim=1)
+        return states[:, torch.argsort(torch.cat(indices))]
+
+    def simulate_until_event(
+            self,
+            event_fn,
+            t0: torch.Tensor,
+            method: str = "dopri5",
+            rtol: float = 1e-7,
+            atol: float = 1e-9,
+            step_size: float = None,
+            adjoint: bool = False,
+            ) -> tuple:
+        """Simulate the system until an event occurs.
+
+        Parameters
+        ----------
+        event_fn
+            Function of `(t, state)` returning a scalar tensor, the
+            integration stops when its sign changes.
+        t0
+            Initial time, as a scalar tensor.
+        method
+            Solver of torchdiffeq.
+        rtol
+            Relative tolerance of the adaptive solvers.
+        atol
+            Absolute tolerance of the adaptive solvers.
+        step_size
+            Step size, required by the fixed grid solvers.
+        adjoint
+            If True, gradients are computed with the adjoint method.
+
+        Returns
+        -------
+        tuple[torch.Tensor, torch.Tensor]
+            The time of the event and the state of the system at this time,
+            of shape `(N, 6)`. Both are differentiable with respect to the
+            initial state and the parameters of the objects.
+
+        Raises
+        ------
+        ValueError
+            If the method is an integrator of the registry, events require a
+            solver of torchdiffeq.
+        """
+        if method in INTEGRATORS:
+            raise ValueError(
+                f"Events are not available for the integrator {method},"
+                " please use a solver of torchdiffeq."
+            )
+        options = None
+        if method in FIXED_GRID_METHODS:
+            options = dict(step_size=step_size)
+
+        from torchdiffeq import odeint_event
+
+        event_t, states = odeint_event(
+            _rhs(self._ode_func()),
+            self._initial_state,
+            t0,
+            event_fn=event_fn,
+            method=method,
+            rtol=rtol,
+            atol=atol,
+            options=options,
+            **self._odeint_kwargs(adjoint),
+        )
+        return event_t, states[-1]
+
+    def scatter(self, states: torch.Tensor) -> None:
+        """Store the simulated states back into the objects.
+
+        Parameters
+        ----------
+        states
+            States of the system, of shape `(n_steps, N, 6)`.
+        """
+        _scatter(self._objects, states)
+
+    @property
+    def objects(self) -> list[Object]:
+        """Objects of the system."""
+        return self._objects
+
+    @property
+    def initial_state(self) -> torch.Tensor:
+        """Initial states of the objects, of shape `(N, 6)`."""
+        return self._initial_state
+
+    @property
+    def mass(self) -> torch.Tensor:
+        """Masses of the objects, of shape `(N,)`."""
+        return self._mass
+
+    @property
+    def drag_coefficient(self) -> torch.Tensor:
+        """Drag coefficients of the objects, of shape `(N,)`."""
+        return self._drag_coefficient
+
+    @property
+    def sectional_area(self) -> torch.Tensor:
+        """Sectional areas of the objects, of shape `(N,)`."""
+        return self._sectional_area
@@ -0,0 +1,185 @@
+"""Cache of simulated trajectories.
+
+The trajectory of an object only depends on its initial state, its physical
+parameters, its force tree and the time grid (and on the solver, the dtype
+and the device of the simulation). The cache maps a hash of these inputs to
+the simulated states, so that objects whose inputs did not change are not
+integrated again, for example a fixed target in an optimization loop that
+only updates the missile.
+"""
+import hashlib
+from collections import OrderedDict
+from typing import Optional, Union
+
+import torch
+
+from ..objects import Object, ObjectBatch
+
+
+def _inputs(obj: Union[Object, ObjectBatch]) -> list:
+    """Tensors and values that determine the trajectory of an object."""
+    return [
+        obj.initial_state,
+        obj.mass,
+        obj.drag_coefficient,
+        obj.sectional_area,
+    ] + obj.force.parameters()
+
+
+def _structure(key):
+    """Force key without the ids of the tensor parameters.
+
+    The tensor parameters are hashed by value, see `SimulationCache.key`.
+    """
+    if isinstance(key, tuple):
+        if len(key) == 2 and key[0] == "tensor" and isinstance(key[1], int):
+            return "tensor"
+        return tuple(_structure(value) for value in key)
+    if isinstance(key, type):
+        return key.__qualname__
+    return key
+
+
+class SimulationCache:
+    """LRU cache of simulated trajectories with a memory budget.
+
+    Pass the cache to `Scene.simulate` to reuse the trajectories of objects
+    whose inputs did not change since a previous simulation. Objects whose
+    initial state, parameters or forces require gradients are always
+    simulated, so that gradients flow through their trajectories.
+
+    Parameters
+    ----------
+    max_bytes
+        Memory budget of the cached states. The least recently used entries
+        are evicted when it is exceeded.
+
+    """
+    def __init__(self, max_bytes: int = 2 ** 30) -> None:
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._nbytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def cacheable(obj: Union[Object, ObjectBatch]) -> bool:
+        """Whether the trajectory of an object can be cached.
+
+        Parameters
+        ----------
+        obj
+            The object.
+
+        Returns
+        -------
+        bool
+            False if one of the inputs of the object requires gradients.
+        """
+        return not any(
+            isinstance(value, torch.Tensor) and value.requires_grad
+            for value in _inputs(obj)
+        )
+
+    @staticmethod
+    def key(
+            obj: Union[Object, ObjectBatch],
+            time: torch.Tensor,
+            **options,
+            ) -> str:
+        """Hash of the inputs of the simulation of an object.
+
+        Parameters
+        ----------
+        obj
+            The object.
+        time
+            Time grid of the simulation.
+        **options
+            Other options of the simulation (solver, tolerances, dtype and
+            device...).
+
+        Returns
+        -------
+        str
+            The key of the object in the cache.
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(repr((
+            type(obj).__qualname__,
+            _structure(obj.force._key),
+            sorted(options.items()),
+        )).encode())
+        for value in _inputs(obj) + [time]:
+            value = torch.as_tensor(value).detach().cpu()
+            digest.update(repr((value.dtype, tuple(value.shape))).encode())
+            digest.update(value.contiguous().numpy().tobytes())
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[torch.Tensor]:
+        """Cached states of a key, None if the key is not cached.
+
+        Parameters
+        ----------
+        key
+            The key.
+
+        Returns
+        -------
+        torch.Tensor
+            The states.
+        """
+        states = self._entries.get(key)
+        if states is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return states
+
+    def put(self, key: str, states: torch.Tensor) -> None:
+        """Cache the states of a key.
+
+        States larger than the memory budget are not cached. The states are
+        copied, so that the entry does not keep alive the states of the
+        other objects of the scene.
+
+        Parameters
+        ----------
+        key
+            The key.
+        states
+            The simulated states.
+        """
+        nbytes = states.element_size() * states.nelement()
+        if nbytes > self.max_bytes:
+            return
+        # A copy: the states of an object are a view of the states of the
+        # whole scene, which would stay alive with the entry
+        states = states.detach().clone()
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = states
+        self._nbytes += nbytes
+        while self._nbytes > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+
+    def _remove(self, key: str) -> None:
+        states = self._entries.pop(key)
+        self._nbytes -= states.element_size() * states.nelement()
+
+    def clear(self) -> None:
+        """Remove all the entries."""
+        self._entries.clear()
+        self._nbytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    @property
+    def nbytes(self) -> int:
+        """Memory used by the cached states."""
+        return self._nbytes
@@ -0,0 +1,225 @@
+"""Continuous closest approach between the objects of a scene.
+
+Between two time steps, the position of each object is interpolated by the
+cubic Hermite polynomial matching the simulated positions and velocities at
+both ends of the segment. Written in the Bezier basis, the curve lies in the
+convex hull of its four control points, which gives a conservative bounding
+box per segment.
+
+The closest approach between two objects is found in two phases:
+
+- broad phase: for each pair and each segment, the bounding box of the
+  relative curve gives a lower bound of the distance. Segments whose lower
+  bound is larger than the best distance at the time steps are discarded.
+- narrow phase: on the remaining segments, the distance is minimized on the
+  interpolated curve.
+"""
+from typing import NamedTuple, Optional
+
+import torch
+
+
+class ClosestApproach(NamedTuple):
+    """Closest approach between pairs of objects.
+
+    Attributes
+    ----------
+    pairs
+        Indices of the objects of each pair, of shape `(P, 2)`.
+    time
+        Time of the closest approach, of shape `(P,)`.
+    distance
+        Distance between the centers of the objects at the closest approach,
+        of shape `(P,)`. It is differentiable with respect to the states.
+    """
+    pairs: torch.Tensor
+    time: torch.Tensor
+    distance: torch.Tensor
+
+
+def _control_points(
+        start: torch.Tensor,
+        end: torch.Tensor,
+        dt: torch.Tensor,
+        ) -> torch.Tensor:
+    """Bezier control points of the Hermite interpolation of the positions.
+
+    Parameters
+    ----------
+    start
+        States at the start of the segments, of shape `(..., 6)`.
+    end
+        States at the end of the segments, of shape `(..., 6)`.
+    dt
+        Durations of the segments, broadcastable to `(...,)`.
+
+    Returns
+    -------
+    torch.Tensor
+        Control points, of shape `(..., 4, 3)`.
+    """
+    dt = dt.to(start)[..., None]
+    x0, v0 = start[..., :3], start[..., 3:6]
+    x1, v1 = end[..., :3], end[..., 3:6]
+    return torch.stack(
+        [x0, x0 + v0 * dt / 3, x1 - v1 * dt / 3, x1], dim=-2
+    )
+
+
+def _bezier(points: torch.Tensor, s: torch.Tensor, derivative: int = 0):
+    """Evaluate cubic Bezier curves (or their derivatives).
+
+    Parameters
+    ----------
+    points
+        Control points, of shape `(M, 4, 3)`.
+    s
+        Parameters in [0, 1], of shape `(M,)` or `(M, K)`.
+    derivative
+        Order of the derivative (0, 1 or 2).
+
+    Returns
+    -------
+    torch.Tensor
+        Points of shape `s.shape + (3,)`.
+    """
+    if s.dim() == 1:
+        return _bezier(points, s[:, None], derivative)[:, 0]
+
+    if derivative == 0:
+        u = 1 - s
+        weights = [u ** 3, 3 * u ** 2 * s, 3 * u * s ** 2, s ** 3]
+        p = points
+    elif derivative == 1:
+        u = 1 - s
+        weights = [u ** 2, 2 * u * s, s ** 2]
+        p = 3 * (points[:, 1:] - points[:, :-1])
+    else:
+        weights = [1 - s, s]
+        p = 6 * (points[:, 2:] - 2 * points[:, 1:-1] + points[:, :-2])
+
+    return sum(
+        w[..., None] * p[:, i, None, :] for i, w in enumerate(weights)
+    )
+
+
+def _minimize_distance(
+        points: torch.Tensor,
+        n_samples: int = 9,
+        n_newton: int = 8,
+        ) -> torch.Tensor:
+    """Parameter minimizing the norm of Bezier curves on [0, 1].
+
+    The curves are sampled to find a starting point, then refined with Newton
+    iterations on the derivative of the squared norm.
+
+    Parameters
+    ----------
+    points
+        Control points of the relative curves, of shape `(M, 4, 3)`.
+
+    Returns
+    -------
+    torch.Tensor
+        The parameters of the minima, of shape `(M,)`.
+    """
+    samples = torch.linspace(
+        0, 1, n_samples, dtype=points.dtype, device=points.device
+    )
+    samples = samples.expand(points.shape[0], -1)
+    squared = (_bezier(points, samples) ** 2).sum(dim=-1)
+    s = samples.gather(1, squared.argmin(dim=1, keepdim=True))[:, 0]
+
+    for _ in range(n_newton):
+        d = _bezier(points, s)
+        d1 = _bezier(points, s, derivative=1)
+        d2 = _bezier(points, s, derivative=2)
+        gradient = (d * d1).sum(dim=-1)
+        hessian = (d1 * d1).sum(dim=-1) + (d * d2).sum(dim=-1)
+        step = torch.where(
+            hessian > 0, gradient / hessian, torch.zeros_like(gradient)
+        )
+        s = (s - step).clamp(0, 1)
+
+    return s
+
+
+def closest_approach(
+        states: torch.Tensor,
+        time: torch.Tensor,
+        pairs: Optional[torch.Tensor] = None,
+        ) -> ClosestApproach:
+    """Closest approach between pairs of objects.
+
+    Parameters
+    ----------
+    states
+        States of the objects, of shape `(n_steps, N, 6)`.
+    time
+        Times of the states, of shape `(n_steps,)`.
+    pairs
+        Indices of the pairs of objects, of shape `(P, 2)`. Default to all
+        the pairs of distinct objects.
+
+    Returns
+    -------
+    ClosestApproach
+        The time and the distance of the closest approach of each pair.
+    """
+    if pairs is None:
+        pairs = torch.combinations(
+            torch.arange(states.shape[1], device=states.device), r=2
+        )
+
+    dt = time[1:] - time[:-1]
+    with torch.no_grad():
+        points = _control_points(states[:-1], states[1:], dt[:, None])
+        relative = points[:, pairs[:, 0]] - points[:, pairs[:, 1]]
+
+        # Broad phase: lower bound of the distance from the bounding boxes,
+        # upper bound from the distance at the time steps
+        low = relative.amin(dim=2)
+        high = relative.amax(dim=2)
+        lower_bound = torch.linalg.vector_norm(
+            low.clamp(min=0) + (-high).clamp(min=0), dim=-1
+        )
+        at_steps = torch.linalg.vector_norm(relative[:, :, [0, 3]], dim=-1)
+        upper_bound = at_steps.amin(dim=(0, 2))
+        segments, candidates = torch.nonzero(
+            lower_bound <= upper_bound, as_tuple=True
+        )
+
+        # Narrow phase on the remaining segments
+        s = _minimize_distance(relative[segments, candidates])
+        distances = torch.linalg.vector_norm(
+            _bezier(relative[segments, candidates], s), dim=-1
+        )
+
+        best = torch.full(
+            lower_bound.shape,
+            torch.inf,
+            dtype=distances.dtype,
+            device=states.device,
+        )
+        best[segments, candidates] = distances
+        best_parameter = torch.zeros_like(best)
+        best_parameter[segments, candidates] = s
+        segment = best.argmin(dim=0)
+        arange = torch.arange(len(pairs), device=states.device)
+        s = best_parameter[segment, arange]
+
+    # Differentiable distance at the (fixed) time of the closest approach
+    relative = _control_points(
+        states[segment, pairs[:, 0]], states[segment + 1, pairs[:, 0]],
+        dt[segment],
+    ) - _control_points(
+        states[segment, pairs[:, 1]], states[segment + 1, pairs[:, 1]],
+        dt[segment],
+    )
+    distance = torch.linalg.vector_norm(_bezier(relative, s), dim=-1)
+
+    return ClosestApproach(
+        pairs=pairs,
+        time=time[segment] + s.to(time) * dt[segment],
+        distance=distance,
+    )
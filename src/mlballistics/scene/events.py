@@ -0,0 +1,89 @@
+"""Events that stop the simulation of a scene."""
+import torch
+
+from ..objects import Object
+
+
+class Event:
+    """Abstract class for events.
+
+    An event is a function of the time and of the state of the scene that is
+    positive before the event and becomes negative when it occurs, for example
+    the altitude of an object for a ground hit.
+
+    Events can also watch batches of objects (`ObjectBatch`): the event
+    occurs as soon as it occurs for one of the objects of the batch.
+    """
+
+    def __call__(
+            self,
+            t: torch.Tensor,
+            state: torch.Tensor,
+            index: dict,
+            ) -> torch.Tensor:
+        """Value of the event function.
+
+        Parameters
+        ----------
+        t
+            Time.
+        state
+            State tensor of the scene, of shape `(N, 6)`.
+        index
+            Mapping from `id(obj)` to the row of the object in `state` (or to
+            the slice of rows of a batch).
+
+        Returns
+        -------
+        torch.Tensor
+            Scalar tensor, positive before the event.
+        """
+        raise NotImplementedError
+
+
+class GroundHit(Event):
+    """An object goes below a given altitude.
+
+    Parameters
+    ----------
+    obj
+        The object.
+    altitude
+        The altitude of the ground.
+
+    """
+    def __init__(self, obj: Object, altitude: float = 0.0) -> None:
+        self.obj = obj
+        self.altitude = altitude
+
+    def __call__(self, t, state, index) -> torch.Tensor:
+        return (state[index[id(self.obj)], 2] - self.altitude).min()
+
+
+class Collision(Event):
+    """Two objects collide.
+
+    The distance between the centers of the objects goes below the sum of
+    their radii (objects without a radius are treated as points). If both
+    objects are batches of the same size, their objects are paired row by
+    row.
+
+    Parameters
+    ----------
+    obj1
+        The first object.
+    obj2
+        The second object.
+
+    """
+    def __init__(self, obj1: Object, obj2: Object) -> None:
+        self.obj1 = obj1
+        self.obj2 = obj2
+
+    def __call__(self, t, state, index) -> torch.Tensor:
+        x1 = state[index[id(self.obj1)], :3]
+        x2 = state[index[id(self.obj2)], :3]
+        radii = getattr(self.obj1, "radius", 0.0)
+        radii = radii + getattr(self.obj2, "radius", 0.0)
+        distance = torch.linalg.vector_norm(x1 - x2, dim=-1)
+        return (distance - radii).min()
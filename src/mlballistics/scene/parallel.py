@@ -0,0 +1,167 @@
+"""Simulation of scenes across several processes.
+
+The objects of a scene do not interact, so the rows of the stacked states can
+be simulated independently. The rows of one or several scenes are split into
+shards of similar sizes (batches of objects are sliced if needed), and each
+shard is simulated by a worker of a `torch.multiprocessing` pool.
+
+The objects are sent to the workers with the reductions of
+`torch.multiprocessing`: their tensors are moved to shared memory instead of
+being pickled. The workers write their states directly in a shared output
+tensor, so that nothing large is sent back to the main process. Workers are
+started with the "spawn" method, which is safe with the thread pools of torch,
+and each of them uses a fraction of the threads to avoid oversubscription.
+"""
+import math
+from typing import Optional, Union
+
+import torch
+import torch.multiprocessing as mp
+
+from ..forces.fused import Backend
+from ..objects import Object, ObjectBatch
+from .batched import BatchedSystem
+from .scene import Scene
+
+
+def _shards(
+        objects: list[Union[Object, ObjectBatch]],
+        n_shards: int,
+        ) -> list[tuple[list[Union[Object, ObjectBatch]], int, int]]:
+    """Split the rows of objects into contiguous shards.
+
+    Returns
+    -------
+    list
+        For each shard, the objects (batches are sliced at the boundaries of
+        the shards) and the rows `(start, stop)` of the shard.
+    """
+    n = sum(Scene.n_rows(obj) for obj in objects)
+    size = math.ceil(n / n_shards)
+    shards = []
+    current, start, row = [], 0, 0
+    for obj in objects:
+        offset = 0
+        while offset < Scene.n_rows(obj):
+            take = min(Scene.n_rows(obj) - offset, start + size - row)
+            if isinstance(obj, ObjectBatch):
+                current.append(
+                    obj if take == len(obj) else obj[offset:offset + take]
+                )
+            else:
+                current.append(obj)
+            offset += take
+            row += take
+            if row == start + size:
+                shards.append((current, start, row))
+                current, start = [], row
+    if current:
+        shards.append((current, start, row))
+    return shards
+
+
+def _init_worker(n_threads: int) -> None:
+    torch.set_num_threads(n_threads)
+
+
+def _simulate_shard(
+        objects: list[Union[Object, ObjectBatch]],
+        output: torch.Tensor,
+        start: int,
+        stop: int,
+        time: torch.Tensor,
+        dtype: torch.dtype,
+        compiled: Optional[Backend],
+        method: str,
+        rtol: float,
+        atol: float,
+        ) -> None:
+    """Simulate a shard and write its states in the shared output."""
+    with torch.no_grad():
+        system = BatchedSystem(objects, compiled=compiled, dtype=dtype)
+        states = system.simulate(time, method=method, rtol=rtol, atol=atol)
+        output[:, start:stop] = states
+
+
+def simulate_parallel(
+        scenes: Union[Scene, list[Scene]],
+        stop_time: float = 1.0,
+        n_steps: int = 100,
+        n_workers: Optional[int] = None,
+        n_threads: Optional[int] = None,
+        compiled: Optional[Backend] = None,
+        method: str = "rk4",
+        rtol: float = 1e-7,
+        atol: float = 1e-9,
+        ) -> torch.Tensor:
+    """Simulate one or several scenes across several processes.
+
+    The result is the same as calling `Scene.simulate` on each scene, but
+    the simulation is not differentiable. All the scenes are simulated on the
+    CPU, with the dtype of the first scene.
+
+    Parameters
+    ----------
+    scenes
+        A scene or a list of scenes.
+    stop_time
+        The time at which the simulation stops.
+    n_steps
+        The number of time steps of the simulation.
+    n_workers
+        Number of processes. Default to the number of CPUs. If 0, the shards
+        are simulated in the current process.
+    n_threads
+        Number of torch threads per process. Default to the number of threads
+        of the main process divided by the number of processes.
+    compiled
+        Fused right-hand side, see `Scene.simulate`.
+    method
+        Integrator, see `Scene.simulate`.
+    rtol
+        Relative tolerance of the adaptive solvers.
+    atol
+        Absolute tolerance of the adaptive solvers.
+
+    Returns
+    -------
+    torch.Tensor
+        The states of all the objects of the scenes, of shape
+        `(n_steps, N, 6)`, in shared memory. The states of each object are
+        views of this tensor.
+    """
+    if isinstance(scenes, Scene):
+        scenes = [scenes]
+    if n_workers is None:
+        n_workers = mp.cpu_count()
+    if n_threads is None:
+        n_threads = max(1, torch.get_num_threads() // max(n_workers, 1))
+
+    objects = [obj for scene in scenes for obj in scene.objects]
+    n = sum(Scene.n_rows(obj) for obj in objects)
+    dtype = scenes[0]._options()["dtype"]
+    time = scenes[0]._time_grid(stop_time, n_steps).cpu()
+    output = torch.empty(n_steps, n, 6, dtype=dtype).share_memory_()
+
+    shards = _shards(objects, max(n_workers, 1))
+    arguments = [
+        (shard, output, start, stop, time, dtype, compiled, method, rtol, atol)
+        for shard, start, stop in shards
+    ]
+    if n_workers == 0:
+        for argument in arguments:
+            _simulate_shard(*argument)
+    else:
+        with mp.get_context("spawn").Pool(
+            min(n_workers, len(shards)),
+            initializer=_init_worker,
+            initargs=(n_threads,),
+        ) as pool:
+            pool.starmap(_simulate_shard, arguments)
+
+    start = 0
+    for scene in scenes:
+        stop = start + sum(Scene.n_rows(obj) for obj in scene.objects)
+        scene.attach_states(output[:, start:stop], time)
+        start = stop
+    return output
@@ -1,36 +1,511 @@
 """Scene that contains all objects and simulate the evolution."""
+from functools import reduce
+from typing import Iterator, Optional, Union
+
 import torch
 
-from ..objects import Object
+from ..forces.fused import Backend
+from ..objects import Object, ObjectBatch
+from ..profiling import Profiler, SimulationReport
+from .batched import BatchedSystem, _n_rows, _scatter
+from .cache import SimulationCache
+from .collision import ClosestApproach, closest_approach
+from .events import Event
 
 
 class Scene:
 
-    def __init__(self, objects: list[Object]):
+    def __init__(
+            self,
+            objects: list[Union[Object, ObjectBatch]],
+            dtype: Optional[torch.dtype] = None,
+            device: Optional[torch.device] = None,
+            ):
         """Initialize a scene.
 
+        The dtype and the device of the scene apply to all the simulations:
+        the initial states and the parameters of the objects are converted
+        once when the scene is simulated, and the forces, the constant forces
+        and the trajectories all use them (the time grid is at least in
+        single precision). Use `torch.float64` for accuracy over long
+        horizons, or a reduced precision for bulk simulations. Tensor
+        parameters of the forces (for example the altitudes of an
+        `Oscillation`) should be created with the same dtype, otherwise they
+        are converted at each evaluation.
+
         Parameters
         ----------
         objects
-            The list of objects in the scene.
+            The list of objects in the scene. Batches of objects
+            (`ObjectBatch`) can be mixed with single objects.
+        dtype
+            Data type of the simulations. Default to the dtype of the initial
+            states of the objects (promoted if they differ).
+        device
+            Device of the simulations. Default to the device of the initial
+            states of the objects.
         """
         self.objects = objects
+        self.dtype = dtype
+        self.device = device
+        self._event = None
+        self._event_time = None
+        self._time = None
 
     def simulate(
             self,
             stop_time: float = 1.0,
             n_steps: int = 100,
-            ):
+            compiled: Optional[Backend] = None,
+            method: str = "rk4",
+            rtol: float = 1e-7,
+            atol: float = 1e-9,
+            events: Optional[list[Event]] = None,
+            adjoint: bool = False,
+            cache: Optional[SimulationCache] = None,
+            profile: bool = False,
+            ) -> Optional[SimulationReport]:
         """Simulate the scene.
 
+        The states of all objects are stacked into a single `(N, 6)` tensor
+        and integrated with one call to the ODE solver. Objects subject to
+        constant forces only are computed in closed form. The trajectory of
+        each object is then available through `Object.trajectory`.
+
+        If events are given, the integration stops at the first event (or at
+        `stop_time` if no event occurs). The trajectories are then sampled on
+        `n_steps` times between 0 and the time of the event, and the last
+        state is the exact state at the event. The time of the event is
+        available through `Scene.event_time` and is differentiable. The
+        event is located by a first integration, and the scene is then
+        integrated again from 0 on the sampling grid (the solvers of
+        torchdiffeq do not expose their dense output): a simulation with
+        events costs about twice a simulation without events over the same
+        horizon, even if no event occurs before `stop_time`.
+
         Parameters
         ----------
-        time_step
-            The time step between two iterations of the simulation.
+        stop_time
+            The time at which the simulation stops.
+        n_steps
+            The number of time steps of the simulation.
+        compiled
+            If "script" or "compile", the forces are lowered into a fused
+            right-hand side compiled with TorchScript or `torch.compile`.
+            Only Gravity, Drag without a drag table, NullForce and their
+            sums can be compiled.
+        method
+            Integrator, see `integrators`: "verlet" or "symplectic_euler"
+            (fixed step, one evaluation of the forces per step, without
+            energy drift over long horizons), or a solver of torchdiffeq,
+            for example "rk4" (fixed step) or "dopri5" (adaptive step). The
+            events and the adjoint method require a solver of torchdiffeq.
+        rtol
+            Relative tolerance of the adaptive solvers.
+        atol
+            Absolute tolerance of the adaptive solvers.
+        events
+            Events that stop the simulation, for example `GroundHit` or
+            `Collision`.
+        adjoint
+            If True, gradients are computed with the adjoint method
+            (`torchdiffeq.odeint_adjoint`): the memory used for
+            backpropagation does not grow with the number of steps. The
+            parameters of the objects and the tensor parameters of the forces
+            (for example `Drag.density`) receive gradients.
+        cache
+            Cache of trajectories. Objects whose inputs (initial state,
+            parameters, forces and time grid) are cached are not simulated
+            again. Objects that require gradients are always simulated.
+            Ignored if events are given.
+        profile
+            If True, the simulation is instrumented: evaluations of the
+            right-hand side and of the forces are counted and timed, and
+            wrapped in `torch.profiler.record_function` ranges.
+
+        Returns
+        -------
+        SimulationReport
+            The report of the instrumentation, if `profile` is True.
+        """
+        if profile:
+            with Profiler() as profiler:
+                self.simulate(
+                    stop_time=stop_time,
+                    n_steps=n_steps,
+                    compiled=compiled,
+                    method=method,
+                    rtol=rtol,
+                    atol=atol,
+                    events=events,
+                    adjoint=adjoint,
+                    cache=cache,
+                )
+            return profiler.report()
+
+        self._event = None
+        self._event_time = None
+
+        if not events:
+            time = self._time_grid(stop_time, n_steps)
+            options = self._options()
+            objects, keys = self._cached(
+                cache, time, method=method, rtol=rtol, atol=atol,
+                compiled=compiled, dtype=options["dtype"],
+                device=torch.device(options["device"]),
+            )
+            if objects:
+                system = self._system(objects, compiled)
+                states = system.simulate(
+                    time, method=method, rtol=rtol, atol=atol, adjoint=adjoint
+                )
+                system.scatter(states)
+                for obj in objects:
+                    if id(obj) in keys:
+                        cache.put(keys[id(obj)], obj.states)
+            self._time = time
+            return
+
+        system = self._system(self.objects, compiled)
+
+        index = self._index()
+        t0 = system.initial_state.new_zeros(())
+
+        def event_values(t, state):
+            return torch.stack(
+                [event(t, state, index) for event in events] + [stop_time - t]
+            )
+
+        def event_fn(t, state):
+            # Events are ignored at the initial time, so that an object
+            # launched from the ground does not trigger a ground hit
+            return torch.where(
+                t > t0, event_values(t, state).min(), torch.ones_like(t)
+            )
+
+        event_time, event_state = system.simulate_until_event(
+            event_fn,
+            t0,
+            method=method,
+            rtol=rtol,
+            atol=atol,
+            step_size=stop_time / max(n_steps - 1, 1),
+            adjoint=adjoint,
+        )
+
+        fired = int(torch.argmin(event_values(event_time, event_state)))
+        if fired < len(events):
+            self._event = events[fired]
+        self._event_time = event_time
+
+        time = self._time_grid(event_time.item(), n_steps)
+        states = system.simulate(
+            time, method=method, rtol=rtol, atol=atol, adjoint=adjoint
+        )
+        states = torch.cat([states[:-1], event_state[None]])
+        system.scatter(states)
+        self._time = time
+
+    def _options(self) -> dict:
+        """Dtype and device of the simulations."""
+        dtype, device = self.dtype, self.device
+        if dtype is None:
+            dtype = reduce(torch.promote_types, [
+                obj.initial_state.dtype for obj in self.objects
+            ])
+        if device is None:
+            device = self.objects[0].initial_state.device
+        return dict(dtype=dtype, device=device)
+
+    def _time_grid(self, stop_time: float, n_steps: int) -> torch.Tensor:
+        """Time grid of the simulations.
+
+        The grid is at least in single precision: the reduced precision
+        dtypes cannot represent fine grids of increasing times.
+        """
+        options = self._options()
+        return torch.linspace(
+            0,
+            stop_time,
+            n_steps,
+            dtype=torch.promote_types(options["dtype"], torch.float32),
+            device=options["device"],
+        )
+
+    def _system(
+            self,
+            objects: list[Union[Object, ObjectBatch]],
+            compiled: Optional[Backend],
+            ) -> BatchedSystem:
+        """Batched system of objects, with the dtype and device of the
+        scene."""
+        return BatchedSystem(objects, compiled=compiled, **self._options())
+
+    def _cached(
+            self,
+            cache: Optional[SimulationCache],
+            time: torch.Tensor,
+            **options,
+            ) -> tuple[list[Union[Object, ObjectBatch]], dict]:
+        """Restore the cached trajectories.
+
+        Returns
+        -------
+        tuple
+            The objects that must be simulated, and the cache keys of the
+            cacheable ones (by `id(obj)`).
+        """
+        if cache is None:
+            return self.objects, {}
+
+        objects, keys = [], {}
+        for obj in self.objects:
+            if not cache.cacheable(obj):
+                objects.append(obj)
+                continue
+            keys[id(obj)] = cache.key(obj, time, **options)
+            states = cache.get(keys[id(obj)])
+            if states is None:
+                objects.append(obj)
+            else:
+                obj._set_states(states)
+        return objects, keys
+
+    def stream(
+            self,
+            stop_time: float = 1.0,
+            n_steps: int = 100,
+            chunk_size: int = 1,
+            compiled: Optional[Backend] = None,
+            method: str = "rk4",
+            rtol: float = 1e-7,
+            atol: float = 1e-9,
+            ) -> Iterator[tuple[torch.Tensor, torch.Tensor]]:
+        """Simulate the scene and yield the states chunk by chunk.
+
+        The time grid is the same as in `Scene.simulate`, but the states are
+        integrated and yielded `chunk_size` steps at a time, starting from the
+        last state of the previous chunk. Only one chunk is held in memory,
+        and the consumer can stop the iteration early. The trajectories of
+        the objects are not stored.
+
+        Under `torch.no_grad()`, the memory does not depend on `n_steps`.
+        Otherwise, the chunks stay connected in the autograd graph.
+
+        Parameters
+        ----------
+        stop_time
+            The time at which the simulation stops.
+        n_steps
+            The number of time steps of the simulation.
+        chunk_size
+            The number of time steps per chunk.
+        compiled
+            If "script" or "compile", the forces are lowered into a fused
+            right-hand side.
+        method
+            Integrator, see `Scene.simulate`.
+        rtol
+            Relative tolerance of the adaptive solvers.
+        atol
+            Absolute tolerance of the adaptive solvers.
+
+        Yields
+        ------
+        tuple[torch.Tensor, torch.Tensor]
+            The times of the chunk, of shape `(chunk_size,)`, and the states
+            of all the objects, of shape `(chunk_size, N, 6)`, in the order of
+            `Scene.objects`. The last chunk may be shorter.
+        """
+        time = self._time_grid(stop_time, n_steps)
+        system = self._system(self.objects, compiled)
+
+        state = None
+        for start in range(0, n_steps, chunk_size):
+            stop = min(start + chunk_size, n_steps)
+            if state is None:
+                states = system.simulate(
+                    time[:stop], method=method, rtol=rtol, atol=atol
+                )
+            else:
+                # Integrate from the last state of the previous chunk
+                states = system.simulate(
+                    time[start - 1:stop],
+                    method=method,
+                    rtol=rtol,
+                    atol=atol,
+                    initial_state=state,
+                )[1:]
+            state = states[-1]
+            yield time[start:stop], states
+
+    def closest_approach(
+            self,
+            pairs: Optional[list[tuple[Object, Object]]] = None,
+            ) -> ClosestApproach:
+        """Closest approach between pairs of objects of the scene.
+
+        The positions are interpolated between the time steps of the last
+        simulation (cubic Hermite interpolation of positions and velocities),
+        so that the time and the distance of the closest approach are
+        accurate even with a coarse time grid. Segments that cannot contain
+        the closest approach are discarded with bounding boxes before the
+        refinement.
+
+        Parameters
+        ----------
+        pairs
+            Pairs of objects of the scene (not batches). Default to all pairs
+            of objects, including the objects of the batches.
+
+        Returns
+        -------
+        ClosestApproach
+            Indices of the objects of each pair (rows of the stacked states
+            of the scene), time and distance of their closest approach. The
+            distance is differentiable.
+        """
+        if self._time is None:
+            raise ValueError(
+                "No trajectory found. Please simulate the scene before"
+                " computing closest approaches."
+            )
+
+        if pairs is not None:
+            index = self._index()
+            pairs = torch.tensor(
+                [[index[id(obj1)], index[id(obj2)]] for obj1, obj2 in pairs],
+                dtype=torch.long,
+                device=self._time.device,
+            ).reshape(-1, 2)
+
+        n_steps = len(self._time)
+        states = torch.cat([
+            obj.states.reshape(n_steps, -1, 6) for obj in self.objects
+        ], dim=1)
+        return closest_approach(states, self._time, pairs=pairs)
+
+    def collisions(
+            self,
+            pairs: Optional[list[tuple[Object, Object]]] = None,
+            ) -> ClosestApproach:
+        """Pairs of objects that collide during the last simulation.
+
+        Two objects collide if the distance at their closest approach is less
+        than the sum of their radii (objects without radius are points).
+
+        Parameters
+        ----------
+        pairs
+            Pairs of objects of the scene. Default to all pairs.
+
+        Returns
+        -------
+        ClosestApproach
+            The closest approaches of the colliding pairs.
+        """
+        approach = self.closest_approach(pairs=pairs)
+        radii = torch.cat([
+            torch.as_tensor(
+                getattr(obj, "radius", 0.0),
+                dtype=approach.distance.dtype,
+                device=approach.distance.device,
+            ).reshape(-1).expand(self.n_rows(obj))
+            for obj in self.objects
+        ])
+        hit = approach.distance <= radii[approach.pairs].sum(dim=1)
+        return ClosestApproach(*(value[hit] for value in approach))
+
+    @staticmethod
+    def n_rows(obj: Union[Object, ObjectBatch]) -> int:
+        """Number of rows of an object in the stacked states of the scene.
+
+        Parameters
+        ----------
+        obj
+            An object or a batch of objects.
+
+        Returns
+        -------
+        int
+            1 for an object, the size of the batch for a batch.
+        """
+        return _n_rows(obj)
+
+    def attach_states(self, states: torch.Tensor, time: torch.Tensor) -> None:
+        """Use states simulated elsewhere as the trajectories of the scene.
+
+        The states of the objects are views of `states`, as after
+        `Scene.simulate`, and the event of the last simulation is cleared.
+
+        Parameters
+        ----------
+        states
+            Stacked states of the objects of the scene, in their order, of
+            shape `(n_steps, N, 6)` (see `Scene.n_rows`).
         time
-            The time of the simulation.
+            Times of the states, of shape `(n_steps,)`.
+
+        Raises
+        ------
+        ValueError
+            If the number of rows of the states does not match the objects.
         """
-        time = torch.linspace(0, stop_time, n_steps)
+        n = sum(self.n_rows(obj) for obj in self.objects)
+        if states.shape[1] != n:
+            raise ValueError(
+                f"The states have {states.shape[1]} rows, but the objects of"
+                f" the scene have {n} rows."
+            )
+        _scatter(self.objects, states)
+        self._event = None
+        self._event_time = None
+        self._time = time
 
+    def _index(self) -> dict:
+        """Map `id(obj)` to the row of each object (slice for batches)."""
+        index = {}
+        start = 0
         for obj in self.objects:
-            obj.simulate(time)
+            stop = start + self.n_rows(obj)
+            if isinstance(obj, ObjectBatch):
+                index[id(obj)] = slice(start, stop)
+            else:
+                index[id(obj)] = start
+            start = stop
+        return index
+
+    @property
+    def time(self) -> Optional[torch.Tensor]:
+        """Times of the states of the last simulation, None if the scene has
+        not been simulated.
+
+        Returns
+        -------
+        torch.Tensor
+            The time grid, of shape `(n_steps,)`.
+        """
+        return self._time
+
+    @property
+    def event(self) -> Optional[Event]:
+        """Event that stopped the last simulation, None if no event occurred.
+
+        Returns
+        -------
+        Event
+            The event.
+        """
+        return self._event
+
+    @property
+    def event_time(self) -> Optional[torch.Tensor]:
+        """Time at which the last simulation stopped, if events were given.
+
+        Returns
+        -------
+        torch.Tensor
+            The time of the event, differentiable with respect to the initial
+            states and the parameters of the objects.
+        """
+        return self._event_time
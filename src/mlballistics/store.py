@@ -0,0 +1,323 @@
+"""Memory-mapped storage of simulated trajectories.
+
+A store is a directory containing:
+
+- `states.npy`: the states of the N objects of a scene, of shape
+  `(n_steps, N, 6)`,
+- `time.npy`: the times of the states, of shape `(n_steps,)`,
+- `mass.npy`, `drag_coefficient.npy`, `sectional_area.npy`, `radius.npy`:
+  the parameters of the objects, of shape `(N,)` (the radius is NaN for
+  objects that are not spheres),
+- `metadata.json`: the layout of the scene (type, rows and forces of each
+  object or batch). The forces are stored as the list of the leaf forces of
+  their tree, with their type and their parameters (for example the `g` of
+  a `Gravity`, the density and the drag table of a `Drag`, or the
+  per-object accelerations of a `Thrust`).
+
+The arrays are opened as memory maps: the states are exposed as numpy and
+torch views of the file, and are only read from disk when accessed, so that
+stores larger than the memory can be opened and sliced.
+"""
+import json
+import os
+import warnings
+from typing import Union
+
+import numpy as np
+import torch
+
+from .forces.base_force import _force_config
+from .objects import Object, ObjectBatch
+from .scene import Scene
+
+
+# Parameters of the objects stored as `(N,)` arrays
+PARAMETERS = ("mass", "drag_coefficient", "sectional_area", "radius")
+
+
+def _tensor(array: np.ndarray) -> torch.Tensor:
+    """Torch view of a memory-mapped array.
+
+    Arrays opened in read-only mode give read-only tensors, that must not be
+    modified in-place.
+    """
+    with warnings.catch_warnings():
+        warnings.filterwarnings("ignore", message=".*not writable.*")
+        return torch.from_numpy(array)
+
+
+class TrajectoryStore:
+    """Trajectories of a scene stored in memory-mapped files.
+
+    Parameters
+    ----------
+    path
+        Directory of the store.
+    mode
+        Memory-map mode of the arrays: "r" (read-only), "r+" (read-write) or
+        "c" (copy-on-write: the views are writable but the changes are not
+        saved to disk).
+
+    """
+    def __init__(self, path: str, mode: str = "c") -> None:
+        self._path = path
+        with open(os.path.join(path, "metadata.json")) as file:
+            self._metadata = json.load(file)
+        self._arrays = {
+            name: np.load(
+                os.path.join(path, f"{name}.npy"), mmap_mode=mode
+            )
+            for name in ("states", "time") + PARAMETERS
+        }
+
+    @classmethod
+    def create(
+            cls,
+            path: str,
+            objects: list[Union[Object, ObjectBatch]],
+            n_steps: int,
+            dtype: torch.dtype = torch.float32,
+            ) -> "TrajectoryStore":
+        """Create an empty store for the objects of a scene.
+
+        The states can then be written by chunks with `write`, for example
+        from `Scene.stream`.
+
+        Parameters
+        ----------
+        path
+            Directory of the store.
+        objects
+            The objects of the scene.
+        n_steps
+            Number of time steps.
+        dtype
+            Type of the states.
+
+        Returns
+        -------
+        TrajectoryStore
+            The store, opened in read-write mode.
+        """
+        os.makedirs(path, exist_ok=True)
+        np_dtype = torch.empty(0, dtype=dtype).numpy().dtype
+        n = sum(Scene.n_rows(obj) for obj in objects)
+
+        items = []
+        parameters = {name: [] for name in PARAMETERS}
+        start = 0
+        for obj in objects:
+            stop = start + Scene.n_rows(obj)
+            items.append(dict(
+                type=type(obj).__name__,
+                rows=[start, stop],
+                force=_force_config(obj.force),
+            ))
+            for name in PARAMETERS:
+                value = torch.as_tensor(getattr(obj, name, torch.nan))
+                parameters[name].append(
+                    value.detach().cpu().reshape(-1).expand(stop - start)
+                )
+            start = stop
+
+        for name, values in parameters.items():
+            np.save(
+                os.path.join(path, f"{name}.npy"),
+                torch.cat(values).numpy().astype(np_dtype),
+            )
+        np.lib.format.open_memmap(
+            os.path.join(path, "time.npy"),
+            mode="w+",
+            dtype=np_dtype,
+            shape=(n_steps,),
+        ).flush()
+        np.lib.format.open_memmap(
+            os.path.join(path, "states.npy"),
+            mode="w+",
+            dtype=np_dtype,
+            shape=(n_steps, n, 6),
+        ).flush()
+        with open(os.path.join(path, "metadata.json"), "w") as file:
+            json.dump(
+                dict(n_steps=n_steps, n_objects=n, objects=items),
+                file,
+                indent=2,
+            )
+
+        return cls(path, mode="r+")
+
+    @classmethod
+    def from_scene(cls, path: str, scene: Scene) -> "TrajectoryStore":
+        """Write the last simulation of a scene to a store.
+
+        Parameters
+        ----------
+        path
+            Directory of the store.
+        scene
+            A simulated scene.
+
+        Returns
+        -------
+        TrajectoryStore
+            The store, opened in read-write mode.
+
+        Raises
+        ------
+        ValueError
+            If the scene has not been simulated.
+        """
+        if scene.time is None:
+            raise ValueError(
+                "No trajectory found. Please simulate the scene before"
+                " storing it."
+            )
+
+        n_steps = len(scene.time)
+        store = cls.create(
+            path, scene.objects, n_steps, dtype=scene.time.dtype
+        )
+        store._arrays["time"][:] = scene.time.detach().cpu().numpy()
+        for obj, item in zip(scene.objects, store._metadata["objects"]):
+            start, stop = item["rows"]
+            store._arrays["states"][:, start:stop] = (
+                obj.states.detach().cpu().reshape(n_steps, -1, 6).numpy()
+            )
+        store.flush()
+        return store
+
+    def write(
+            self,
+            start: int,
+            time: torch.Tensor,
+            states: torch.Tensor,
+            ) -> None:
+        """Write a chunk of time steps.
+
+        Parameters
+        ----------
+        start
+            Index of the first time step of the chunk.
+        time
+            Times of the chunk, of shape `(c,)`.
+        states
+            States of the chunk, of shape `(c, N, 6)`.
+        """
+        stop = start + len(time)
+        self._arrays["time"][start:stop] = time.detach().cpu().numpy()
+        self._arrays["states"][start:stop] = states.detach().cpu().numpy()
+
+    def flush(self) -> None:
+        """Write the pending changes to disk."""
+        for array in self._arrays.values():
+            if isinstance(array, np.memmap):
+                array.flush()
+
+    def attach(self, scene: Scene) -> None:
+        """Use the stored states as the trajectories of a scene.
+
+        The states of the objects are views of the store: positions are read
+        from disk only when accessed, for example by `Sphere.actor`.
+
+        Parameters
+        ----------
+        scene
+            A scene with the same layout as the stored one.
+
+        Raises
+        ------
+        ValueError
+            If the objects of the scene do not match the stored objects.
+        """
+        items = self._metadata["objects"]
+        if [Scene.n_rows(obj) for obj in scene.objects] != [
+            item["rows"][1] - item["rows"][0] for item in items
+        ]:
+            raise ValueError(
+                "The objects of the scene do not match the stored objects."
+            )
+        scene.attach_states(self.states, self.time)
+
+    def object_states(self, index: int) -> torch.Tensor:
+        """States of one object, as a view of the store.
+
+        Parameters
+        ----------
+        index
+            Row of the object in the stacked states of the scene.
+
+        Returns
+        -------
+        torch.Tensor
+            The states of the object, of shape `(n_steps, 6)`.
+        """
+        return self.states[:, index]
+
+    def numpy(self, name: str = "states") -> np.ndarray:
+        """Memory-mapped array of the store.
+
+        Parameters
+        ----------
+        name
+            "states", "time" or the name of a parameter.
+
+        Returns
+        -------
+        np.ndarray
+            The array.
+        """
+        return self._arrays[name]
+
+    def __len__(self) -> int:
+        return self._metadata["n_objects"]
+
+    @property
+    def metadata(self) -> dict:
+        """Layout of the stored scene: type, rows and force configuration of
+        the objects."""
+        return self._metadata
+
+    @property
+    def n_steps(self) -> int:
+        """Number of time steps."""
+        return self._metadata["n_steps"]
+
+    @property
+    def states(self) -> torch.Tensor:
+        """States of the objects, of shape `(n_steps, N, 6)`."""
+        return _tensor(self._arrays["states"])
+
+    @property
+    def trajectory(self) -> torch.Tensor:
+        """Positions of the objects, of shape `(n_steps, N, 3)`."""
+        return self.states[..., :3]
+
+    @property
+    def time(self) -> torch.Tensor:
+        """Times of the states, of shape `(n_steps,)`."""
+        return _tensor(self._arrays["time"])
+
+    @property
+    def mass(self) -> torch.Tensor:
+        """Masses of the objects, of shape `(N,)`."""
+        return _tensor(self._arrays["mass"])
+
+    @property
+    def drag_coefficient(self) -> torch.Tensor:
+        """Drag coefficients of the objects, of shape `(N,)`."""
+        return _tensor(self._arrays["drag_coefficient"])
+
+    @property
+    def sectional_area(self) -> torch.Tensor:
+        """Sectional areas of the objects, of shape `(N,)`."""
+        return _tensor(self._arrays["sectional_area"])
+
+    @property
+    def radius(self) -> torch.Tensor:
+        """Radii of the objects (NaN if not a sphere), of shape `(N,)`."""
+        return _tensor(self._arrays["radius"])
+
+    @property
+    def path(self) -> str:
+        """Directory of the store."""
+        return self._path
@@ -3,7 +3,7 @@
 import torch
 
 
-def _ei(n: int, i: int) -> torch.Tensor:
+def _ei(n: int, i: int, dtype=None, device=None) -> torch.Tensor:
     """Vector of the standard basis of R^n.
 
     Parameters
@@ -12,6 +12,10 @@ def _ei(n: int, i: int) -> torch.Tensor:
         Dimension of the vector space.
     i
         Index of the basis vector.
+    dtype
+        Data type of the vector. Default to the default dtype of torch.
+    device
+        Device of the vector.
 
     Returns
     -------
@@ -19,4 +23,127 @@ def _ei(n: int, i: int) -> torch.Tensor:
         Vector of the standard basis of R^n.
 
     """
-    return torch.eye(n, dtype=torch.float)[i]
+    e = torch.zeros(n, dtype=dtype, device=device)
+    e[i] = 1.0
+    return e
+
+
+def _column(value, state=None) -> torch.Tensor:
+    """Parameter as a tensor that broadcasts against `(..., 3)` vectors.
+
+    Parameters
+    ----------
+    value
+        A scalar parameter (float or 0-d tensor) or a tensor of per-object
+        parameters of shape `(...,)`.
+    state
+        The state the parameter is combined with, used to infer the dtype and
+        the device.
+
+    Returns
+    -------
+    torch.Tensor
+        The parameter with a trailing dimension of size 1.
+
+    """
+    if state is None:
+        value = torch.as_tensor(value)
+    else:
+        value = torch.as_tensor(value, dtype=state.dtype, device=state.device)
+    return value.unsqueeze(-1)
+
+
+def _has_rows(value, dim: int = 1) -> bool:
+    """Whether a force parameter has one row per object.
+
+    Parameters
+    ----------
+    value
+        A parameter shared by all the objects, or a tensor with one row per
+        object, with at least `dim` dimensions.
+    dim
+        Number of dimensions of a per-object parameter.
+    """
+    return isinstance(value, torch.Tensor) and value.dim() >= dim
+
+
+def _select_rows(value, index, dim: int = 1):
+    """Rows of a per-object force parameter.
+
+    Parameters
+    ----------
+    value
+        A parameter shared by all the objects, or a tensor with one row per
+        object, with at least `dim` dimensions.
+    index
+        Index of the rows.
+    dim
+        Number of dimensions of a per-object parameter.
+
+    Returns
+    -------
+    The rows of the parameter, or the parameter if it is shared.
+    """
+    if _has_rows(value, dim):
+        return value[index]
+    return value
+
+
+def _serializable(value):
+    """JSON-serializable representation of a force parameter.
+
+    Tensors and arrays are converted to (nested) lists, tables and fields
+    to their configuration.
+    """
+    if isinstance(value, torch.Tensor):
+        return value.detach().cpu().tolist()
+    if hasattr(value, "_config"):
+        return value._config
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    return value
+
+
+def _hashable(value):
+    """Hashable representation of a force parameter.
+
+    Tensors are not hashable by value, they are identified by their id.
+    """
+    if isinstance(value, torch.Tensor):
+        return ("tensor", id(value))
+    return value
+
+
+def _constant_acceleration_states(
+        time: torch.Tensor,
+        initial_state: torch.Tensor,
+        acceleration: torch.Tensor,
+        ) -> torch.Tensor:
+    """Exact states of objects under a constant acceleration.
+
+    Parameters
+    ----------
+    time
+        Times at which the states are evaluated, of shape `(n_steps,)`. The
+        initial state is the state at `time[0]`.
+    initial_state
+        Initial states of the objects, of shape `(..., 6)`.
+    acceleration
+        Accelerations of the objects, broadcastable to `(..., 3)`.
+
+    Returns
+    -------
+    torch.Tensor
+        States of the objects, of shape `(n_steps, ..., 6)`.
+
+    """
+    t = (time - time[0]).to(initial_state)
+    t = t.reshape((-1,) + (1,) * initial_state.dim())
+    position = initial_state[..., :3]
+    velocity = initial_state[..., 3:6]
+    return torch.cat([
+        position + velocity * t + 0.5 * acceleration * t ** 2,
+        velocity + acceleration * t,
+        ],
+        dim=-1,
+    )
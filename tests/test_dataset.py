@@ -0,0 +1,108 @@
+"""Tests for the dataset generator."""
+import os
+
+import numpy as np
+import pytest
+import torch
+
+from mlballistics.dataset import generate_dataset, load_dataset, sample_targets
+from mlballistics.forces import Drag, Gravity
+from mlballistics.objects import Sphere
+from mlballistics.scene import Scene, simulate_parallel
+
+
+@pytest.mark.parametrize(
+    "scenario", ["constant_speed", "acceleration", "oscillation"]
+)
+def test_sample_targets(scenario):
+    """Test that the targets follow the scenario."""
+    generator = torch.Generator().manual_seed(0)
+    targets = sample_targets(8, scenario=scenario, generator=generator)
+    assert len(targets) == 8
+    assert targets.initial_state.shape == (8, 6)
+
+    with pytest.raises(ValueError):
+        sample_targets(8, scenario="unknown")
+
+
+@pytest.mark.parametrize("scenario", ["acceleration", "oscillation"])
+def test_slice_targets(scenario):
+    """Test that slices and shards of targets keep their own forces."""
+    generator = torch.Generator().manual_seed(0)
+    targets = sample_targets(6, scenario=scenario, generator=generator)
+    Scene([targets]).simulate(stop_time=1.0, n_steps=11)
+
+    subset = targets[1:3]
+    Scene([subset]).simulate(stop_time=1.0, n_steps=11)
+    assert torch.allclose(subset.states, targets.states[:, 1:3])
+    target = targets[4]
+    Scene([target]).simulate(stop_time=1.0, n_steps=11)
+    assert torch.allclose(target.states, targets.states[:, 4])
+
+    states = simulate_parallel(
+        Scene([targets]), stop_time=1.0, n_steps=11, n_workers=2
+    )
+    assert torch.allclose(states, targets.states, atol=1e-5)
+
+
+def test_generate_dataset(tmp_path):
+    """Test the generation of a dataset and its resumption."""
+    directory = str(tmp_path / "dataset")
+    paths = generate_dataset(
+        directory, n_samples=10, shard_size=4, scenario="acceleration",
+        n_workers=0,
+    )
+    assert len(paths) == 3
+    dataset = load_dataset(directory)
+    assert dataset["target_state"].shape == (10, 6)
+    assert dataset["velocity"].shape == (10, 3)
+    assert np.all(dataset["miss_distance"] < 1e-3)
+    assert dataset["scenario"] == "acceleration"
+    assert dataset["acceleration"].shape == (10, 3)
+
+    # Only the missing shard is generated again
+    os.remove(paths[1])
+    modified = os.path.getmtime(paths[0])
+    generate_dataset(
+        directory, n_samples=10, shard_size=4, scenario="acceleration",
+        n_workers=0,
+    )
+    assert os.path.getmtime(paths[0]) == modified
+    resumed = load_dataset(directory)
+    assert np.allclose(resumed["velocity"], dataset["velocity"])
+
+    with pytest.raises(ValueError):
+        generate_dataset(directory, n_samples=10, shard_size=5, n_workers=0)
+
+    # The parameters of the targets are stored with the samples
+    directory = str(tmp_path / "oscillation")
+    generate_dataset(
+        directory, n_samples=4, shard_size=2, scenario="oscillation",
+        n_workers=0,
+    )
+    dataset = load_dataset(directory)
+    assert dataset["scenario"] == "oscillation"
+    assert np.allclose(dataset["altitude"], dataset["target_state"][:, 2])
+    assert dataset["frequency"].shape == (4,)
+
+
+def test_generate_dataset_missile(tmp_path):
+    """Test a dataset generated with a custom missile."""
+    directory = str(tmp_path / "dataset")
+    missile = Sphere(radius=0.1, force=Gravity() + Drag(density=1.2))
+    generate_dataset(
+        directory, n_samples=4, shard_size=2, missile=missile, n_workers=2
+    )
+    assert load_dataset(directory)["velocity"].shape == (4, 3)
+
+    # Resuming with the same force is accepted, with another one is not
+    missile = Sphere(radius=0.1, force=Gravity() + Drag(density=1.2))
+    generate_dataset(
+        directory, n_samples=4, shard_size=2, missile=missile, n_workers=0
+    )
+    missile.force = Gravity() + Drag(density=1.0)
+    with pytest.raises(ValueError):
+        generate_dataset(
+            directory, n_samples=4, shard_size=2, missile=missile,
+            n_workers=0,
+        )
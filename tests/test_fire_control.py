@@ -0,0 +1,35 @@
+"""Tests for the fire-control solver."""
+
+import torch
+
+from mlballistics.fire_control import solve_launch_velocities
+from mlballistics.forces import Drag, Gravity
+from mlballistics.objects import Sphere
+from mlballistics.scene import Scene
+
+
+def test_solve_launch_velocities():
+    """Test that the solutions hit the targets."""
+    torch.manual_seed(0)
+    missile = Sphere(radius=0.1, mass=1.0, force=Gravity() + Drag())
+    targets = [
+        Sphere(
+            radius=0.1,
+            initial_position=torch.tensor([10.0, 0, 5.0]) + 5 * torch.rand(3),
+            initial_velocity=torch.randn(3),
+            force=force,
+        )
+        for force in [None, Gravity(), None, Drag()]
+    ]
+
+    solution = solve_launch_velocities(missile, targets, max_speed=30)
+    assert solution.velocity.shape == (4, 3)
+    assert torch.all(solution.miss_distance < 1e-3)
+    assert torch.all(torch.norm(solution.velocity, dim=1) <= 30 + 1e-4)
+
+    # Check the first solution with a simulation of the scene
+    missile.initial_velocity = solution.velocity[0]
+    scene = Scene(objects=[missile, targets[0]])
+    scene.simulate(stop_time=solution.time[0].item(), n_steps=101)
+    miss = missile.trajectory[-1] - targets[0].trajectory[-1]
+    assert torch.norm(miss) < 1e-3
@@ -0,0 +1,46 @@
+"""Tests for the firing tables."""
+import torch
+
+from mlballistics.firing_table import FiringTable
+from mlballistics.forces import Drag, Gravity
+from mlballistics.objects import Sphere
+from mlballistics.scene import Scene
+
+
+def test_firing_table(tmp_path):
+    """Test that the velocities of the table reach the queried points."""
+    missile = Sphere(radius=0.1, mass=1.0, force=Gravity() + Drag())
+    table = FiringTable.build(
+        missile,
+        range_bounds=(5.0, 15.0),
+        altitude_bounds=(0.0, 10.0),
+        shape=(6, 6),
+        n_speeds=32,
+        n_angles=32,
+        stop_time=2.0,
+        n_steps=100,
+    )
+    assert not table.time.isnan().any()
+
+    points = torch.tensor([[9.0, 3.0, 5.0], [13.0, 0.0, 4.0], [50.0, 0, 0]])
+    query = table(points)
+    assert query.velocity.shape == (3, 3)
+    assert query.time[2].isnan()
+
+    # Interpolation between nodes gives a small miss
+    for i in range(2):
+        shot = Sphere(
+            radius=0.1,
+            mass=1.0,
+            initial_velocity=query.velocity[i],
+            force=Gravity() + Drag(),
+        )
+        Scene([shot]).simulate(stop_time=query.time[i].item(), n_steps=100)
+        assert torch.norm(shot.trajectory[-1] - points[i]) < 0.2
+
+    path = str(tmp_path / "table.npz")
+    table.save(path)
+    loaded = FiringTable.load(path)
+    assert torch.allclose(
+        loaded(points).velocity, query.velocity, equal_nan=True
+    )
@@ -1,10 +1,15 @@
 """Tests for the forces module."""
 
+import pytest
 import torch
 from typing import Literal
 
-from mlballistics.forces import Drag, Gravity, NullForce
+from mlballistics.forces import (
+    Drag, Gravity, NullForce, Oscillation, Thrust, Wind, GridField, G1, G7,
+    DragTable, exponential_atmosphere,
+)
 from mlballistics.objects import Sphere
+from mlballistics.scene import Scene
 
 
 def _test_dependency(
@@ -229,3 +234,233 @@ def test_sum_forces() -> None:
         ball.forces_vector(),
         ball_g.forces_vector() + ball_d.forces_vector()
     )
+
+
+def test_batched_forces() -> None:
+    """Test that forces evaluated on a batch match per-state evaluations."""
+    n = 5
+    masses = torch.rand(n) + 0.5
+    radii = torch.rand(n) + 0.1
+    states = torch.rand(n, 6)
+
+    balls = [
+        Sphere(
+            mass=masses[i].item(),
+            radius=radii[i].item(),
+            initial_position=states[i, :3],
+            initial_velocity=states[i, 3:],
+        )
+        for i in range(n)
+    ]
+
+    class Parameters:
+        mass = masses
+        drag_coefficient = torch.tensor([b.drag_coefficient for b in balls])
+        sectional_area = torch.tensor([b.sectional_area for b in balls])
+
+    for force in [NullForce(), Gravity(), Drag(), Gravity() + Drag()]:
+        batched = force(states, Parameters)
+        assert batched.shape == (n, 3)
+        for i, ball in enumerate(balls):
+            ball.force = force
+            assert torch.allclose(batched[i], ball.forces_vector(), atol=1e-6)
+
+
+def test_force_keys() -> None:
+    """Test that identical force trees share the same key."""
+    assert (Gravity() + Drag())._key == (Gravity() + Drag())._key
+    assert Gravity()._key != Gravity(g=1.0)._key
+    assert Drag()._key != Drag(density=2.0)._key
+
+
+def test_constant_force_cache() -> None:
+    """Test the cache of constant forces and its invalidation."""
+    gravity = Gravity()
+    ball = Sphere(mass=2.0, radius=0.5, force=gravity)
+
+    assert gravity.is_constant
+    assert NullForce().is_constant
+    assert (NullForce() + Gravity()).is_constant
+    assert not (Gravity() + Drag()).is_constant
+
+    # The force vector is computed once and reused
+    assert ball.forces_vector() is ball.forces_vector()
+
+    gravity.g = 1.0
+    assert torch.allclose(ball.forces_vector(), torch.tensor([0, 0, -2.0]))
+
+    ball.mass = 3.0
+    assert torch.allclose(ball.forces_vector(), torch.tensor([0, 0, -3.0]))
+
+    ball.force = None
+    assert torch.allclose(ball.forces_vector(), torch.zeros(3))
+
+    # Forces that require gradients are not cached
+    ball.force = gravity
+    ball.mass = torch.tensor(1.0, requires_grad=True)
+    assert ball.forces_vector() is not ball.forces_vector()
+
+
+def test_thrust_and_oscillation() -> None:
+    """Test the thrust and oscillation forces on a batch of objects."""
+    state = torch.tensor([[0, 0, 1.0, 0, 0, 0], [0, 0, 3.0, 0, 0, 0]])
+    ball = Sphere(mass=2.0)
+    acceleration = torch.tensor([[1.0, 0, 0], [0, 1.0, 0]])
+    assert torch.allclose(
+        Thrust(acceleration)(state, ball), 2 * acceleration
+    )
+
+    oscillation = Oscillation(
+        altitude=torch.tensor([0.0, 1.0]), frequency=torch.tensor([1.0, 2.0])
+    )
+    expected = torch.tensor([[0, 0, -2.0], [0, 0, -16.0]])
+    assert torch.allclose(oscillation(state, ball), expected)
+
+
+def test_grid_field() -> None:
+    """Test the trilinear interpolation of fields sampled on grids."""
+    # Trilinear interpolation is exact for affine fields
+    def affine(x):
+        return torch.stack([
+            1 + 2 * x[..., 0] - x[..., 1] + 0.5 * x[..., 2],
+            x[..., 2] - 3.0,
+        ], dim=-1)
+
+    bounds = ((0, 1), (-1, 2), (0, 4))
+    field = GridField.from_function(affine, bounds, shape=(5, 7, 9))
+    positions = torch.rand(100, 3) * torch.tensor([1, 3, 4.0])
+    positions -= torch.tensor([0, 1, 0.0])
+    positions.requires_grad_(True)
+    values = field(positions)
+    assert values.shape == (100, 2)
+    assert torch.allclose(values, affine(positions), atol=1e-5)
+
+    # Differentiable with respect to the positions
+    values[:, 0].sum().backward()
+    assert torch.allclose(positions.grad, torch.tensor([2, -1, 0.5]))
+
+    # Constant outside the grid
+    outside = torch.tensor([[-1.0, 5.0, 10.0]])
+    assert torch.allclose(field(outside), affine(torch.tensor([0, 2, 4.0])))
+
+    # Scalar fields varying along a single axis
+    atmosphere = exponential_atmosphere((0, 1000), n_points=101)
+    z = torch.tensor([[3.0, -2.0, 0.0], [0.0, 0.0, 500.0]])
+    assert atmosphere(z).shape == (2,)
+    assert torch.allclose(
+        atmosphere(z),
+        1.168 * torch.exp(-z[:, 2] / 8500), rtol=1e-5,
+    )
+
+    # Non-finite positions give NaN values instead of failing
+    invalid = torch.tensor([[float("nan"), 0, 1], [0, float("inf"), 1]])
+    assert torch.isnan(field(invalid)[0]).all()
+    assert torch.isfinite(field(invalid)[1]).all()
+
+    with pytest.raises(ValueError):
+        GridField(torch.zeros(2, 2, 2), ((0, 1), (1, 1), (0, 1)))
+
+
+def test_wind() -> None:
+    """Test the drag in moving air against the drag in still air."""
+    states = torch.rand(10, 6)
+    ball = Sphere(radius=0.1)
+
+    still = Wind(torch.zeros(3), density=2.0)
+    assert torch.allclose(still(states, ball), Drag(density=2.0)(states, ball))
+
+    # A uniform wind is the drag of the relative velocity
+    wind = torch.tensor([1.0, -2.0, 0.5])
+    uniform = GridField(wind.expand(2, 2, 2, 3), ((0, 1),) * 3)
+    relative = states - torch.cat([torch.zeros(3), wind])
+    expected = Drag()(relative, ball)
+    assert torch.allclose(Wind(wind)(states, ball), expected)
+    assert torch.allclose(Wind(uniform)(states, ball), expected)
+
+    # The density is interpolated at the positions of the objects
+    high = states + torch.tensor([0, 0, 8500.0, 0, 0, 0])
+    atmosphere = exponential_atmosphere((0, 10000), density=1.0)
+    assert torch.allclose(
+        Wind(torch.zeros(3), density=atmosphere)(high, ball),
+        Drag(density=1.0)(high, ball) * torch.exp(-(high[:, 2:3]) / 8500),
+        rtol=1e-4,
+    )
+    assert Wind(uniform)._key != Wind(wind)._key
+
+    # Sequences are converted to tensors, so that the force can be hashed
+    listed = Wind([1.0, -2.0, 0.5], density=[2.0])
+    assert isinstance(listed.wind, torch.Tensor)
+    assert hash(listed._key)
+    assert torch.allclose(
+        listed(states, ball), Wind(wind, density=2.0)(states, ball)
+    )
+
+
+def test_drag_tables() -> None:
+    """Test the Mach-dependent drag coefficients."""
+    # Subsonic, transonic (at a node and between two nodes), supersonic, and
+    # constant outside the table
+    mach = torch.tensor([0.5, 1.0, 0.9625, 2.0, 2.025, -1.0, 10.0])
+    assert torch.allclose(G7(mach), torch.tensor(
+        [0.1194, 0.3803, 0.25235, 0.2980, 0.29655, 0.1198, 0.1618]
+    ))
+    assert torch.allclose(
+        G1(torch.tensor([0.5, 1.0, 3.0])),
+        torch.tensor([0.2032, 0.4805, 0.5133]),
+    )
+    table = DragTable([0.0, 1.0, 2.0], [1.0, 3.0, 2.0], step=0.1)
+    assert torch.allclose(table(torch.tensor([0.5, 1.5])), torch.tensor(
+        [2.0, 2.5]
+    ))
+
+    # Drag at Mach 2 of a projectile of form factor 0.5, the drag
+    # coefficient of the object is not used
+    ball = Sphere(radius=0.01, mass=0.01)
+    states = torch.tensor([[0.0, 0, 0, 686.0, 0, 0]], dtype=torch.float64)
+    drag = Drag(drag_table=G7, form_factor=0.5)
+    expected = -0.5 * 0.2980 * ball.sectional_area / 2 * 686.0 ** 2
+    assert torch.allclose(drag(states, ball)[0, 0], torch.tensor(
+        expected, dtype=torch.float64
+    ))
+    assert torch.allclose(drag(states, ball)[0, 1:], torch.zeros(2).double())
+
+    # Differentiable with respect to the velocity
+    states = torch.rand(100, 6) * 1000
+    states.requires_grad_(True)
+    Drag(drag_table=G1)(states, ball).sum().backward()
+    assert torch.isfinite(states.grad).all()
+
+    # Tables are keyed by value
+    assert Drag(drag_table=G1)._key != Drag(drag_table=G7)._key
+    copy = DragTable(G1.mach, G1.drag_coefficient)
+    assert Drag(drag_table=copy)._key == Drag(drag_table=G1)._key
+    speed_of_sound = torch.tensor(340.0)
+    drag = Drag(drag_table=G1, speed_of_sound=speed_of_sound)
+    assert drag.parameters() == [speed_of_sound]
+
+
+def test_drag_table_simulation() -> None:
+    """Test simulations with a drag table."""
+    # A constant table is the drag with a constant drag coefficient
+    constant = DragTable([0.0, 5.0], [0.47, 0.47])
+    velocity = torch.tensor([400.0, 0, 100.0])
+    ball = Sphere(
+        radius=0.01,
+        initial_velocity=velocity,
+        force=Gravity() + Drag(drag_table=constant, form_factor=1.0),
+    )
+    reference = Sphere(
+        radius=0.01, initial_velocity=velocity, force=Gravity() + Drag()
+    )
+    scene = Scene([ball, reference])
+    scene.simulate(stop_time=2.0, n_steps=201)
+    assert torch.allclose(ball.states, reference.states)
+
+    # Diverging states propagate as NaN instead of failing in the lookup
+    ball = Sphere(
+        radius=1.0,
+        initial_velocity=torch.tensor([400.0, 0, 0]),
+        force=Drag(drag_table=G7),
+    )
+    Scene([ball]).simulate(stop_time=1.0, n_steps=11)
+    assert torch.isnan(ball.states[-1]).all()
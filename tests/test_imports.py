@@ -0,0 +1,15 @@
+import subprocess
+import sys
+
+
+def test_lazy_imports():
+    """Test that pyvista and torchdiffeq are only imported when used."""
+    code = (
+        "import sys\n"
+        "import mlballistics.forces, mlballistics.objects\n"
+        "import mlballistics.scene\n"
+        "import mlballistics.fire_control\n"
+        "assert 'pyvista' not in sys.modules\n"
+        "assert 'torchdiffeq' not in sys.modules\n"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True)
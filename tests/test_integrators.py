@@ -0,0 +1,89 @@
+import pytest
+import torch
+
+from mlballistics.forces import Drag, Gravity, Oscillation
+from mlballistics.integrators import INTEGRATORS, register_integrator, solve
+from mlballistics.objects import Sphere, SphereBatch
+from mlballistics.scene import Scene
+
+
+def _energy(states: torch.Tensor, frequency: float) -> torch.Tensor:
+    """Energy per unit mass of harmonic oscillators."""
+    z, vz = states[..., 2], states[..., 5]
+    return 0.5 * vz ** 2 + 0.5 * frequency ** 2 * z ** 2
+
+
+@pytest.mark.parametrize("method", ["verlet", "leapfrog", "symplectic_euler"])
+def test_symplectic_integrators(method):
+    """Test that the energy of an oscillator does not drift."""
+    batch = SphereBatch(
+        initial_position=torch.tensor([[0.0, 0, 1.0], [0.0, 0, -2.0]]),
+        initial_velocity=torch.zeros(2, 3),
+        force=Oscillation(frequency=2.0),
+    )
+    scene = Scene([batch], dtype=torch.float64)
+
+    # One evaluation of the forces per step instead of four for rk4
+    report = scene.simulate(
+        stop_time=100.0, n_steps=1001, method=method, profile=True
+    )
+    assert report.rhs_evaluations in (1000, 1001)
+
+    energy = _energy(batch.states, frequency=2.0)
+    assert torch.allclose(energy, energy[0], rtol=0.25)
+    assert torch.allclose(energy[-100:].mean(0), energy[0], rtol=0.05)
+
+
+def test_verlet_accuracy():
+    """Test velocity Verlet against the exact and the rk4 trajectories."""
+    velocity = torch.tensor([5.0, 0, 10.0], requires_grad=True)
+    ball = Sphere(
+        radius=0.1, initial_velocity=velocity, force=Gravity() + Drag()
+    )
+    time = torch.linspace(0, 2, 201)
+
+    ball.simulate(time, method="verlet")
+    verlet = ball.states
+    ball.simulate(time)
+    assert torch.allclose(verlet, ball.states, atol=1e-3)
+
+    # Gradients flow through the integrator
+    verlet[-1, 0].backward()
+    assert velocity.grad is not None
+
+    # Velocity Verlet is exact under a constant acceleration
+    scene = Scene([Sphere(force=Gravity() + Oscillation(frequency=0.0))])
+    scene.simulate(stop_time=1.0, n_steps=11, method="verlet")
+    assert torch.allclose(
+        scene.objects[0].trajectory[-1], torch.tensor([0.0, 0, -4.905])
+    )
+
+
+def test_integrator_registry():
+    """Test custom integrators and the errors of the registry."""
+    @register_integrator("test_euler")
+    def explicit_euler(func, y0, t):
+        states = [y0]
+        for t0, t1 in zip(t[:-1], t[1:]):
+            states.append(states[-1] + (t1 - t0) * func(t0, states[-1]))
+        return torch.stack(states)
+
+    try:
+        batch = SphereBatch(
+            initial_position=torch.rand(4, 3),
+            initial_velocity=torch.rand(4, 3),
+            force=Gravity() + Drag(),
+        )
+        scene = Scene([batch])
+        scene.simulate(stop_time=1.0, n_steps=101, method="test_euler")
+        euler = batch.states
+        scene.simulate(stop_time=1.0, n_steps=101, method="euler")
+        assert torch.allclose(euler, batch.states)
+
+        with pytest.raises(ValueError):
+            scene.simulate(method="test_euler", adjoint=True)
+        with pytest.raises(ValueError):
+            solve(lambda t, y: y, torch.ones(6), torch.linspace(0, 1, 3),
+                  method="verlet", adjoint=True)
+    finally:
+        del INTEGRATORS["test_euler"]
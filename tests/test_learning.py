@@ -0,0 +1,37 @@
+"""Tests for the learning module."""
+import torch
+
+from mlballistics.dataset import sample_targets
+from mlballistics.forces import Drag, Gravity
+from mlballistics.learning import LaunchVelocityMLP, SurrogateTrainer
+from mlballistics.objects import Sphere
+
+
+def test_surrogate_training(tmp_path):
+    """Test that training reduces the miss distance and can be resumed."""
+    torch.manual_seed(0)
+    missile = Sphere(radius=0.1, mass=1.0, force=Gravity() + Drag())
+    targets = sample_targets(
+        256, generator=torch.Generator().manual_seed(0)
+    ).initial_state
+    checkpoint = str(tmp_path / "checkpoint.pt")
+
+    model = LaunchVelocityMLP(max_speed=30.0)
+    trainer = SurrogateTrainer(
+        model, missile, batch_size=64, lr=3e-3, checkpoint=checkpoint
+    )
+    history = trainer.fit(targets, n_epochs=3)
+    assert len(history) == 3
+    assert history[-1] < history[0]
+
+    # A new trainer resumes from the checkpoint
+    resumed = SurrogateTrainer(
+        LaunchVelocityMLP(max_speed=30.0), missile, checkpoint=checkpoint
+    )
+    assert resumed.epoch == 3
+    assert resumed.fit(targets, n_epochs=4)[:3] == history
+
+    velocity = model.predict(targets)
+    assert velocity.shape == (256, 3)
+    assert not velocity.requires_grad
+    assert torch.all(torch.norm(velocity, dim=1) <= 30.0 + 1e-4)
@@ -14,3 +14,53 @@ def test_sphere():
     sphere.radius = 2
     assert sphere.radius == 2
     assert sphere.sectional_area == 4 * torch.pi * 2 ** 2
+
+
+def test_sphere_batch():
+    """Test the construction, indexing and slicing of batches."""
+    import pytest
+    from mlballistics.objects import ObjectBatch, SphereBatch
+    from mlballistics.forces import Gravity
+    from mlballistics.scene import Scene
+
+    n = 4
+    radius = torch.rand(n) + 0.1
+    batch = SphereBatch(
+        radius=radius,
+        mass=2.0,
+        initial_position=torch.rand(n, 3),
+        force=Gravity(),
+    )
+
+    assert len(batch) == n
+    assert batch.mass.shape == (n,)
+    assert batch.initial_state.shape == (n, 6)
+    assert torch.allclose(batch.initial_velocity, torch.zeros(n, 3))
+    assert torch.allclose(batch.sectional_area, 4 * torch.pi * radius ** 2)
+
+    sphere = batch[1]
+    assert isinstance(sphere, Sphere)
+    assert torch.allclose(sphere.initial_state, batch.initial_state[1])
+    assert torch.allclose(torch.as_tensor(sphere.radius), radius[1])
+
+    sub_batch = batch[1:3]
+    assert isinstance(sub_batch, SphereBatch)
+    assert torch.allclose(sub_batch.radius, radius[1:3])
+    assert len(batch[torch.tensor([True, False, True, True])]) == 3
+
+    with pytest.raises(IndexError):
+        batch[n]
+
+    # The simulated states are indexed with the objects
+    assert batch[0].states is None
+    Scene([batch]).simulate(stop_time=1.0, n_steps=11)
+    assert torch.equal(batch[2].states, batch.states[:, 2])
+    assert torch.equal(batch[-1].trajectory, batch.trajectory[:, -1])
+    assert torch.equal(batch[1:3].states, batch.states[:, 1:3])
+
+    rebuilt = SphereBatch.from_objects([batch[i] for i in range(n)])
+    assert torch.allclose(rebuilt.initial_state, batch.initial_state)
+    assert torch.allclose(rebuilt.radius, radius)
+
+    with pytest.raises(ValueError, match="number of objects"):
+        ObjectBatch(mass=1.0)
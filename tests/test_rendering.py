@@ -0,0 +1,37 @@
+"""Tests for the rendering module."""
+import pytest
+import torch
+
+from mlballistics.forces import Gravity
+from mlballistics.objects import Sphere, SphereBatch
+from mlballistics.rendering import render
+from mlballistics.scene import Scene
+
+imageio = pytest.importorskip("imageio")
+
+
+@pytest.mark.parametrize("n_workers", [0, 2])
+def test_render(tmp_path, n_workers):
+    """Test that all the frames are rendered and stitched in order."""
+    batch = SphereBatch(
+        radius=0.05,
+        initial_position=torch.rand(20, 3),
+        initial_velocity=torch.rand(20, 3),
+        force=Gravity(),
+    )
+    ball = Sphere(radius=0.2, initial_velocity=torch.tensor([3.0, 0, 5.0]))
+    with pytest.raises(ValueError):
+        render([ball], str(tmp_path / "none.gif"))
+
+    Scene([batch, ball]).simulate(stop_time=1.0, n_steps=6)
+    path = render(
+        [batch, ball],
+        str(tmp_path / "scene.gif"),
+        window_size=(64, 48),
+        n_workers=n_workers,
+        chunk_size=2,
+    )
+    frames = imageio.mimread(path)
+    assert len(frames) == 6
+    assert frames[0].shape[:2] == (48, 64)
+    assert (frames[0] != frames[-1]).any()
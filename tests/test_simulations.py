@@ -2,9 +2,11 @@ import torch
 import pyvista as pv
 import pytest
 
-from mlballistics.objects import Sphere
-from mlballistics.forces import Gravity, Drag
-from mlballistics.scene import Scene
+from mlballistics.objects import Sphere, SphereBatch
+from mlballistics.forces import Gravity, Drag, Oscillation, Thrust
+from mlballistics.scene import (
+    Scene, GroundHit, Collision, SimulationCache, simulate_parallel
+)
 
 
 def test_basic_simulation():
@@ -95,3 +97,504 @@ def test_actors():
         missile.actor(time=1, color='red', opacity=0.5),
         pv.plotting.Actor,
     )
+
+
+def test_batched_simulation_matches_individual():
+    """Test that the batched scene matches per-object simulations."""
+    forces = [None, Gravity(), Gravity() + Drag()]
+    objects = [
+        Sphere(
+            radius=0.05 * (i + 1),
+            mass=1.0 + i,
+            initial_position=torch.rand(3),
+            initial_velocity=torch.rand(3),
+            force=force,
+        )
+        for i, force in enumerate(forces)
+    ]
+
+    scene = Scene(objects=objects)
+    scene.simulate(stop_time=1.0, n_steps=50)
+
+    time = torch.linspace(0, 1.0, 50)
+    for obj in objects:
+        batched_trajectory = obj.trajectory
+        obj.simulate(time)
+        assert torch.allclose(batched_trajectory, obj.trajectory, atol=1e-6)
+
+
+def test_batched_simulation_gradient():
+    """Test that gradients flow through the batched simulation."""
+    initial_velocity = torch.tensor([1.0, 0.0, 1.0], requires_grad=True)
+    missile = Sphere(
+        radius=0.05,
+        mass=1.0,
+        initial_velocity=initial_velocity,
+        force=Gravity() + Drag(),
+    )
+    target = Sphere(radius=0.05, initial_position=torch.ones(3))
+
+    scene = Scene(objects=[missile, target])
+    scene.simulate(stop_time=1.0, n_steps=20)
+
+    loss = torch.norm(missile.trajectory - target.trajectory, dim=1).min()
+    loss.backward()
+    assert initial_velocity.grad is not None
+
+
+def test_closed_form_constant_forces():
+    """Test the closed-form trajectories of objects under constant forces."""
+    from torchdiffeq import odeint
+
+    initial_velocity = torch.tensor([1.0, 0.5, 2.0], requires_grad=True)
+    missile = Sphere(
+        radius=0.05,
+        mass=2.0,
+        initial_position=torch.tensor([0.0, 1.0, 0.0]),
+        initial_velocity=initial_velocity,
+        force=Gravity() + Gravity(g=1.0),
+    )
+
+    time = torch.linspace(0, 2.0, 30)
+    reference = odeint(
+        missile.ode_func, missile.initial_state, t=time, method="rk4"
+    )
+
+    missile.simulate(time)
+    assert torch.allclose(missile.trajectory, reference[:, :3], atol=1e-5)
+
+    # Mixed scene: constant and non constant forces
+    drag_missile = Sphere(
+        radius=0.05,
+        initial_velocity=torch.tensor([1.0, 0.0, 1.0]),
+        force=Gravity() + Drag(),
+    )
+    scene = Scene(objects=[drag_missile, missile])
+    scene.simulate(stop_time=2.0, n_steps=30)
+    assert torch.allclose(missile.trajectory, reference[:, :3], atol=1e-5)
+
+    missile.trajectory[-1].sum().backward()
+    assert torch.allclose(initial_velocity.grad, torch.full((3,), 2.0))
+
+
+@pytest.mark.filterwarnings("ignore::FutureWarning")
+def test_compiled_simulation():
+    """Test that the fused right-hand side matches the Python forces."""
+    from mlballistics.forces import Force
+
+    objects = [
+        Sphere(
+            radius=0.1,
+            initial_velocity=torch.rand(3),
+            force=force,
+        )
+        for force in [Gravity() + Drag(), Drag(density=2.0), Gravity()]
+    ]
+
+    scene = Scene(objects=objects)
+    scene.simulate(stop_time=1.0, n_steps=50)
+    references = [obj.trajectory for obj in objects]
+
+    scene.simulate(stop_time=1.0, n_steps=50, compiled="script")
+    for obj, reference in zip(objects, references):
+        assert torch.allclose(obj.trajectory, reference, atol=1e-6)
+
+    objects[0].simulate(torch.linspace(0, 1.0, 50), compiled="script")
+    assert torch.allclose(objects[0].trajectory, references[0], atol=1e-6)
+
+    class CustomForce(Force):
+        def __call__(self, state=None, obj=None):
+            return state[..., :3]
+
+    objects[0].force = CustomForce()
+    with pytest.raises(ValueError, match="Cannot use a fused kernel"):
+        scene.simulate(stop_time=1.0, n_steps=50, compiled="script")
+
+
+@pytest.mark.parametrize("method", ["dopri5", "rk4"])
+def test_ground_hit_event(method):
+    """Test the time of a ground hit and its gradient."""
+    vz = torch.tensor(5.0, requires_grad=True)
+    missile = Sphere(
+        radius=0.05,
+        initial_velocity=torch.stack([torch.tensor(1.0), torch.zeros(()), vz]),
+        force=Gravity(),
+    )
+
+    scene = Scene(objects=[missile])
+    scene.simulate(
+        stop_time=5.0, n_steps=50, method=method, events=[GroundHit(missile)]
+    )
+
+    g = 9.81
+    assert isinstance(scene.event, GroundHit)
+    assert torch.allclose(
+        scene.event_time, torch.tensor(2 * 5.0 / g), atol=1e-3
+    )
+    assert missile.trajectory.shape == (50, 3)
+    assert torch.allclose(
+        missile.trajectory[-1, 2], torch.zeros(()), atol=1e-3
+    )
+
+    grad, = torch.autograd.grad(scene.event_time, vz)
+    assert torch.allclose(grad, torch.tensor(2 / g), atol=1e-4)
+
+    # No event before the stop time
+    scene.simulate(
+        stop_time=0.5, n_steps=50, method=method, events=[GroundHit(missile)]
+    )
+    assert scene.event is None
+    assert torch.allclose(scene.event_time, torch.tensor(0.5))
+
+
+def test_collision_event():
+    """Test that a collision stops the simulation."""
+    missile = Sphere(
+        radius=0.1,
+        initial_velocity=torch.tensor([1.0, 0.0, 5.0]),
+        force=Gravity() + Drag(),
+    )
+    target = Sphere(radius=0.1, initial_position=torch.tensor([0.5, 0, 1.2]))
+
+    collision = Collision(missile, target)
+    scene = Scene(objects=[missile, target])
+    scene.simulate(
+        stop_time=5.0,
+        n_steps=20,
+        method="dopri5",
+        events=[GroundHit(missile), collision],
+    )
+
+    assert scene.event is collision
+    distance = torch.norm(missile.trajectory[-1] - target.trajectory[-1])
+    assert torch.allclose(distance, torch.tensor(0.2), atol=1e-4)
+
+
+def test_closest_approach():
+    """Test the closest approach with a coarse time grid."""
+    initial_velocity = torch.tensor([10.0, 0.0, 10.0], requires_grad=True)
+    missile = Sphere(
+        radius=0.1,
+        initial_velocity=initial_velocity,
+        force=Gravity() + Drag(),
+    )
+    target = Sphere(
+        radius=0.1,
+        initial_position=torch.tensor([5.0, 0.3, 3.0]),
+        initial_velocity=torch.tensor([0.0, 0.0, 1.0]),
+    )
+    scene = Scene(objects=[missile, target])
+
+    # Reference with a fine time grid
+    scene.simulate(stop_time=1.5, n_steps=3001)
+    distances = torch.norm(missile.trajectory - target.trajectory, dim=1)
+    reference_distance = distances.min()
+    reference_time = distances.argmin() * 1.5 / 3000
+
+    scene.simulate(stop_time=1.5, n_steps=8)
+    approach = scene.closest_approach()
+    assert approach.pairs.tolist() == [[0, 1]]
+    assert torch.allclose(approach.distance, reference_distance, atol=1e-3)
+    assert torch.allclose(approach.time, reference_time, atol=1e-3)
+
+    approach.distance.sum().backward()
+    assert initial_velocity.grad is not None
+
+    assert len(scene.collisions().pairs) == 0
+    target.radius = 0.25
+    assert scene.collisions().pairs.tolist() == [[0, 1]]
+
+    with pytest.raises(ValueError, match="No trajectory found"):
+        Scene(objects=[missile, target]).closest_approach()
+
+
+def test_adjoint_simulation():
+    """Test that the adjoint method gives the same gradients."""
+
+    def gradients(adjoint):
+        density = torch.tensor(1.2, requires_grad=True)
+        mass = torch.tensor(2.0, requires_grad=True)
+        velocity = torch.tensor([5.0, 0.0, 8.0], requires_grad=True)
+        missile = Sphere(
+            radius=0.1,
+            mass=mass,
+            initial_velocity=velocity,
+            force=Gravity() + Drag(density=density),
+        )
+        target = Sphere(radius=0.1, initial_position=torch.ones(3))
+
+        scene = Scene(objects=[missile, target])
+        scene.simulate(stop_time=1.0, n_steps=100, adjoint=adjoint)
+        loss = torch.norm(missile.trajectory[-1] - target.trajectory[-1])
+
+        missile.simulate(torch.linspace(0, 1.0, 100), adjoint=adjoint)
+        loss = loss + missile.trajectory[-1].sum()
+        loss.backward()
+        return density.grad, mass.grad, velocity.grad
+
+    for reference, adjoint in zip(gradients(False), gradients(True)):
+        assert reference is not None
+        assert torch.allclose(reference, adjoint, atol=1e-4)
+
+
+def test_stream():
+    """Test that streamed chunks match the full simulation."""
+    objects = [
+        Sphere(radius=0.1, initial_velocity=torch.rand(3), force=force)
+        for force in [Gravity() + Drag(), Gravity(), None]
+    ]
+    scene = Scene(objects=objects)
+    scene.simulate(stop_time=1.0, n_steps=100)
+    reference = torch.stack([obj.states for obj in objects], dim=1)
+
+    with torch.no_grad():
+        chunks = list(scene.stream(stop_time=1.0, n_steps=100, chunk_size=7))
+    assert len(chunks) == 15
+    assert all(states.shape == (7, 3, 6) for _, states in chunks[:-1])
+
+    time = torch.cat([time for time, _ in chunks])
+    states = torch.cat([states for _, states in chunks])
+    assert torch.allclose(time, torch.linspace(0, 1.0, 100))
+    assert torch.allclose(states, reference, atol=1e-5)
+
+    # Early stop
+    for time, states in scene.stream(stop_time=1.0, n_steps=100):
+        if time[-1] > 0.5:
+            break
+    assert torch.allclose(states[-1], reference[50], atol=1e-5)
+
+
+def test_batch_simulation():
+    """Test that a batch of spheres is simulated like individual spheres."""
+
+    n = 5
+    force = Gravity() + Drag()
+    batch = SphereBatch(
+        radius=torch.rand(n) * 0.1 + 0.05,
+        initial_position=torch.rand(n, 3),
+        initial_velocity=torch.rand(n, 3),
+        force=force,
+    )
+    spheres = [batch[i] for i in range(n)]
+    static = Sphere(radius=0.1, initial_position=torch.ones(3))
+
+    scene = Scene(objects=[static, batch] + spheres)
+    scene.simulate(stop_time=1.0, n_steps=50)
+
+    assert batch.trajectory.shape == (50, n, 3)
+    trajectories = torch.stack([sphere.trajectory for sphere in spheres], 1)
+    assert torch.allclose(batch.trajectory, trajectories)
+    assert torch.allclose(batch[2:4].trajectory, trajectories[:, 2:4])
+
+    scene.simulate(
+        stop_time=5.0, n_steps=20, method="dopri5", events=[GroundHit(batch)]
+    )
+    assert torch.allclose(batch.trajectory[-1, :, 2].min(), torch.zeros(()))
+
+
+def test_attach_states():
+    """Test attaching stacked states to the objects of a scene."""
+    batch = SphereBatch(initial_position=torch.rand(3, 3), force=Gravity())
+    scene = Scene([Sphere(), batch])
+    assert [Scene.n_rows(obj) for obj in scene.objects] == [1, 3]
+    assert scene.time is None
+
+    states, time = torch.rand(5, 4, 6), torch.linspace(0, 1, 5)
+    scene.attach_states(states, time)
+    assert torch.equal(scene.objects[0].states, states[:, 0])
+    assert torch.equal(batch.states, states[:, 1:])
+    assert scene.time is time and scene.event is None
+    with pytest.raises(ValueError):
+        scene.attach_states(states[:, :3], time)
+
+
+def test_shared_per_object_force():
+    """Test batches sharing a force with per-object parameters."""
+    thrust = Thrust(torch.rand(2, 3))
+    oscillation = Oscillation(altitude=torch.rand(2), frequency=2.0)
+    batches = [
+        SphereBatch(initial_position=position, force=force)
+        for force in (thrust, oscillation)
+        for position in (torch.zeros(2, 3), torch.ones(2, 3))
+    ]
+    Scene(batches).simulate(stop_time=1.0, n_steps=11)
+
+    for batch in batches:
+        states = batch.states
+        Scene([batch]).simulate(stop_time=1.0, n_steps=11)
+        assert torch.allclose(states, batch.states)
+
+
+@pytest.mark.parametrize("n_workers", [0, 2])
+def test_simulate_parallel(n_workers):
+    """Test that sharded simulations match the simulation of the scenes."""
+    def scene(seed):
+        generator = torch.Generator().manual_seed(seed)
+        return Scene([
+            Sphere(
+                radius=0.2,
+                initial_velocity=torch.tensor([1.0, 0, 5.0]),
+                force=Gravity() + Drag(),
+            ),
+            SphereBatch(
+                radius=0.1,
+                initial_position=torch.rand(5, 3, generator=generator),
+                initial_velocity=torch.rand(5, 3, generator=generator),
+                force=Gravity() + Drag(),
+            ),
+            Sphere(radius=0.3, force=Gravity()),
+        ])
+
+    scenes = [scene(0), scene(1)]
+    states = simulate_parallel(
+        scenes, stop_time=1.0, n_steps=20, n_workers=n_workers
+    )
+    assert states.shape == (20, 14, 6)
+
+    for i, parallel in enumerate(scenes):
+        reference = scene(i)
+        reference.simulate(stop_time=1.0, n_steps=20)
+        for obj, expected in zip(parallel.objects, reference.objects):
+            assert torch.allclose(obj.states, expected.states, atol=1e-5)
+
+
+def test_simulation_cache():
+    """Test that unchanged objects are restored from the cache."""
+    cache = SimulationCache()
+    target = Sphere(
+        radius=0.1,
+        initial_position=torch.tensor([13.0, 0, 10.0]),
+        force=Gravity() + Drag(),
+    )
+    speed = torch.tensor(20.0, requires_grad=True)
+    missile = Sphere(
+        radius=0.1,
+        initial_velocity=speed * torch.tensor([0.6, 0, 0.8]),
+        force=Gravity() + Drag(),
+    )
+    scene = Scene([missile, target])
+
+    scene.simulate(stop_time=1.0, n_steps=20, cache=cache)
+    reference = target.states
+    assert len(cache) == 1 and cache.misses == 1
+
+    # The target is restored, the missile keeps its gradient
+    scene.simulate(stop_time=1.0, n_steps=20, cache=cache)
+    assert cache.hits == 1
+    assert torch.equal(target.states, reference)
+    missile.trajectory[-1, 0].backward()
+    assert speed.grad is not None
+
+    # Changing an input or the time grid invalidates the entry
+    target.initial_position = torch.tensor([12.0, 0, 10.0])
+    scene.simulate(stop_time=1.0, n_steps=20, cache=cache)
+    scene.simulate(stop_time=1.0, n_steps=30, cache=cache)
+    target.force = Gravity() + Drag(density=2.0)
+    scene.simulate(stop_time=1.0, n_steps=30, cache=cache)
+    assert cache.misses == 4
+    assert len(cache) == 4
+
+    # The least recently used entries are evicted
+    cache.max_bytes = target.states.nelement() * 4
+    cache.put("key", target.states)
+    assert len(cache) == 1 and "key" in cache
+
+
+def test_simulation_cache_budget():
+    """Test that cached states do not keep the whole scene alive."""
+    cache = SimulationCache(max_bytes=10_000)
+    target = Sphere(radius=0.1, initial_position=torch.ones(3))
+    batch = SphereBatch(
+        initial_position=torch.rand(1000, 3), force=Gravity() + Drag()
+    )
+    Scene([target, batch]).simulate(stop_time=1.0, n_steps=20, cache=cache)
+    assert len(cache) == 1
+    states = next(iter(cache._entries.values()))
+    assert states.untyped_storage().nbytes() == 20 * 6 * 4
+    assert cache.nbytes <= cache.max_bytes
+
+
+def test_simulation_cache_dtype():
+    """Test that runs with different dtypes do not share cache entries."""
+    cache = SimulationCache()
+    target = Sphere(
+        radius=0.1,
+        initial_position=torch.tensor([13.0, 0, 10.0]),
+        force=Gravity() + Drag(),
+    )
+    scene = Scene([target], dtype=torch.float32)
+    scene.simulate(stop_time=1.0, n_steps=20, cache=cache)
+    assert target.states.dtype == torch.float32
+
+    scene.dtype = torch.bfloat16
+    scene.simulate(stop_time=1.0, n_steps=20, cache=cache)
+    assert target.states.dtype == torch.bfloat16
+    assert cache.hits == 0 and len(cache) == 2
+
+
+def test_profile():
+    """Test the instrumentation report of a simulation."""
+    batch = SphereBatch(
+        radius=0.1,
+        initial_position=torch.rand(10, 3),
+        initial_velocity=torch.rand(10, 3),
+        force=Gravity() + Drag(),
+    )
+    scene = Scene([batch, Sphere(force=Gravity())])
+    assert scene.simulate(stop_time=1.0, n_steps=11) is None
+
+    # 10 steps of RK4, the sphere under gravity is computed in closed form
+    report = scene.simulate(stop_time=1.0, n_steps=11, profile=True)
+    assert report.rhs_evaluations == 40
+    assert report.state_shapes == {(10, 6)}
+    assert set(report.forces) == {"SumForce.f1.Gravity", "SumForce.f2.Drag"}
+    assert report.forces["SumForce.f2.Drag"].calls == 40
+    assert report.forces["SumForce.f2.Drag"].shapes == {(10, 3)}
+    assert report.output_bytes == 40 * 10 * (6 + 3 + 3) * 4
+    assert 0 < report.force_time < report.rhs_time < report.total_time
+    assert "Drag" in str(report)
+
+    # The forces of a tree are listed separately
+    batch.force = Gravity() + Drag() + Drag(density=2.0)
+    report = scene.simulate(stop_time=1.0, n_steps=11, profile=True)
+    assert set(report.forces) == {
+        "SumForce.f1.SumForce.f1.Gravity",
+        "SumForce.f1.SumForce.f2.Drag",
+        "SumForce.f2.Drag",
+    }
+    assert report.forces["SumForce.f2.Drag"].calls == 40
+
+    ball = Sphere(force=Gravity() + Drag(), initial_velocity=torch.ones(3))
+    report = ball.simulate(torch.linspace(0, 1, 11), profile=True)
+    assert report.rhs_evaluations == 40
+    assert ball.trajectory.shape == (11, 3)
+
+
+@pytest.mark.parametrize("dtype", [torch.float64, torch.bfloat16])
+def test_dtype_policy(dtype):
+    """Test that the dtype of a scene applies to the forces and states."""
+    batch = SphereBatch(
+        radius=0.1,
+        initial_position=torch.rand(5, 3),
+        initial_velocity=torch.rand(5, 3),
+        force=Gravity() + Drag(),
+    )
+    ball = Sphere(force=Gravity(), initial_velocity=torch.ones(3))
+    spring = Sphere(force=Oscillation(altitude=1.0))
+    objects = [batch, ball, spring]
+
+    reference = Scene(objects)
+    reference.simulate(stop_time=1.0, n_steps=11)
+    expected = [obj.states for obj in objects]
+
+    scene = Scene(objects, dtype=dtype)
+    scene.simulate(stop_time=1.0, n_steps=11)
+    tolerance = 1e-5 if dtype == torch.float64 else 1e-1
+    for obj, states in zip(objects, expected):
+        assert obj.states.dtype == dtype
+        assert torch.allclose(obj.states.float(), states, atol=tolerance)
+
+    # The constant forces are computed in the dtype of the scene
+    state = batch.initial_state.to(dtype)
+    assert (Gravity() + Drag())(state, batch).dtype == dtype
+    assert ball.forces_vector(state[0]).dtype == dtype
@@ -0,0 +1,79 @@
+"""Tests for the trajectory store."""
+import numpy as np
+import pytest
+import torch
+
+from mlballistics.forces import G7, Drag, Gravity, Thrust
+from mlballistics.objects import Sphere, SphereBatch
+from mlballistics.scene import Scene
+from mlballistics.store import TrajectoryStore
+
+
+def _scene():
+    ball = Sphere(
+        radius=0.2,
+        initial_velocity=torch.tensor([1.0, 0, 5.0]),
+        force=Gravity() + Drag(drag_table=G7, form_factor=0.9),
+    )
+    batch = SphereBatch(
+        radius=0.1,
+        initial_position=torch.rand(4, 3),
+        initial_velocity=torch.rand(4, 3),
+        force=Gravity(g=9.8) + Thrust(torch.ones(4, 3)),
+    )
+    return Scene([ball, batch])
+
+
+def test_store(tmp_path):
+    """Test writing a scene to a store and reading it back."""
+    torch.manual_seed(0)
+    scene = _scene()
+    with pytest.raises(ValueError):
+        TrajectoryStore.from_scene(str(tmp_path), scene)
+
+    scene.simulate(stop_time=1.0, n_steps=20)
+    TrajectoryStore.from_scene(str(tmp_path), scene)
+
+    store = TrajectoryStore(str(tmp_path))
+    assert len(store) == 5
+    assert store.states.shape == (20, 5, 6)
+    assert isinstance(store.numpy(), np.memmap)
+    ball, batch = store.metadata["objects"]
+    assert [force["type"] for force in ball["force"]] == ["Gravity", "Drag"]
+    assert ball["force"][1]["form_factor"] == 0.9
+    assert ball["force"][1]["drag_table"]["name"] == "G7"
+    assert ball["force"][1]["drag_table"]["mach"] == G7.mach.tolist()
+    assert batch["force"] == [
+        dict(type="Gravity", g=9.8),
+        dict(type="Thrust", acceleration=[[1.0, 1.0, 1.0]] * 4),
+    ]
+    assert torch.allclose(store.radius, torch.tensor([0.2] + 4 * [0.1]))
+    assert torch.allclose(store.object_states(0), scene.objects[0].states)
+
+    # The stored states can be attached to a new scene with the same layout
+    other = _scene()
+    store.attach(other)
+    assert torch.allclose(other.objects[1].states, scene.objects[1].states)
+    other.objects[0].actor(5)
+    with pytest.raises(ValueError):
+        store.attach(Scene([Sphere()]))
+
+
+def test_store_stream(tmp_path):
+    """Test writing the chunks of a streamed simulation."""
+    scene = _scene()
+    store = TrajectoryStore.create(
+        str(tmp_path), scene.objects, n_steps=20, dtype=torch.float32
+    )
+    start = 0
+    for time, states in scene.stream(stop_time=1.0, n_steps=20, chunk_size=6):
+        store.write(start, time, states)
+        start += len(time)
+    store.flush()
+
+    scene.simulate(stop_time=1.0, n_steps=20)
+    stored = TrajectoryStore(str(tmp_path), mode="r")
+    assert torch.allclose(stored.time, scene._time)
+    assert np.allclose(
+        stored.numpy()[:, 1:], scene.objects[1].states.numpy(), atol=1e-5
+    )